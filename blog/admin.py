@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Article, Writer, Tag, Comment
+from . import deletion
 
 
 class ArticleAdmin(admin.ModelAdmin):
@@ -10,11 +11,23 @@ class ArticleAdmin(admin.ModelAdmin):
     readonly_fields = ['author', 'pub_date', 'last_edit']
     search_fields = ['name', 'author__name', 'tag__name']
 
+    def delete_model(self, request, obj):
+        deletion.delete_articles(Article.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        deletion.delete_articles(queryset)
+
 
 class WriterAdmin(admin.ModelAdmin):
     list_filter = ['age']
     search_fields = ['name', 'age']
 
+    def delete_model(self, request, obj):
+        deletion.delete_writers(Writer.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        deletion.delete_writers(queryset)
+
 
 class CommentAdmin(admin.ModelAdmin):
     list_filter = [
@@ -0,0 +1,156 @@
+"""
+Read-only JSON API of articles, writers, tags and comments for integrations, served by views.api.
+Pages are keyset-paginated by primary key with an opaque cursor and streamed: rows come from
+values_list().iterator() and are encoded one at a time, so memory does not grow with the page size.
+?fields= selects the columns to read, heavy ones like Article.text are not read unless asked for
+"""
+import base64
+import binascii
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import router
+
+from .models import Article, Writer, Tag, Comment
+
+
+buffer_size = 64 * 1024
+
+
+class InvalidQuery(Exception):
+    pass
+
+
+class Resource:
+    def __init__(self, model, fields: dict, default_fields: tuple, filters: dict = None):
+        self.model = model
+        self.fields = fields  # API field -> lookup
+        self.default_fields = default_fields
+        self.filters = filters or {}  # query parameter -> (lookup, type)
+
+
+resources = {
+    'articles': Resource(
+        Article,
+        fields={
+            'id': 'pk', 'name': 'name', 'author': 'author__name', 'tag': 'tag__name', 'text': 'text',
+            'image': 'image', 'image_width': 'image_width', 'image_height': 'image_height',
+            'pub_date': 'pub_date', 'last_edit': 'last_edit',
+        },
+        default_fields=('id', 'name', 'author', 'tag', 'image', 'pub_date', 'last_edit'),
+        filters={'writer': ('author__name', str), 'tag': ('tag__name', str)},
+    ),
+    'writers': Resource(
+        Writer,
+        fields={
+            'id': 'pk', 'name': 'name', 'bio': 'bio', 'age': 'age', 'image': 'image',
+            'num_articles': 'leaderboard__num_articles', 'last_activity': 'leaderboard__last_activity',
+        },
+        default_fields=('id', 'name', 'bio', 'age', 'image', 'num_articles'),
+        filters={'name': ('name', str)},
+    ),
+    'tags': Resource(
+        Tag,
+        fields={
+            'id': 'pk', 'name': 'name', 'image': 'image',
+            'num_articles': 'leaderboard__num_articles', 'last_activity': 'leaderboard__last_activity',
+        },
+        default_fields=('id', 'name', 'image', 'num_articles'),
+    ),
+    'comments': Resource(
+        Comment,
+        fields={'id': 'pk', 'article': 'article_id', 'author': 'author__name', 'text': 'text',
+                'comment_date': 'comment_date'},
+        default_fields=('id', 'article', 'author', 'text', 'comment_date'),
+        filters={'article': ('article_id', int), 'writer': ('author__name', str)},
+    ),
+}
+
+
+def encode_cursor(pk: int):
+    return base64.urlsafe_b64encode(str(pk).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    try:
+        return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidQuery('Invalid cursor')
+
+
+class Page:
+    """One page of a resource; parameters are validated on creation, rows are read while streaming"""
+    def __init__(self, resource: Resource, params):
+        self.resource = resource
+        self.fields = self.get_fields(params.get('fields'))
+        self.limit = self.get_limit(params.get('limit'))
+        self.after = decode_cursor(params['cursor']) if params.get('cursor') else None
+        self.filters = self.get_filters(params)
+        # resolved now, the response is streamed after the view (and its database hints) returned
+        self.db = router.db_for_read(resource.model)
+
+    def get_fields(self, value):
+        if not value:
+            return self.resource.default_fields
+        fields = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+        unknown = [field for field in fields if field not in self.resource.fields]
+        if not fields:
+            raise InvalidQuery('No fields')
+        if unknown:
+            raise InvalidQuery('Unknown fields: {}'.format(', '.join(unknown)))
+        return fields
+
+    def get_limit(self, value):
+        if value is None:
+            return settings.API_PAGE_SIZE
+        try:
+            limit = int(value)
+        except ValueError:
+            raise InvalidQuery('Invalid limit')
+        if not 1 <= limit <= settings.API_MAX_PAGE_SIZE:
+            raise InvalidQuery('Limit must be between 1 and {}'.format(settings.API_MAX_PAGE_SIZE))
+        return limit
+
+    def get_filters(self, params):
+        filters = {}
+        for param, (lookup, type_) in self.resource.filters.items():
+            if param in params:
+                try:
+                    filters[lookup] = type_(params[param])
+                except ValueError:
+                    raise InvalidQuery('Invalid {}'.format(param))
+        return filters
+
+    def get_queryset(self):
+        queryset = self.resource.model.objects.using(self.db).filter(**self.filters)
+        if self.after is not None:
+            queryset = queryset.filter(pk__gt=self.after)
+        lookups = [self.resource.fields[field] for field in self.fields]
+        # one row more than the page tells whether there is a next page
+        return queryset.order_by('pk').values_list('pk', *lookups)[:self.limit + 1]
+
+    def get_item(self, values):
+        item = dict(zip(self.fields, values))
+        if item.get('image'):
+            item['image'] = settings.MEDIA_URL + item['image']
+        return item
+
+    def stream(self, get_next_url):
+        """Yields the page as {"results": [...], "next": url or null} in chunks of about buffer_size"""
+        encoder = DjangoJSONEncoder()
+        parts, size = ['{"results": ['], 0
+        last_pk, has_next = None, False
+        for index, (pk, *values) in enumerate(self.get_queryset().iterator(chunk_size=settings.API_CHUNK_SIZE)):
+            if index == self.limit:
+                has_next = True
+                break
+            part = (',' if index else '') + encoder.encode(self.get_item(values))
+            parts.append(part)
+            size += len(part)
+            last_pk = pk
+            if size >= buffer_size:
+                yield ''.join(parts)
+                parts, size = [], 0
+        next_url = get_next_url(encode_cursor(last_pk)) if has_next else None
+        parts.append('], "next": {}}}'.format(encoder.encode(next_url)))
+        yield ''.join(parts)
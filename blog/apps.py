@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class BlogConfig(AppConfig):
     name = 'blog'
+
+    def ready(self):
+        from . import auth, registry, leaderboards, stats, feeds  # noqa: F401 connects signal receivers
@@ -0,0 +1,43 @@
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import metrics
+
+
+def get_cache_key(user_id):
+    return 'blog:auth_user:{}'.format(user_id)
+
+
+def cache_is_shared():
+    return not isinstance(caches['default'], LocMemCache)
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend that keeps users loaded by AuthenticationMiddleware in cache,
+    so authenticated requests do not query auth_user. Cached user is dropped on every save,
+    session hash check of AuthenticationMiddleware still works after password change.
+    Users are cached only in a cache shared by all worker processes
+    """
+    def get_user(self, user_id):
+        if not cache_is_shared():
+            # dropping a changed user would reach only this process, others would keep it authenticated
+            return super().get_user(user_id)
+        key = get_cache_key(user_id)
+        user = cache.get(key)
+        metrics.record_cache('auth_user', user is not None)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_user(sender, instance, **kwargs):
+    cache.delete(get_cache_key(instance.pk))
@@ -1,3 +1,4 @@
+import time
 import functools
 import logging
 
@@ -5,6 +6,8 @@ from django.conf import settings
 from django.http import Http404
 from django.http import HttpResponse
 
+from . import metrics
+
 
 logger = logging.getLogger('blog_logger')
 
@@ -16,14 +19,28 @@ def raise_blog_error():
 def base_view(fun):
     @functools.wraps(fun)
     def inner(*args, **kwargs):
-        if settings.DEBUG is True:
-            return fun(*args, **kwargs)
-
+        started = time.perf_counter()
+        status = 500
         try:
-            return fun(*args, **kwargs)
+            response = call_view(fun, *args, **kwargs)
+            status = response.status_code
+            return response
         except Http404:
-            raise Http404
-        except Exception:
-            logger.error('in {fun_name}: 500 server error'.format(fun_name=fun.__module__ + '.' + fun.__name__))
-            return raise_blog_error()
+            status = 404
+            raise
+        finally:
+            metrics.record_request(fun.__name__, status, time.perf_counter() - started)
     return inner
+
+
+def call_view(fun, *args, **kwargs):
+    if settings.DEBUG is True:
+        return fun(*args, **kwargs)
+
+    try:
+        return fun(*args, **kwargs)
+    except Http404:
+        raise Http404
+    except Exception:
+        logger.error('in {fun_name}: 500 server error'.format(fun_name=fun.__module__ + '.' + fun.__name__))
+        return raise_blog_error()
@@ -0,0 +1,180 @@
+"""
+Micro-benchmarks of pure functions on synthetic inputs, no database needed.
+Times are stored relative to a fixed pure-Python workload (calibration),
+so baseline.json recorded on one machine is comparable on another
+"""
+import os
+import io
+import json
+import time
+import random
+import statistics
+import shutil
+import datetime
+import tempfile
+from types import SimpleNamespace
+
+from PIL import Image
+from django.utils import timezone
+
+from blog import model_logic
+from blog.logic import IndexView, SearchView
+from blog.templatetags.get_datetime import get_datetime
+
+
+baseline_path = os.path.join(os.path.dirname(__file__), 'baseline.json')
+cases = {}
+
+
+def case(number: int, tolerance: float = 1):
+    """
+    Registers function as benchmark case, setup() returns callable measured number times per round.
+    Allowed slowdown of the case is tolerance times the one of the gate, more for calls of a few microseconds
+    """
+    def register(setup):
+        cases[setup.__name__] = (setup, number, tolerance)
+        return setup
+    return register
+
+
+def measure(fun, number: int):
+    """Time of one call, averaged over number calls"""
+    started = time.perf_counter()
+    for _ in range(number):
+        fun()
+    return (time.perf_counter() - started) / number
+
+
+def calibration():
+    rng = random.Random(0)
+    values = [rng.random() for _ in range(20000)]
+    return lambda: sorted(values)
+
+
+def run(names: list = None, rounds: int = 15):
+    """
+    Returns {name: {'seconds': ..., 'relative': ...}}, medians over rounds. Every round times
+    the calibration right before the case, so the relative time does not follow changes of CPU speed
+    """
+    reference = calibration()
+    results = {}
+    for name in names or sorted(cases):
+        setup, number, tolerance = cases[name]
+        fun = setup()
+        times, relative = [], []
+        try:
+            for _ in range(rounds):
+                calibration_seconds = measure(reference, 3)
+                getattr(fun, 'before_round', lambda: None)()
+                times.append(measure(fun, number))
+                relative.append(times[-1] / calibration_seconds)
+        finally:
+            getattr(fun, 'cleanup', lambda: None)()
+        results[name] = {'seconds': statistics.median(times), 'relative': statistics.median(relative)}
+    return results
+
+
+def load_baseline(path: str = baseline_path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_baseline(results: dict, path: str = baseline_path):
+    with open(path, 'w') as file:
+        relative = {name: float('{:.6g}'.format(result['relative'])) for name, result in sorted(results.items())}
+        json.dump(relative, file, indent=2)
+        file.write('\n')
+
+
+def compare(results: dict, baseline: dict, max_slowdown: float):
+    """
+    Returns [(name, slowdown in percent)] of cases more than max_slowdown percent
+    (times tolerance of the case) slower than baseline
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        slowdown = (result['relative'] / baseline[name] - 1) * 100
+        tolerance = cases[name][2] if name in cases else 1
+        if slowdown > max_slowdown * tolerance:
+            regressions.append((name, slowdown))
+    return regressions
+
+
+class SyntheticIndexView(IndexView):
+    """Groups already ordered articles, order_articles is the database part of get_groups"""
+    def __init__(self):
+        pass
+
+    def order_articles(self, articles):
+        return list(articles)
+
+
+def get_articles(count: int):
+    return [SimpleNamespace(name=f'article {i}', num_comments=count - i) for i in range(count)]
+
+
+def seeded(fun):
+    """Groups are picked with random: every round reseeds it, so every round does the same work"""
+    fun.before_round = lambda: random.seed(0)
+    return fun
+
+
+@case(number=200, tolerance=2)
+def index_get_groups():
+    view, articles = SyntheticIndexView(), get_articles(30)
+    return seeded(lambda: view.get_groups(articles))
+
+
+@case(number=2000, tolerance=2)
+def index_append_to_groups():
+    view, articles = SyntheticIndexView(), get_articles(30)
+    return seeded(lambda: view.append_to_groups([], articles))
+
+
+@case(number=5)
+def search_in():
+    rng = random.Random(0)
+    words = ['coffee', 'travel', 'python', 'django', 'garden', 'winter', 'street', 'music', 'river', 'design']
+    instances = [SimpleNamespace(name=' '.join(rng.choice(words) for _ in range(4))) for _ in range(500)]
+    view = SearchView(None)
+    return lambda: view.search_in(instances, 'pythn garden')
+
+
+def get_test_image(size: tuple):
+    """Deterministic photo-like image: gradient with noise"""
+    gradient = Image.linear_gradient('L').resize(size)
+    noise = Image.effect_noise(size, 40)
+    return Image.merge('RGB', (gradient, noise, gradient.transpose(Image.FLIP_LEFT_RIGHT)))
+
+
+@case(number=3)
+def resize_image():
+    directory = tempfile.mkdtemp()
+    buffer = io.BytesIO()
+    get_test_image((2400, 1600)).save(buffer, format='JPEG', quality=90)
+    source, target = os.path.join(directory, 'source.jpg'), os.path.join(directory, 'image.jpg')
+    with open(source, 'wb') as file:
+        file.write(buffer.getvalue())
+
+    def fun():
+        shutil.copyfile(source, target)
+        model_logic.resize_image(target, max_bytes=model_logic.max_image_bytes['article']).close()
+    fun.cleanup = lambda: shutil.rmtree(directory)
+    return fun
+
+
+@case(number=50)
+def square_image():
+    image = get_test_image((1500, 1000))
+    return lambda: model_logic.square_image(image)
+
+
+@case(number=5000, tolerance=2)
+def get_datetime_tag():
+    now = timezone.now()
+    dates = [now - datetime.timedelta(seconds=seconds) for seconds in (5, 90, 4000, 90000, 3000000)]
+    return lambda: [get_datetime(date) for date in dates]
@@ -0,0 +1,136 @@
+"""
+Set-based delete of articles and writers. Model.delete() loads every comment and report into Python
+to cascade and sends post_delete for each of them; here dependent rows are deleted by one DELETE per
+table in a single transaction, and the summaries the signal receivers would keep (WriterStats,
+leaderboards) are adjusted once per affected writer and tag. Image files are deleted after commit
+by a background thread, collect_orphaned_media removes any that it did not get to
+"""
+import os
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, F, QuerySet
+
+from .models import Article, Writer, Comment, Report, Upload, WriterStats, WriterLeaderboard, TagLeaderboard
+from .models import ArticleRevision
+from . import feeds
+from . import leaderboards
+from . import model_logic
+from . import stats
+
+
+logger = logging.getLogger('blog_logger')
+
+kept_images = {model_logic.default_writer_image, model_logic.default_tag_image}
+executor = None
+executor_lock = threading.Lock()
+
+
+def raw_delete(queryset: QuerySet):
+    """One DELETE without loading rows or sending signals; callers handle dependent rows and summaries"""
+    return queryset._raw_delete(queryset.db)
+
+
+def delete_articles(articles: QuerySet):
+    """Deletes articles with their comments, reports and revisions, returns number of deleted articles"""
+    with transaction.atomic():
+        by_author = dict(
+            articles.order_by().values('author').annotate(count=Count('pk')).values_list('author', 'count')
+        )
+        if not by_author:
+            return 0
+        by_tag = dict(
+            articles.filter(tag__isnull=False).order_by().values('tag').annotate(count=Count('pk'))
+            .values_list('tag', 'count')
+        )
+        images = list(articles.exclude(image__isnull=True).exclude(image='').values_list('image', flat=True))
+
+        comments = Comment.objects.filter(article__in=articles.values('pk'))
+        received = Counter(dict(
+            comments.order_by().values('article__author').annotate(count=Count('pk'))
+            .values_list('article__author', 'count')
+        ))
+        commenters = set(comments.order_by().values_list('author', flat=True).distinct())
+
+        raw_delete(comments)
+        raw_delete(Report.objects.filter(article__in=articles.values('pk')))
+        raw_delete(ArticleRevision.objects.filter(article__in=articles.values('pk')))
+        deleted = raw_delete(articles)
+
+        for author_id, count in by_author.items():
+            stats.get_stats(author_id).update(
+                num_articles=F('num_articles') - count,
+                num_comments_received=F('num_comments_received') - received[author_id],
+            )
+            leaderboards.remove_article(WriterLeaderboard, author_id, count)
+        for tag_id, count in by_tag.items():
+            leaderboards.remove_article(TagLeaderboard, tag_id, count)
+        # own articles and comments on deleted articles were part of the last activity
+        WriterStats.objects.filter(writer__in=set(by_author) | commenters).update(
+            last_activity=stats.recompute_last_activity()
+        )
+        feeds.invalidate(writers=by_author, tags=by_tag)
+        delete_files_on_commit(images)
+    return deleted
+
+
+def delete_writers(writers: QuerySet):
+    """Deletes writers with their articles, comments, reports and uploads, returns number of deleted writers"""
+    with transaction.atomic():
+        writer_ids = list(writers.values_list('pk', flat=True))
+        if not writer_ids:
+            return 0
+        delete_articles(Article.objects.filter(author__in=writer_ids))
+        images = list(
+            Writer.objects.filter(pk__in=writer_ids).exclude(image__isnull=True).exclude(image='')
+            .values_list('image', flat=True)
+        )
+        staged = [os.path.join(model_logic.upload_staging_dir, str(pk))
+                  for pk in Upload.objects.filter(owner__in=writer_ids).values_list('pk', flat=True)]
+
+        comments = Comment.objects.filter(author__in=writer_ids)
+        received = (
+            comments.order_by().values('article__author').annotate(count=Count('pk'))
+            .values_list('article__author', 'count')
+        )
+        for author_id, count in received:
+            stats.get_stats(author_id).update(num_comments_received=F('num_comments_received') - count)
+        raw_delete(comments)
+        raw_delete(Report.objects.filter(reporter__in=writer_ids))
+        raw_delete(Upload.objects.filter(owner__in=writer_ids))
+        raw_delete(WriterStats.objects.filter(writer__in=writer_ids))
+        raw_delete(WriterLeaderboard.objects.filter(writer__in=writer_ids))
+        deleted = raw_delete(Writer.objects.filter(pk__in=writer_ids))
+        delete_files_on_commit(images + staged)
+    return deleted
+
+
+def delete_files_on_commit(names: list):
+    names = [name for name in names if name not in kept_images]
+    if names:
+        transaction.on_commit(lambda: get_executor().submit(delete_files, names))
+
+
+def get_executor():
+    global executor
+    with executor_lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='blog-media-cleanup')
+    return executor
+
+
+def delete_files(names: list):
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except OSError:
+            logger.warning('could not delete {}, collect_orphaned_media will'.format(name))
+
+
+def wait_for_cleanup():
+    """Blocks until files of already committed deletes are deleted"""
+    get_executor().submit(lambda: None).result()
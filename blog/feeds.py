@@ -0,0 +1,148 @@
+"""
+RSS and Atom feeds of the latest articles: site-wide, per writer and per tag. Every feed has a version
+in the shared cache, set to the time of the last change of one of its articles; a generation shared by
+all feeds changes when writers or tags are edited or data is imported. Rendered feeds are cached under
+their versions, so a feed is regenerated only after a relevant change, and feed readers polling with
+If-None-Match or If-Modified-Since get 304 after reading the two versions from cache.
+Versions expire after FEED_MAX_AGE seconds, so processes that do not share the cache (LocMemCache)
+and never see a change made by another one serve it at most that much later
+"""
+import time
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models.functions import Substr
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.urls import reverse
+from django.utils.feedgenerator import Rss201rev2Feed, Atom1Feed
+
+from .models import Article, Writer, Tag
+from . import metrics
+
+
+formats = {'rss': Rss201rev2Feed, 'atom': Atom1Feed}
+generation_key = 'blog:feed_generation'
+
+
+def get_version_key(scope: str):
+    return 'blog:feed_version:' + scope
+
+
+def get_versions(scope: str):
+    """(generation, version) of a feed, evicted or never set ones start now"""
+    key = get_version_key(scope)
+    versions = cache.get_many([generation_key, key])
+    if len(versions) < 2:
+        now = time.time_ns()
+        for missing in {generation_key, key} - set(versions):
+            cache.add(missing, now, settings.FEED_MAX_AGE)
+        versions = {generation_key: now, key: now, **cache.get_many([generation_key, key])}
+    return versions[generation_key], versions[key]
+
+
+def bump(keys: list):
+    now = time.time_ns()
+    cache.set_many({key: now for key in keys}, settings.FEED_MAX_AGE)
+
+
+def bump_now_and_on_commit(keys: list):
+    # bumped again after commit, so a feed rendered before the change was visible is not kept
+    bump(keys)
+    transaction.on_commit(lambda: bump(keys))
+
+
+def invalidate(writers=(), tags=()):
+    """Site feed and feeds of the given writer and tag ids change"""
+    scopes = ['site']
+    scopes += ['writer:{}'.format(pk) for pk in set(writers)]
+    scopes += ['tag:{}'.format(pk) for pk in set(tags) if pk is not None]
+    bump_now_and_on_commit([get_version_key(scope) for scope in scopes])
+
+
+def invalidate_all():
+    bump_now_and_on_commit([generation_key])
+
+
+class Feed:
+    def __init__(self, kind: str, scope: str, title: str, link: str, feed_link: str, filters: dict):
+        self.kind = kind
+        self.scope = scope
+        self.title = title
+        self.link = link
+        self.feed_link = feed_link
+        self.filters = filters
+        self.generation, self.version = get_versions(scope)
+
+    def get_etag(self):
+        return '"{}-{}-{}"'.format(self.kind, self.generation, self.version)
+
+    def get_last_modified(self):
+        return max(self.generation, self.version) // 10 ** 9
+
+    def get_content(self, base_url: str):
+        """Rendered feed, from cache unless one of its versions changed since it was rendered"""
+        key = 'blog:feed:' + hashlib.md5('{}|{}|{}'.format(self.scope, base_url, self.get_etag()).encode()).hexdigest()
+        content = cache.get(key)
+        metrics.record_cache('feed', content is not None)
+        if content is None:
+            content = self.render(base_url)
+            cache.set(key, content, settings.FEED_CACHE_TIMEOUT)
+        return content
+
+    def get_articles(self):
+        # from the primary: a lagging replica would be cached under the new version until the next change
+        return (
+            Article.objects.using(router.db_for_write(Article)).filter(**self.filters).order_by('-pub_date')
+            .annotate(summary=Substr('text', 1, settings.FEED_SUMMARY_LENGTH))
+            .values_list('name', 'author__name', 'tag__name', 'summary', 'pub_date', 'last_edit')
+            [:settings.FEED_SIZE]
+        )
+
+    def render(self, base_url: str):
+        feed = formats[self.kind](
+            title=self.title,
+            link=base_url + self.link,
+            description=self.title,
+            language='en',
+            feed_url=base_url + self.feed_link,
+        )
+        for name, author, tag, summary, pub_date, last_edit in self.get_articles():
+            link = base_url + reverse('blog:article', args=(author, name))
+            feed.add_item(
+                title=name,
+                link=link,
+                unique_id=link,
+                description=summary,
+                author_name=author,
+                pubdate=pub_date,
+                updateddate=last_edit,
+                categories=[tag] if tag else None,
+            )
+        return feed.writeString('utf-8')
+
+
+@receiver(pre_save, sender=Article)
+def remember_tag(sender, instance, **kwargs):
+    # leaderboards reset loaded_tag_id in their post_save receiver, which may run before invalidate_article
+    instance.feed_tag_id = getattr(instance, 'loaded_tag_id', None)
+
+
+@receiver(post_save, sender=Article)
+def invalidate_article(sender, instance, **kwargs):
+    invalidate(writers=[instance.author_id], tags=[instance.tag_id, getattr(instance, 'feed_tag_id', None)])
+
+
+@receiver(post_delete, sender=Article)
+def invalidate_deleted_article(sender, instance, **kwargs):
+    invalidate(writers=[instance.author_id], tags=[instance.tag_id])
+
+
+@receiver(post_save, sender=Writer)
+@receiver(post_save, sender=Tag)
+def invalidate_names(sender, instance, created, **kwargs):
+    # names of writers and tags are in items of other feeds; new ones have no articles yet
+    if not created:
+        invalidate_all()
@@ -1,14 +1,29 @@
 from django import forms
 
 
-class AddForm(forms.Form):
+class ImageOrUploadForm(forms.Form):
+    """Image is either posted with the form or uploaded in chunks beforehand and referenced by upload_id"""
+    upload_id = forms.UUIDField(widget=forms.HiddenInput(), required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.image_is_required and not cleaned_data.get('image') and not cleaned_data.get('upload_id'):
+            self.add_error('image', 'This field is required.')
+        return cleaned_data
+
+
+class AddForm(ImageOrUploadForm):
+    image_is_required = True
+
     name = forms.CharField(widget=forms.TextInput(attrs={'type': 'title', 'id': 'title', 'placeholder': 'Title', 'autocomplete': 'off'}), max_length=70)
     text = forms.CharField(widget=forms.Textarea(attrs={'id': 'art', 'class': 'textareacl', 'placeholder': 'Text', 'autocomplete': 'off'}))
-    image = forms.ImageField(widget=forms.ClearableFileInput(attrs={'id': 'avatarfile'}))
+    image = forms.ImageField(widget=forms.ClearableFileInput(attrs={'id': 'avatarfile'}), required=False)
+
 
+class WriterImageForm(ImageOrUploadForm):
+    image_is_required = True
 
-class WriterImageForm(forms.Form):
-    image = forms.ImageField(widget=forms.ClearableFileInput(attrs={'id': 'af', 'name': 'avatarfile'}))
+    image = forms.ImageField(widget=forms.ClearableFileInput(attrs={'id': 'af', 'name': 'avatarfile'}), required=False)
 
 
 class WriterBioForm(forms.Form):
@@ -26,7 +41,9 @@ class LogInForm(forms.Form):
     password = forms.CharField(widget=forms.PasswordInput(attrs={'placeholder': 'Your password', 'autocomplete': 'off'}), max_length=50)
 
 
-class EditForm(forms.Form):
+class EditForm(ImageOrUploadForm):
+    image_is_required = False
+
     name = forms.CharField(widget=forms.TextInput(attrs={'type': 'title', 'id': 'title', 'placeholder': 'Title', 'autocomplete': 'off'}), max_length=70)
     text = forms.CharField(widget=forms.Textarea(attrs={'id': 'art', 'class': 'textareacl', 'placeholder': 'Text', 'autocomplete': 'off'}))
     image = forms.ImageField(widget=forms.ClearableFileInput(attrs={'id': 'avatarfile', 'name': 'avatarfile'}), required=False)
@@ -0,0 +1,114 @@
+"""
+Leaderboards of Authors and Tags pages are summary tables instead of Count('article') on every request.
+Counts and last activity are updated incrementally on article create/edit/delete,
+ranks are computed by full rebuild (manage.py refresh_leaderboards), which also repairs any drift
+"""
+from django.db import transaction
+from django.db.models import F, Count, Max, Value, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Article, Writer, Tag, WriterLeaderboard, TagLeaderboard
+
+
+def rebuild(entry_model, source_model, key: str, batch_size: int = 1000):
+    """Recomputes all entries in one transaction"""
+    rows = (
+        source_model.objects
+        .annotate(num_articles=Count('article'), last_activity=Max('article__last_edit'))
+        .order_by('-num_articles', 'pk')
+        .values_list('pk', 'num_articles', 'last_activity')
+    )
+    with transaction.atomic():
+        entry_model.objects.all().delete()
+        batch, rank, previous = [], 0, None
+        for position, (pk, num_articles, last_activity) in enumerate(rows.iterator(), start=1):
+            if num_articles != previous:
+                rank, previous = position, num_articles
+            batch.append(entry_model(**{
+                key + '_id': pk,
+                'num_articles': num_articles,
+                'last_activity': last_activity,
+                'rank': rank,
+            }))
+            if len(batch) >= batch_size:
+                entry_model.objects.bulk_create(batch)
+                batch = []
+        entry_model.objects.bulk_create(batch)
+
+
+def rebuild_all():
+    rebuild(WriterLeaderboard, Writer, 'writer')
+    rebuild(TagLeaderboard, Tag, 'tag')
+
+
+# leaderboard model -> (its key field, matching Article field)
+keys = {
+    WriterLeaderboard: ('writer', 'author'),
+    TagLeaderboard: ('tag', 'tag'),
+}
+
+
+def add_article(entry_model, pk: int, last_edit):
+    key, _ = keys[entry_model]
+    entry_model.objects.filter(**{key: pk}).update(
+        num_articles=F('num_articles') + 1,
+        last_activity=get_latest(last_edit),
+    )
+
+
+def remove_article(entry_model, pk: int, count: int = 1):
+    key, article_field = keys[entry_model]
+    latest = Article.objects.filter(**{article_field: OuterRef(key)}).order_by('-last_edit').values('last_edit')[:1]
+    entry_model.objects.filter(**{key: pk}).update(
+        num_articles=F('num_articles') - count,
+        last_activity=Subquery(latest),
+    )
+
+
+def touch(entry_model, pk: int, last_edit):
+    key, _ = keys[entry_model]
+    entry_model.objects.filter(**{key: pk}).update(last_activity=get_latest(last_edit))
+
+
+def get_latest(last_edit):
+    return Greatest(Coalesce(F('last_activity'), Value(last_edit)), Value(last_edit))
+
+
+@receiver(post_save, sender=Writer)
+def create_writer_entry(sender, instance, created, **kwargs):
+    if created:
+        WriterLeaderboard.objects.get_or_create(writer=instance)
+
+
+@receiver(post_save, sender=Tag)
+def create_tag_entry(sender, instance, created, **kwargs):
+    if created:
+        TagLeaderboard.objects.get_or_create(tag=instance)
+
+
+@receiver(post_save, sender=Article)
+def article_saved(sender, instance, created, **kwargs):
+    loaded_tag_id = getattr(instance, 'loaded_tag_id', None)
+    if created:
+        add_article(WriterLeaderboard, instance.author_id, instance.last_edit)
+    else:
+        touch(WriterLeaderboard, instance.author_id, instance.last_edit)
+
+    if not created and instance.tag_id == loaded_tag_id:
+        if instance.tag_id is not None:
+            touch(TagLeaderboard, instance.tag_id, instance.last_edit)
+    else:
+        if loaded_tag_id is not None:
+            remove_article(TagLeaderboard, loaded_tag_id)
+        if instance.tag_id is not None:
+            add_article(TagLeaderboard, instance.tag_id, instance.last_edit)
+    instance.loaded_tag_id = instance.tag_id
+
+
+@receiver(post_delete, sender=Article)
+def article_deleted(sender, instance, **kwargs):
+    remove_article(WriterLeaderboard, instance.author_id)
+    if instance.tag_id is not None:
+        remove_article(TagLeaderboard, instance.tag_id)
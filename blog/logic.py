@@ -1,22 +1,38 @@
 import os
+import hmac
+import json
 import random
 import datetime
 from math import floor
 from fuzzysearch import find_near_matches
 
+from django.db import IntegrityError, transaction
 from django.db.models.query import QuerySet
-from django.db.models import Count
+from django.db.models import Count, F, Q
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from django.core.handlers.wsgi import WSGIRequest
 from django.shortcuts import render, get_object_or_404
-from django.http import HttpResponseRedirect, JsonResponse
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse, Http404, StreamingHttpResponse
 from django.urls import reverse
+from django.core.validators import get_available_image_extensions
+from django.core.files.storage import default_storage
 from django.conf import settings
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 
-from .models import Article, Writer, Tag, Report
+from .models import Article, Writer, Tag, Report, Upload, WriterLeaderboard, TagLeaderboard, WriterStats
+from .models import ArticleRevision
+from .middleware import get_writer
+from .registry import tag_registry
 from . import forms
+from . import model_logic
+from . import metrics
+from . import api
+from . import deletion
+from . import revisions
+from . import feeds
 
 
 class BaseView:
@@ -29,6 +45,43 @@ class BaseView:
         else:
             return True
 
+    def current_writer(self):
+        """Writer of the current user or None, resolved at most once per request by CurrentWriterMiddleware"""
+        if not hasattr(self.request, 'writer'):
+            self.request.writer = get_writer(self.request.user)
+        return self.request.writer
+
+    def get_stats(self, writer: Writer):
+        return WriterStats.objects.filter(pk=writer.pk).first()
+
+    def get_writer(self):
+        writer = self.current_writer()
+        if not writer:
+            raise Http404
+        return writer
+
+    def get_image(self):
+        """Image posted with the form or finished chunked upload referenced by upload_id"""
+        if 'image' in self.request.FILES:
+            return self.request.FILES['image']
+
+        upload_id = self.request.POST.get('upload_id')
+        if not upload_id:
+            return None
+        upload = get_object_or_404(Upload, pk=upload_id, owner=self.get_writer())
+        if not upload.is_complete():
+            return None
+        file = upload.get_file()
+        upload.delete()
+        return file
+
+    def upload_is_complete(self):
+        """False if the form references an upload of the writer that is unknown or not finished yet"""
+        upload_id = self.request.POST.get('upload_id')
+        if 'image' in self.request.FILES or not upload_id:
+            return True
+        return Upload.objects.filter(pk=upload_id, owner=self.get_writer(), offset=F('size')).exists()
+
 
 class IndexView(BaseView):
     modes_for_1_in_row = [0]
@@ -94,8 +147,9 @@ class IndexView(BaseView):
         elif len(articles) <= 30:
             articles = articles.annotate(num_comments=Count('comment')).order_by('-num_comments')
         else:
-            articles = articles.order_by('-last_edit')[random.randint(20, 30)]
-            articles.annotate(num_comments=Count('comment')).order_by('-num_comments')
+            latest = list(articles.order_by('-last_edit').values_list('pk', flat=True)[:random.randint(20, 30)])
+            articles = Article.objects.filter(pk__in=latest).annotate(num_comments=Count('comment'))
+            articles = articles.order_by('-num_comments')
         return list(articles)
 
     def append_to_groups(self, groups: list, articles: list):
@@ -131,9 +185,9 @@ class IndexView(BaseView):
 
     def protect_from_unexisting_user(self):
         """In case user(usually superuser) does not exist in Writer db and tries to visit page"""
-        user_is_authenticated = self.request.user.is_authenticated
-        user_exists = Writer.objects.filter(name=self.request.user.username).exists()
-        if user_is_authenticated and not user_exists:
+        if not self.request.user.is_authenticated:
+            return
+        if not self.current_writer():
             logout(self.request)
 
 
@@ -213,7 +267,7 @@ class ArticleView(BaseView):
             return self.render()
 
     def create_comment(self, form: forms.CommentForm, article: Article):
-        author = get_object_or_404(Writer, name=self.request.user.username)
+        author = self.get_writer()
         text = form.cleaned_data['text']
         comment_date = timezone.now()
 
@@ -240,6 +294,7 @@ class WriterView(BaseView):
         self.context = {
             'message': message,
             'writer': writer,
+            'stats': self.get_stats(writer),
             'articles': articles,
         }
 
@@ -252,8 +307,8 @@ class MyPageView(BaseView):
         self.template = 'blog/my_page.html'
 
     def set_context(self, message: str = None, add_form: forms.AddForm = None):
-        writer = get_object_or_404(Writer, name=self.request.user.username)
-        tags = Tag.objects.all()
+        writer = self.get_writer()
+        tags = tag_registry.all()
         articles = writer.article_set.order_by('-pub_date')
 
         if message is None and articles == []:
@@ -268,6 +323,7 @@ class MyPageView(BaseView):
             'tags': tags,
             'message': message,
             'writer': writer,
+            'stats': self.get_stats(writer),
             'articles': articles,
             'image_form': image_form,
             'bio_form': bio_form,
@@ -275,7 +331,7 @@ class MyPageView(BaseView):
         }
 
     def process_bio_form(self):
-        writer = Writer.objects.get(name=self.request.user.username)
+        writer = self.get_writer()
         bio_form = forms.WriterBioForm(self.request.POST)
 
         if bio_form.is_valid:
@@ -308,7 +364,7 @@ class MyPageView(BaseView):
 
         text = add_form.cleaned_data['text']
         name = add_form.cleaned_data['name']
-        writer = Writer.objects.get(name=self.request.user.username)
+        writer = self.get_writer()
 
         if self.spec_chars_in_name(name):
             return self.render_if_spec_chars_in_name()
@@ -320,7 +376,13 @@ class MyPageView(BaseView):
         if list(writer.article_set.filter(name=name)) != []:
             return self.render_if_name_is_unavailable()
 
-        self.create_article()
+        # resolved before the insert, so an unusable upload cannot leave an article without image behind
+        image = self.get_image() if self.upload_is_complete() else None
+        if image is None:
+            return self.render_if_upload_is_not_complete(name, text)
+
+        if not self.create_article(image):
+            return self.render_if_name_is_unavailable()
 
         return HttpResponseRedirect(reverse('blog:my_page'))
 
@@ -364,24 +426,35 @@ class MyPageView(BaseView):
         self.set_context(message)
         return self.render()
 
-    def create_article(self):
+    def render_if_upload_is_not_complete(self, name: str, text: str):
+        message = 'Image upload is not finished'
+        add_form_with_init = forms.AddForm(initial={'name': name, 'text': text})
+        self.set_context(message, add_form_with_init)
+        return self.render()
+
+    def create_article(self, image):
         tag_name = self.request.POST['tag']
-        tag = get_object_or_404(Tag, name=tag_name)
+        tag = tag_registry.get_or_404(tag_name)
         text = self.request.POST['text']
         name = self.request.POST['name']
-        writer = Writer.objects.get(name=self.request.user.username)
-
-        article = writer.article_set.create(
-            name=name,
-            text=text,
-            tag=tag,
-            pub_date=timezone.now(),
-            last_edit=timezone.now(),
-        )
-        article.upload_image(self.request.FILES['image'])
+        writer = self.get_writer()
+
+        try:
+            with transaction.atomic():
+                article = writer.article_set.create(
+                    name=name,
+                    text=text,
+                    tag=tag,
+                    pub_date=timezone.now(),
+                    last_edit=timezone.now(),
+                )
+        except IntegrityError:
+            return False
+        article.upload_image(image)
+        return True
 
     def process_image_form(self):
-        writer = Writer.objects.get(name=self.request.user.username)
+        writer = self.get_writer()
         image_form = forms.WriterImageForm(self.request.POST, self.request.FILES)
         if not image_form.is_valid():
             return self.render_if_invalid_form()
@@ -389,8 +462,11 @@ class MyPageView(BaseView):
         return HttpResponseRedirect(reverse('blog:my_page'))
 
     def replace_image(self, writer: Writer):
+        image = self.get_image()
+        if image is None:
+            return
         writer.delete_image()
-        writer.upload_image(self.request.FILES['image'])
+        writer.upload_image(image)
 
 
 class MyArticleView(BaseView):
@@ -399,7 +475,7 @@ class MyArticleView(BaseView):
         self.template = 'blog/my_article.html'
 
     def set_context(self, article_name: str):
-        writer = get_object_or_404(Writer, name=self.request.user.username)
+        writer = self.get_writer()
         article = writer.article_set.get(name=article_name)
         self.context = {
             'article': article,
@@ -415,18 +491,21 @@ class EditView(BaseView):
         self.template = 'blog/edit.html'
 
     def set_context(self, article_name: str, message: str = None):
-        writer = get_object_or_404(Writer, name=self.request.user.username)
+        writer = self.get_writer()
         article = get_object_or_404(Article, name=article_name, author=writer)
+        # autosaved text, if there is any newer than the article
+        revision, text = revisions.get_latest(article)
 
         form = forms.EditForm(initial={
             'name': article.name,
-            'text': article.text,
+            'text': text,
             'tag': article.tag,
         })
 
         self.context = {
-            'tags': Tag.objects.all(),
+            'tags': tag_registry.all(),
             'article': article,
+            'revision': revision,
             'message': message,
             'form': form,
         }
@@ -434,28 +513,31 @@ class EditView(BaseView):
     def edit_article(self, article_name: str):
         form = forms.EditForm(self.request.POST, self.request.FILES)
         if not form.is_valid():
-            return self.render_if_invalid_form()
+            return self.render_if_invalid_form(article_name)
 
         text = form.cleaned_data['text']
         name = form.cleaned_data['name']
-        writer = get_object_or_404(Writer, name=self.request.user.username)
+        writer = self.get_writer()
         article = get_object_or_404(Article, name=article_name, author=writer)
 
         if self.spec_chars_in_name(name):
-            return self.render_if_spec_chars_in_name()
+            return self.render_if_spec_chars_in_name(article_name)
         if not self.name_length_is_ok(name):
-            return self.render_if_name_or_text_too_long('name', name, text)
+            return self.render_if_name_or_text_too_long(article_name, 'name')
         if not self.text_length_is_ok(text):
-            return self.render_if_name_or_text_too_long('text', name, text)
+            return self.render_if_name_or_text_too_long(article_name, 'text')
 
-        if name != article_name and list(writer.article_set.filter(name=name)) != []:
-            return self.render_if_name_is_unavailable()
+        if name != article_name and writer.article_set.filter(name=name).exists():
+            return self.render_if_name_is_unavailable(article_name)
 
-        self.update_article(article)
+        tag = tag_registry.get_or_404(self.request.POST['tag'])
+        if not self.update_article(article, writer, name, text, tag):
+            return self.render_if_image_is_invalid(article_name)
+        return HttpResponseRedirect(reverse('blog:my_article', args=(article.name, )))
 
-    def render_if_invalid_form(self):
+    def render_if_invalid_form(self, article_name: str):
         message = 'Form is invalid'
-        self.set_context(message)
+        self.set_context(article_name, message)
         return self.render()
 
     def spec_chars_in_name(self, name: str):
@@ -464,10 +546,9 @@ class EditView(BaseView):
                 return True
         return False
 
-    def render_if_spec_chars_in_name(self, text: str):
+    def render_if_spec_chars_in_name(self, article_name: str):
         message = 'Name cannot contain special characters: {}'.format(', '.join(self.spec_chars))
-        add_form_with_init = forms.AddForm(initial={'text': text})
-        self.set_context(message, add_form_with_init)
+        self.set_context(article_name, message)
         return self.render()
 
     def name_length_is_ok(self, name: str):
@@ -482,57 +563,56 @@ class EditView(BaseView):
             return False
         return True
 
-    def render_if_name_or_text_too_long(self, too_long: str, name: str, text: str):
+    def render_if_name_or_text_too_long(self, article_name: str, too_long: str):
         message = '{} is too long'.format(too_long)
-        add_form_with_init = forms.AddForm(initial={'name': name, 'text': text})
-        self.set_context(message, add_form_with_init)
+        self.set_context(article_name, message)
         return self.render()
 
-    def render_if_name_is_unavailable(self):
+    def render_if_name_is_unavailable(self, article_name: str):
         message = 'This name is not available'
-        self.set_context(message)
+        self.set_context(article_name, message)
         return self.render()
 
-    def update_article(self, article: Article):
-        old_name = article.name
-        article.name = self.request.POST['name']
-        article.text = self.request.POST['text']
-        tag = get_object_or_404(Tag, name=self.request.POST['tag'])
-        article.tag = tag
-        article.last_edit = timezone.now()
-
-        if article.name != old_name and 'image' not in self.request.FILES:
-            self.rename_image(article)
-
-        article.save()
-        self.upload_image(article)
-
-    def rename_image(self, article: Article):
-        if article.image:
-            old = article.image.path
-        else:
-            old = None
-
-        dirname = os.path.join(settings.MEDIA_ROOT, 'articles/images')
-        ext = os.path.splitext(article.image.path)[1]
-        new_image_name = article.author.name + '_' + article.name + ext
-        new = os.path.join(dirname, new_image_name)
-
-        if os.path.exists(old):
-            os.rename(old, new)
-        article.image = 'articles/images/' + new_image_name
+    def render_if_image_is_invalid(self, article_name: str):
+        message = 'Image cannot be read'
+        self.set_context(article_name, message)
+        return self.render()
 
-    def upload_image(self, article: Article):
-        if 'image' in self.request.FILES:
-            image = self.request.FILES['image']
-            article.upload_image(image)
+    def update_article(self, article: Article, writer: Writer, name: str, text: str, tag: Tag):
+        """
+        Saves the article once. A new or renamed image gets a new file first, the reference is swapped
+        by the save and the old file is deleted after commit, so the article never points to a missing file.
+        Returns False without saving if the new image cannot be read
+        """
+        old_name, old_image, old_text = article.name, article.image.name or None, article.text
+        article.author = writer
+        article.name, article.text, article.tag = name, text, tag
+        article.last_edit = timezone.now()
 
-    def redirect_to_my_article(self):
-        author_name = self.request.user.username
-        article_name = self.request.POST['name']
-        writer = Writer.objects.get(name=author_name)
-        article = writer.article_set.get(name=article_name)
-        return HttpResponseRedirect(reverse('blog:my_article', args=(article.name, )))
+        image = self.get_image()
+        stem = '{}_{}_image'.format(writer.name, article.name)
+        if image is not None:
+            image_name = model_logic.get_image_name('articles/images', stem, os.path.splitext(image.name)[1])
+            try:
+                model_logic.store_image(article, image, image_name, max_bytes=model_logic.max_image_bytes['article'])
+            except OSError:
+                # store_image has removed the file already
+                return False
+        elif article.name != old_name and old_image and os.path.exists(article.image.path):
+            image_name = model_logic.get_image_name('articles/images', stem, os.path.splitext(old_image)[1])
+            model_logic.copy_image(article, image_name)
+
+        try:
+            with transaction.atomic():
+                article.save()
+                revisions.record(article, text, old_text)
+                if article.image.name != old_image:
+                    deletion.delete_files_on_commit([old_image] if old_image else [])
+        except Exception:
+            if article.image.name != old_image:
+                default_storage.delete(article.image.name)
+            raise
+        return True
 
 
 class DeleteView(BaseView):
@@ -540,10 +620,9 @@ class DeleteView(BaseView):
         self.request = request
 
     def delete(self, article_name: str):
-        writer = Writer.objects.get(name=self.request.user.username)
+        writer = self.get_writer()
         article = writer.article_set.get(name=article_name)
-        article.delete_image()
-        article.delete()
+        deletion.delete_articles(Article.objects.filter(pk=article.pk))
 
 
 class LoginView(BaseView):
@@ -614,11 +693,8 @@ class SignUpView(BaseView):
 
     def create_writer(self):
         name = self.request.POST['username']
-        if list(Writer.objects.filter(name=name)) == []:
-            Writer.objects.create(name=name)
-            return True
-        else:
-            return False
+        writer, created = Writer.objects.get_or_create(name=name)
+        return created
 
     def create_user(self):
         username = self.request.POST['username']
@@ -636,7 +712,8 @@ class SignUpView(BaseView):
         return self.render()
 
     def create_user_and_login(self, username: str, password: str):
-        User.objects.create_user(username=username, password=password)
+        user = User.objects.create_user(username=username, password=password)
+        Writer.objects.filter(name=username, user__isnull=True).update(user=user)
         user = authenticate(self.request, username=username, password=password)
         if user is not None:
             login(self.request, user)
@@ -648,7 +725,8 @@ class AuthorsView(BaseView):
         self.template = 'blog/authors.html'
 
     def set_context(self):
-        writers = Writer.objects.annotate(num_articles=Count('article')).order_by('-num_articles')
+        writers = [entry.get_writer() for entry in WriterLeaderboard.objects.select_related('writer')
+                   .order_by('-num_articles', 'writer')]
         self.context = {
             'writers': writers,
         }
@@ -667,7 +745,8 @@ class TagsView(BaseView):
         }
 
     def get_tags_and_top_tags(self):
-        tags = list(Tag.objects.annotate(num_articles=Count('article')).order_by('-num_articles'))
+        tags = [entry.get_tag() for entry in TagLeaderboard.objects.select_related('tag')
+                .order_by('-num_articles', 'tag')]
         if len(tags) == 0:
             top_tags, tags = None, None
         elif 1 <= len(tags) <= 3:
@@ -683,7 +762,7 @@ class TagView(BaseView):
         self.template = 'blog/tag.html'
 
     def set_context(self, tag_name: str):
-        tag = Tag.objects.get(name=tag_name)
+        tag = tag_registry.get_or_404(tag_name)
         articles = tag.article_set.order_by('-pub_date')
 
         self.context = {
@@ -704,7 +783,7 @@ class SearchView(BaseView):
 
         articles = self.search_in(Article.objects.all(), q)
         writers = self.search_in(Writer.objects.all(), q)
-        tags = self.search_in(Tag.objects.all(), q)
+        tags = self.search_in(tag_registry.all(), q)
 
         self.context = {
             'articles': articles,
@@ -738,10 +817,9 @@ class Report_View(BaseView):
         reporter = self.get_reporter()
         article = self.get_article(author_name, article_name)
 
-        if self.report_exists(reporter, article):
+        if not self.create_report(reporter, article):
             return JsonResponse({'ok': False, 'message': 'You have already reported this article'})
 
-        self.create_report(reporter, article)
         return JsonResponse({'ok': True, 'message': ''})
 
     def get_article(self, author_name: str, article_name: str):
@@ -750,15 +828,241 @@ class Report_View(BaseView):
         return article
 
     def get_reporter(self):
-        reporter_name = self.request.user.username
-        reporter = get_object_or_404(Writer, name=reporter_name)
-        return reporter
-
-    def report_exists(self, reporter: Writer, article: Article):
-        return Report.objects.filter(reporter=reporter, article=article).exists()
+        return self.get_writer()
 
     def create_report(self, reporter: Writer, article: Article):
-        Report.objects.create(
-            reporter=reporter,
-            article=article
+        """Returns False if article is already reported by reporter (unique_report_per_reporter)"""
+        try:
+            with transaction.atomic():
+                Report.objects.create(
+                    reporter=reporter,
+                    article=article
+                )
+        except IntegrityError:
+            return False
+        return True
+
+
+class UploadView(BaseView):
+    """
+    Resumable chunked upload of images:
+    POST uploads/ with filename and size creates upload,
+    PATCH uploads/<id>/ with Upload-Offset header appends request body,
+    GET uploads/<id>/ returns current offset to resume from.
+    Finished upload is referenced by upload_id in image forms
+    """
+    def __init__(self, request: WSGIRequest):
+        self.request = request
+
+    def create(self):
+        if not self.user_is_valid():
+            return JsonResponse({'ok': False, 'message': 'Not authenticated'}, status=401)
+
+        filename = os.path.basename(self.request.POST.get('filename', ''))
+        size = self.get_int(self.request.POST.get('size'))
+        if not self.extension_is_ok(filename):
+            return JsonResponse({'ok': False, 'message': 'Unsupported file type'}, status=400)
+        if size is None or not 0 < size <= model_logic.max_upload_size:
+            return JsonResponse({'ok': False, 'message': 'Invalid size'}, status=400)
+
+        upload = Upload.objects.create(
+            owner=self.get_writer(),
+            filename=filename,
+            size=size,
+            created=timezone.now(),
+        )
+        return self.status(upload, status=201)
+
+    def status(self, upload: Upload, status: int = 200):
+        return JsonResponse({
+            'ok': True,
+            'id': str(upload.id),
+            'offset': upload.offset,
+            'size': upload.size,
+            'complete': upload.is_complete(),
+        }, status=status)
+
+    def get_upload(self, upload_id):
+        return get_object_or_404(Upload, pk=upload_id, owner=self.get_writer())
+
+    def process(self, upload_id):
+        if not self.user_is_valid():
+            return JsonResponse({'ok': False, 'message': 'Not authenticated'}, status=401)
+
+        upload = self.get_upload(upload_id)
+        if self.request.method == 'GET':
+            return self.status(upload)
+        if self.request.method == 'PATCH':
+            return self.append(upload)
+        return JsonResponse({'ok': False, 'message': 'Unsupported Http method'}, status=405)
+
+    def append(self, upload: Upload):
+        offset = self.get_int(self.request.headers.get('Upload-Offset'))
+        length = self.get_int(self.request.headers.get('Content-Length'))
+        if offset != upload.offset:
+            return self.offset_mismatch(upload)
+        if length is None or offset + length > upload.size:
+            return JsonResponse({'ok': False, 'message': 'Invalid length', 'offset': upload.offset}, status=400)
+
+        # the offset is claimed and moved in two short UPDATEs, no transaction is open while the client
+        # sends the chunk; a concurrent PATCH at the same offset gets 409 instead of writing the same bytes
+        if not self.claim(upload, offset):
+            return self.offset_mismatch(upload)
+        try:
+            written = model_logic.write_chunk(upload.staging_path(), self.request, offset, length)
+        except BaseException:
+            # offset stays where it was, the chunk can be sent again
+            Upload.objects.filter(pk=upload.pk, offset=offset).update(writing_until=None)
+            raise
+        if not Upload.objects.filter(pk=upload.pk, offset=offset).update(offset=offset + written, writing_until=None):
+            # claim expired and another PATCH has written this range meanwhile
+            return self.offset_mismatch(upload)
+        upload.offset = offset + written
+
+        if upload.is_complete() and not model_logic.is_image(upload.staging_path()):
+            upload.delete_staged()
+            upload.delete()
+            return JsonResponse({'ok': False, 'message': 'File is not an image'}, status=400)
+        return self.status(upload)
+
+    def claim(self, upload: Upload, offset: int):
+        now = timezone.now()
+        claimed = (
+            Upload.objects
+            .filter(pk=upload.pk, offset=offset)
+            .filter(Q(writing_until__isnull=True) | Q(writing_until__lt=now))
+            .update(writing_until=now + model_logic.upload_chunk_timeout)
         )
+        return claimed == 1
+
+    def offset_mismatch(self, upload: Upload):
+        upload.refresh_from_db(fields=['offset'])
+        return JsonResponse({'ok': False, 'message': 'Offset mismatch', 'offset': upload.offset}, status=409)
+
+    def extension_is_ok(self, filename: str):
+        extension = os.path.splitext(filename)[1].lower().lstrip('.')
+        return extension in get_available_image_extensions()
+
+    def get_int(self, value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+
+class RevisionView(BaseView):
+    """
+    Revisions of the writer's article texts:
+    POST my_page/<article_name>/autosave/ with JSON {"base": number, "changes": [[start, end, text], ...]}
+    adds a revision with the changes to revision base (409 with the latest number if base is not the latest),
+    GET my_page/<article_name>/revisions/<number>/ returns text of a revision
+    """
+    def __init__(self, request: WSGIRequest):
+        self.request = request
+
+    def get_article(self, article_name: str):
+        return get_object_or_404(Article, name=article_name, author=self.get_writer())
+
+    def autosave(self, article_name: str):
+        if not self.user_is_valid():
+            return JsonResponse({'ok': False, 'message': 'Not authenticated'}, status=401)
+
+        article = self.get_article(article_name)
+        try:
+            data = json.loads(self.request.body)
+            base, changes = data['base'], data['changes']
+        except (ValueError, TypeError, KeyError):
+            return JsonResponse({'ok': False, 'message': 'Invalid JSON'}, status=400)
+        if not isinstance(base, int):
+            return JsonResponse({'ok': False, 'message': 'Invalid base'}, status=400)
+
+        try:
+            number = revisions.save_changes(article, base, changes)
+        except revisions.Conflict as error:
+            return JsonResponse({'ok': False, 'message': 'Revision conflict', 'revision': error.latest}, status=409)
+        except revisions.InvalidChanges as error:
+            return JsonResponse({'ok': False, 'message': str(error)}, status=400)
+        return JsonResponse({'ok': True, 'revision': number})
+
+    def get(self, article_name: str, number: int):
+        if not self.user_is_valid():
+            return JsonResponse({'ok': False, 'message': 'Not authenticated'}, status=401)
+
+        article = self.get_article(article_name)
+        try:
+            text = revisions.get_text(article.pk, number)
+        except ArticleRevision.DoesNotExist:
+            raise Http404
+        return JsonResponse({'ok': True, 'revision': number, 'text': text})
+
+
+class FeedView(BaseView):
+    content_types = {'rss': 'application/rss+xml; charset=utf-8', 'atom': 'application/atom+xml; charset=utf-8'}
+
+    def __init__(self, request: WSGIRequest, kind: str):
+        if kind not in feeds.formats:
+            raise Http404
+        self.request = request
+        self.kind = kind
+
+    def get_feed(self, writer_name: str = None, tag_name: str = None):
+        if writer_name is not None:
+            writer_id = Writer.objects.filter(name=writer_name).values_list('pk', flat=True).first()
+            if writer_id is None:
+                raise Http404
+            return feeds.Feed(self.kind, 'writer:{}'.format(writer_id), 'Blog BN: {}'.format(writer_name),
+                              reverse('blog:writer', args=(writer_name, )), self.request.path, {'author': writer_id})
+        if tag_name is not None:
+            tag = tag_registry.get_or_404(tag_name)
+            return feeds.Feed(self.kind, 'tag:{}'.format(tag.pk), 'Blog BN: {}'.format(tag.name),
+                              reverse('blog:tag', args=(tag.name, )), self.request.path, {'tag': tag.pk})
+        return feeds.Feed(self.kind, 'site', 'Blog BN', reverse('blog:index'), self.request.path, {})
+
+    def render(self, writer_name: str = None, tag_name: str = None):
+        """Feed from cache, or 304 without reading it when the reader has the current version"""
+        feed = self.get_feed(writer_name, tag_name)
+        etag, last_modified = feed.get_etag(), feed.get_last_modified()
+        response = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if response is None:
+            base_url = self.request.build_absolute_uri('/').rstrip('/')
+            response = HttpResponse(feed.get_content(base_url), content_type=self.content_types[self.kind])
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, public=True, max_age=settings.FEED_MAX_AGE)
+        return response
+
+
+class MetricsView(BaseView):
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self, request: WSGIRequest):
+        self.request = request
+
+    def is_authorized(self):
+        """Superusers or scrapers with Authorization: Bearer <METRICS_TOKEN>"""
+        if self.request.user.is_superuser:
+            return True
+        token = settings.METRICS_TOKEN
+        header = self.request.headers.get('Authorization', '')
+        return bool(token) and hmac.compare_digest(header, 'Bearer ' + token)
+
+    def render(self):
+        return HttpResponse(metrics.registry.render(), content_type=self.content_type)
+
+
+class ApiView(BaseView):
+    def __init__(self, request: WSGIRequest, resource: str):
+        self.request = request
+        self.resource = api.resources[resource]
+
+    def render(self):
+        try:
+            page = api.Page(self.resource, self.request.GET)
+        except api.InvalidQuery as error:
+            return JsonResponse({'ok': False, 'message': str(error)}, status=400)
+        return StreamingHttpResponse(page.stream(self.get_next_url), content_type='application/json')
+
+    def get_next_url(self, cursor: str):
+        params = self.request.GET.copy()
+        params['cursor'] = cursor
+        return self.request.path + '?' + params.urlencode()
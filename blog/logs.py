@@ -0,0 +1,117 @@
+"""
+Logging pipeline configured in settings: loggers put records into a bounded queue,
+a background QueueListener thread of every process writes them as JSON lines to files
+rotated externally (logrotate). Records are dropped (and counted) instead of blocking when the queue is full
+"""
+import os
+import copy
+import json
+import queue
+import atexit
+import logging
+import datetime
+import contextvars
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+
+from . import metrics
+
+
+request_context = contextvars.ContextVar('request_context', default={})
+
+
+def set_request_context(**values):
+    """Adds values (view, request_id) to every record logged in the current request, returns token for reset"""
+    return request_context.set({**request_context.get(), **values})
+
+
+def reset_request_context(token):
+    request_context.reset(token)
+
+
+class RequestContextFilter(logging.Filter):
+    """Runs in the logging thread, before the record is queued, so request context is still there"""
+    def filter(self, record):
+        for key, value in request_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    fields = ('view', 'request_id', 'metrics')
+
+    def format(self, record):
+        data = {
+            'time': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in self.fields:
+            if getattr(record, field, None) is not None:
+                data[field] = getattr(record, field)
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, default=str)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """Records are written to handlers by a listener thread started by the first record of every process"""
+    def __init__(self, record_queue: queue.Queue, *handlers: logging.Handler):
+        super().__init__(record_queue)
+        self.handlers = handlers
+        self.listener = None
+        self.listener_pid = None
+        self.dropped = 0
+        self.addFilter(RequestContextFilter())
+        atexit.register(self.stop_listener)
+
+    def emit(self, record):
+        # threads do not survive fork, workers forked by a preloading server (gunicorn --preload, uwsgi)
+        # start their own listener; emit runs under the handler lock, which logging resets in forked processes
+        if self.handlers and self.listener_pid != os.getpid():
+            self.start_listener()
+        super().emit(record)
+
+    def start_listener(self):
+        if self.listener_pid is not None:
+            # records queued before fork are written by the parent
+            self.queue = queue.Queue(self.queue.maxsize)
+        self.listener = QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+        self.listener_pid = os.getpid()
+
+    def stop_listener(self):
+        if self.listener is not None and self.listener_pid == os.getpid():
+            self.listener.stop()
+            self.listener = None
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            metrics.dropped_log_records.inc(logger=record.name)
+
+    def prepare(self, record):
+        # JSON is formatted by the listener thread; args and traceback are resolved here,
+        # they can change or keep frames alive until the record is written
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def queue_handler(filename: str, queue_size: int, level: str = 'NOTSET'):
+    """
+    Handler factory for dictConfig ('()': 'blog.logs.queue_handler'). Worker processes append to the same file,
+    WatchedFileHandler reopens it after it is rotated externally
+    """
+    file_handler = WatchedFileHandler(filename, delay=True)
+    file_handler.setFormatter(JsonFormatter())
+    file_handler.setLevel(level)
+    return BoundedQueueHandler(queue.Queue(queue_size), file_handler)
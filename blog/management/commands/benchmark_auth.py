@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from blog.models import Writer
+
+
+class Command(BaseCommand):
+    help = 'Measures requests per second and auth queries of authenticated page views for each session/auth setup'
+
+    configurations = {
+        'db': {
+            'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+            'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+        },
+        'cached_db': {
+            'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+            'AUTHENTICATION_BACKENDS': ['blog.auth.CachedModelBackend'],
+        },
+        'signed_cookies': {
+            'SESSION_ENGINE': 'django.contrib.sessions.backends.signed_cookies',
+            'AUTHENTICATION_BACKENDS': ['blog.auth.CachedModelBackend'],
+        },
+    }
+    auth_tables = ('django_session', 'auth_user')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--url', default=reverse('blog:authors'))
+
+    def handle(self, *args, **options):
+        """Runs in a throwaway test database, so the real one is never touched"""
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            user = User.objects.create_user(username='benchmark', password='benchmark')
+            Writer.objects.create(name='benchmark', user=user)
+
+            self.stdout.write('{:<16} {:>10} {:>16}'.format('configuration', 'req/s', 'auth queries/req'))
+            for name, configuration in self.configurations.items():
+                with override_settings(**configuration):
+                    rps, auth_queries = self.measure(options['url'], options['requests'])
+                self.stdout.write('{:<16} {:>10.1f} {:>16.2f}'.format(name, rps, auth_queries))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def measure(self, url: str, requests: int):
+        client = Client()
+        client.login(username='benchmark', password='benchmark')
+        client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(requests):
+                client.get(url)
+            elapsed = time.perf_counter() - started
+
+        auth_queries = [q for q in queries.captured_queries if any(t in q['sql'] for t in self.auth_tables)]
+        return requests / elapsed, len(auth_queries) / requests
@@ -0,0 +1,60 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from blog.models import Article, Writer, Comment
+from blog.seed import bulk_create
+from blog import deletion
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes an article with many comments in a throwaway database, '
+        'with the bulk path of blog/deletion.py and optionally with Model.delete(), prints timings as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument('--commenters', type=int, default=100)
+        parser.add_argument('--compare', action='store_true', help='Also time Model.delete() of the same article')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            report = {'database': connection.vendor, 'comments': options['comments']}
+            article = self.create_article(options)
+            report['bulk_delete_seconds'] = self.measure(
+                lambda: deletion.delete_articles(Article.objects.filter(pk=article.pk))
+            )
+            if options['compare']:
+                article = self.create_article(options)
+                report['model_delete_seconds'] = self.measure(article.delete)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def create_article(self, options: dict):
+        now = timezone.now()
+        offset = Writer.objects.count()
+        author = Writer.objects.create(name='benchmark_author{}'.format(offset))
+        commenters = [Writer.objects.create(name='benchmark_commenter{}_{}'.format(offset, i))
+                      for i in range(options['commenters'])]
+        article = Article.objects.create(author=author, name='benchmark', text='text', pub_date=now, last_edit=now)
+        bulk_create(Comment, [
+            Comment(article=article, author=commenters[i % len(commenters)], text='comment', comment_date=now)
+            for i in range(options['comments'])
+        ], options['batch_size'])
+        return article
+
+    def measure(self, fun):
+        started = time.perf_counter()
+        fun()
+        return round(time.perf_counter() - started, 3)
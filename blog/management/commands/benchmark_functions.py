@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs micro-benchmarks of blog/benchmarks and fails if a function got more than --max-slowdown percent '
+        'slower than blog/benchmarks/baseline.json'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('cases', nargs='*', help='Names of cases, all by default')
+        parser.add_argument('--rounds', type=int, default=15)
+        parser.add_argument('--max-slowdown', type=float, default=50, help='Percent, times tolerance of the case')
+        parser.add_argument('--update-baseline', action='store_true', help='Stores results as the new baseline')
+
+    def handle(self, *args, **options):
+        unknown = set(options['cases']) - set(benchmarks.cases)
+        if unknown:
+            raise CommandError('Unknown cases: {}'.format(', '.join(sorted(unknown))))
+
+        results = benchmarks.run(options['cases'], options['rounds'])
+        baseline = benchmarks.load_baseline()
+
+        self.stdout.write('{:<24} {:>12} {:>10} {:>10} {:>8}'.format('case', 'time us', 'relative', 'baseline', 'change'))
+        for name, result in results.items():
+            expected = baseline.get(name)
+            change = '{:+.1f}%'.format((result['relative'] / expected - 1) * 100) if expected else '-'
+            self.stdout.write('{:<24} {:>12.1f} {:>10.4f} {:>10} {:>8}'.format(
+                name, result['seconds'] * 1e6, result['relative'], expected or '-', change
+            ))
+
+        if options['update_baseline']:
+            benchmarks.save_baseline({**{name: {'relative': value} for name, value in baseline.items()}, **results})
+            self.stdout.write(self.style.SUCCESS('Baseline updated'))
+            return
+
+        regressions = benchmarks.compare(results, baseline, options['max_slowdown'])
+        if regressions:
+            raise CommandError('Slower than baseline by more than {}%: {}'.format(
+                options['max_slowdown'], ', '.join(f'{name} ({slowdown:+.1f}%)' for name, slowdown in regressions)
+            ))
+        self.stdout.write(self.style.SUCCESS('No regressions'))
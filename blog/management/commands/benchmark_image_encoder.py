@@ -0,0 +1,87 @@
+import io
+import os
+import time
+import tempfile
+from PIL import Image, ImageOps
+
+from django.core.management.base import BaseCommand
+from django.conf import settings
+
+from blog import model_logic
+
+
+class Command(BaseCommand):
+    help = 'Compares size and encode time of images saved with Pillow defaults and with model_logic.encode_image'
+
+    def add_arguments(self, parser):
+        parser.add_argument('corpus', nargs='*', default=[os.path.join(settings.MEDIA_ROOT, 'test/images')],
+                            help='Image files or directories')
+        parser.add_argument('--variant', choices=sorted(model_logic.max_image_bytes), default='article')
+        parser.add_argument('--max-bytes', type=int, default=None, help='Defaults to budget of the variant')
+        parser.add_argument('--min-psnr', type=float, default=None)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        square = options['variant'] == 'writer'
+        max_bytes = options['max_bytes'] or model_logic.max_image_bytes[options['variant']]
+        totals = [0, 0, 0.0, 0.0]
+
+        self.stdout.write('{:<40} {:>12} {:>12} {:>8} {:>10} {:>10}'.format(
+            'file', 'default B', 'encoded B', 'saved', 'default ms', 'encoded ms'
+        ))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for path in self.iter_corpus(options['corpus']):
+                image = self.prepare(path, square)
+                default_size, default_time = self.measure(options['repeat'], self.encode_default, image, path)
+                target = os.path.join(tmp_dir, 'encoded' + os.path.splitext(path)[1].lower())
+                encoded_time = self.measure(
+                    options['repeat'], model_logic.encode_image, image, target, max_bytes, options['min_psnr']
+                )[1]
+                encoded_size = os.path.getsize(target)
+
+                self.write_row(os.path.basename(path), default_size, encoded_size, default_time, encoded_time)
+                for i, value in enumerate([default_size, encoded_size, default_time, encoded_time]):
+                    totals[i] += value
+
+        self.write_row('total', *totals)
+
+    def iter_corpus(self, corpus: list):
+        extensions = Image.registered_extensions()
+        for item in corpus:
+            if os.path.isdir(item):
+                names = sorted(os.listdir(item))
+                paths = [os.path.join(item, name) for name in names]
+            else:
+                paths = [item]
+            for path in paths:
+                if os.path.isfile(path) and os.path.splitext(path)[1].lower() in extensions:
+                    yield path
+
+    def prepare(self, path: str, square: bool):
+        with Image.open(path) as original:
+            image = ImageOps.exif_transpose(original)
+        image.thumbnail(model_logic.max_image_size)
+        if square:
+            image = model_logic.square_image(image)
+        return image
+
+    def encode_default(self, image: Image, path: str):
+        buffer = io.BytesIO()
+        image.save(buffer, format=Image.registered_extensions()[os.path.splitext(path)[1].lower()])
+        return len(buffer.getvalue())
+
+    def measure(self, repeat: int, fun, *args):
+        """Returns result of the last call and the best time in milliseconds"""
+        best = None
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            result = fun(*args)
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
+
+    def write_row(self, name: str, default_size: int, encoded_size: int, default_time: float, encoded_time: float):
+        saved = 1 - encoded_size / default_size if default_size else 0
+        self.stdout.write('{:<40} {:>12} {:>12} {:>7.1%} {:>10.1f} {:>10.1f}'.format(
+            name[:40], default_size, encoded_size, saved, default_time, encoded_time
+        ))
@@ -0,0 +1,169 @@
+import sys
+import json
+import time
+import platform
+import tracemalloc
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import urls
+from blog import revisions
+from blog.models import Article, Upload, WriterLeaderboard, TagLeaderboard
+from blog.seed import password
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a throwaway database and requests every route of blog/urls.py as a logged in writer, '
+        'prints latency percentiles, queries and peak memory of each route as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Measured requests per route')
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--output', help='File for the JSON report, stdout by default')
+        for name, default in (('writers', 100), ('tags', 20), ('articles', 2000), ('comments', 20000),
+                              ('reports', 200), ('seed', 0)):
+            parser.add_argument(f'--{name}', type=int, default=default)
+
+    def handle(self, *args, **options):
+        """Runs in a throwaway test database, so the real one is never touched"""
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            call_command('seed_blog', stdout=self.stderr, **{
+                name: options[name] for name in ('writers', 'tags', 'articles', 'comments', 'reports', 'seed')
+            })
+            with override_settings(DEBUG=False):
+                report = {
+                    'environment': self.get_environment(options),
+                    'routes': self.run_routes(options['requests'], options['warmup']),
+                }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def get_environment(self, options: dict):
+        return {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'requests': options['requests'],
+            'dataset': {name: options[name] for name in ('writers', 'tags', 'articles', 'comments', 'reports', 'seed')},
+        }
+
+    def run_routes(self, requests: int, warmup: int):
+        writer = WriterLeaderboard.objects.select_related('writer').order_by('-num_articles').first().writer
+        self.writer = writer
+        self.article = writer.article_set.order_by('-pub_date').first()
+        self.client = Client()
+        kwargs = {
+            'writer_name': writer.name,
+            'article_name': self.article.name,
+            'tag_name': TagLeaderboard.objects.select_related('tag').order_by('-num_articles').first().tag.name,
+            'upload_id': Upload.objects.create(owner=writer, filename='benchmark.jpg', size=1, created=timezone.now()).pk,
+            'kind': 'rss',
+            'number': revisions.record(self.article, self.article.text + '\nbenchmark'),
+        }
+        self.revision = kwargs['number']
+
+        results = {}
+        for pattern in urls.urlpatterns:
+            url = reverse('blog:' + pattern.name, kwargs={key: kwargs[key] for key in pattern.pattern.converters})
+            prepare = getattr(self, 'prepare_' + pattern.name, None)
+            send = getattr(self, 'send_' + pattern.name, self.client.get)
+            self.log_in()
+            for _ in range(warmup):
+                self.request(url, prepare, send)
+            results[pattern.name] = self.measure(url, prepare, send, requests)
+        return results
+
+    def request(self, url: str, prepare=None, send=None):
+        if prepare is not None:
+            url = prepare(url)
+        response = (send or self.client.get)(url)
+        # streamed responses run their queries only while the content is consumed
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        return response
+
+    def measure(self, url: str, prepare, send, requests: int):
+        latencies, queries = [], []
+        for _ in range(requests):
+            if prepare is not None:
+                url = prepare(url)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = self.request(url, send=send)
+                latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+
+        tracemalloc.start()
+        self.request(url, prepare, send)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        latencies.sort()
+        return {
+            'url': url,
+            'method': response.request['REQUEST_METHOD'],
+            'status': response.status_code,
+            'p50_ms': round(get_percentile(latencies, 50), 3),
+            'p90_ms': round(get_percentile(latencies, 90), 3),
+            'p99_ms': round(get_percentile(latencies, 99), 3),
+            'max_ms': round(latencies[-1], 3),
+            'queries': max(queries),
+            'peak_memory_kb': round(peak_memory / 1024, 1),
+        }
+
+    def log_in(self):
+        self.client.login(username=self.writer.name, password=password)
+
+    def prepare_logout(self, url: str):
+        self.log_in()
+        return url
+
+    def prepare_search(self, url: str):
+        return url.split('?')[0] + '?q=' + self.article.name.split()[0]
+
+    def prepare_delete(self, url: str):
+        """Every request deletes a new article"""
+        article = self.writer.article_set.create(
+            name='benchmark {}'.format(time.time_ns()), text='benchmark', tag=self.article.tag,
+            pub_date=timezone.now(), last_edit=timezone.now(),
+        )
+        return reverse('blog:delete', args=(article.name,))
+
+    def send_autosave(self, url: str):
+        """Every request adds a revision to the latest one"""
+        response = self.client.post(url, json.dumps({'base': self.revision, 'changes': [[0, 0, 'a']]}),
+                                    content_type='application/json')
+        self.revision = response.json()['revision']
+        return response
+
+    def send_uploads(self, url: str):
+        """Every request registers an upload"""
+        return self.client.post(url, {'filename': 'benchmark.jpg', 'size': 1})
+
+
+def get_percentile(values: list, percentile: float):
+    """Nearest-rank percentile of sorted values"""
+    index = max(0, min(len(values) - 1, -(-len(values) * percentile // 100) - 1))
+    return values[int(index)]
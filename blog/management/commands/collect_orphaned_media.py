@@ -0,0 +1,126 @@
+import os
+import time
+import uuid
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.core.files.storage import default_storage
+from django.conf import settings
+from django.db.models import ImageField
+from django.utils import timezone
+
+from blog.models import Article, Writer, Tag, Upload
+from blog import model_logic
+
+
+class Command(BaseCommand):
+    help = 'Deletes files from image directories in MEDIA_ROOT that are not referenced by any model'
+
+    models = [Article, Writer, Tag]
+    keep = {model_logic.default_writer_image, model_logic.default_tag_image}
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only list files that would be deleted')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--min-age', type=int, default=3600,
+                            help='Files modified less than this many seconds ago are kept (uploads in progress)')
+        parser.add_argument('--upload-max-age', type=int, default=24 * 3600,
+                            help='Unfinished chunked uploads older than this many seconds are deleted')
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.newer_than = time.time() - options['min_age']
+        scanned, deleted = 0, 0
+
+        for batch in self.get_batches(self.iter_files(), options['batch_size']):
+            orphans = self.get_orphans(batch)
+            self.delete(orphans)
+            scanned += len(batch)
+            deleted += len(orphans)
+
+        action = 'Would delete' if self.dry_run else 'Deleted'
+        self.stdout.write(self.style.SUCCESS('{} {} of {} files'.format(action, deleted, scanned)))
+
+        stale = self.collect_stale_uploads(options['upload_max_age'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS('{} {} staged uploads'.format(action, stale)))
+
+    def get_image_dirs(self):
+        dirs = set()
+        for model in self.models:
+            for field in model._meta.get_fields():
+                if isinstance(field, ImageField) and isinstance(field.upload_to, str):
+                    dirs.add(field.upload_to)
+        return sorted(dirs)
+
+    def iter_files(self):
+        """Yields storage names of files one directory entry at a time, without listing whole directories"""
+        for image_dir in self.get_image_dirs():
+            stack = [image_dir]
+            while stack:
+                current = stack.pop()
+                path = os.path.join(settings.MEDIA_ROOT, current)
+                if not os.path.isdir(path):
+                    continue
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        name = current + '/' + entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(name)
+                        elif entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < self.newer_than:
+                            yield name
+
+    def get_batches(self, names, batch_size: int):
+        batch = []
+        for name in names:
+            batch.append(name)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def get_orphans(self, batch: list):
+        referenced = set(self.keep)
+        for model in self.models:
+            referenced.update(model.objects.filter(image__in=batch).values_list('image', flat=True))
+        return [name for name in batch if name not in referenced]
+
+    def delete(self, orphans: list):
+        for name in orphans:
+            if self.dry_run:
+                self.stdout.write(name)
+            else:
+                default_storage.delete(name)
+
+    def collect_stale_uploads(self, max_age: int, batch_size: int):
+        """Unfinished uploads that were abandoned and staged files no upload refers to"""
+        stale = Upload.objects.filter(created__lt=timezone.now() - datetime.timedelta(seconds=max_age))
+        count = 0
+        for upload in stale.iterator(chunk_size=batch_size):
+            self.delete([self.get_staging_name(upload.staging_path())])
+            if not self.dry_run:
+                upload.delete()
+            count += 1
+
+        staging_dir = os.path.join(settings.MEDIA_ROOT, model_logic.upload_staging_dir)
+        if not os.path.isdir(staging_dir):
+            return count
+        with os.scandir(staging_dir) as entries:
+            names = (entry.name for entry in entries if entry.is_file() and entry.stat().st_mtime < self.newer_than)
+            for batch in self.get_batches(names, batch_size):
+                ids = [self.get_uuid(name) for name in batch]
+                pks = Upload.objects.filter(pk__in=[pk for pk in ids if pk is not None]).values_list('pk', flat=True)
+                referenced = {str(pk) for pk in pks}
+                orphans = [name for name in batch if name not in referenced]
+                self.delete([self.get_staging_name(model_logic.get_staging_path(name)) for name in orphans])
+                count += len(orphans)
+        return count
+
+    def get_staging_name(self, path: str):
+        return os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/')
+
+    def get_uuid(self, name: str):
+        try:
+            return uuid.UUID(name)
+        except ValueError:
+            return None
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.transfer import export, TransferError
+
+
+class Command(BaseCommand):
+    help = 'Exports writers, tags, articles, comments and reports as JSONL with their images to a directory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument('--compress', action='store_true', help='zstd-compressed blog.jsonl.zst (needs zstandard)')
+        parser.add_argument('--no-images', action='store_true', help='Do not copy image files')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched from the database at a time')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            exported = export(options['directory'], compress=options['compress'], images=not options['no_images'],
+                              chunk_size=options['chunk_size'])
+        except TransferError as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS('Exported {} in {:.1f}s'.format(
+            ', '.join(f'{count} {name}s' for name, count in exported.items()), time.perf_counter() - started
+        )))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.transfer import Importer, TransferError
+
+
+class Command(BaseCommand):
+    help = 'Imports a directory written by export_blog; existing writers, tags and articles are kept'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows inserted per transaction')
+        parser.add_argument('--no-images', action='store_true', help='Do not copy image files')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            importer = Importer(options['directory'], batch_size=options['batch_size'],
+                                images=not options['no_images'])
+            created, skipped = importer.run()
+        except TransferError as error:
+            raise CommandError(error)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS('Imported {} in {:.1f}s ({:.0f} articles/s)'.format(
+            ', '.join(f'{count} {name}s' for name, count in created.items()), elapsed,
+            created['article'] / elapsed if elapsed else 0,
+        )))
+        if any(skipped.values()):
+            self.stdout.write('Skipped existing or unresolved: {}'.format(
+                ', '.join(f'{count} {name}s' for name, count in skipped.items() if count)
+            ))
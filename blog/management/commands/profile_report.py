@@ -0,0 +1,59 @@
+import io
+import os
+import gzip
+import pstats
+import marshal
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Dump:
+    """Profile-like object pstats.Stats accepts, made from a dump of ProfilingMiddleware"""
+    def __init__(self, path: str):
+        with open(path, 'rb') as file:
+            self.stats = marshal.loads(gzip.decompress(file.read()))
+
+    def create_stats(self):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Aggregates profile dumps written by ProfilingMiddleware into top N functions of every view'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=settings.PROFILING_DIR)
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument('--sort', choices=['cumulative', 'tottime', 'ncalls'], default='cumulative')
+        parser.add_argument('--view', help='only this view, e.g. blog:index')
+
+    def handle(self, *args, **options):
+        dumps = self.get_dumps(options['dir'])
+        if options['view'] is not None:
+            dumps = {options['view']: dumps.get(options['view'], [])}
+
+        for view_name, paths in sorted(dumps.items()):
+            if not paths:
+                continue
+            stats = pstats.Stats(Dump(paths[0]), stream=io.StringIO())
+            for path in paths[1:]:
+                stats.add(Dump(path))
+            self.stdout.write(self.style.SUCCESS(f'{view_name}: {len(paths)} profiled requests'))
+            self.stdout.write(self.format(stats, options['sort'], options['top']))
+
+    def get_dumps(self, directory: str):
+        dumps = defaultdict(list)
+        if not os.path.isdir(directory):
+            return dumps
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith('.prof.gz'):
+                    view_name = entry.name.split('.', 1)[0].replace('-', ':', 1)
+                    dumps[view_name].append(entry.path)
+        return dumps
+
+    def format(self, stats: pstats.Stats, sort: str, top: int):
+        stats.stream = io.StringIO()
+        stats.strip_dirs().sort_stats(sort).print_stats(top)
+        return stats.stream.getvalue()
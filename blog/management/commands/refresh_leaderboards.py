@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.leaderboards import rebuild_all
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds Authors and Tags leaderboards with fresh ranks; meant to be run periodically (e.g. from cron)'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rebuild_all()
+        self.stdout.write(self.style.SUCCESS(
+            'Leaderboards refreshed in {:.2f}s'.format(time.perf_counter() - started)
+        ))
@@ -0,0 +1,133 @@
+import os
+import json
+import time
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand
+from django.conf import settings
+
+from blog.models import Article, Writer
+from blog import model_logic
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def limit_worker_memory(max_memory: int):
+    """Pool initializer: caps address space of a worker process (in megabytes)"""
+    if resource is None or not max_memory:
+        return
+    limit = max_memory * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def reprocess_image(job: tuple):
+    """Returns (pk, path, size, placeholder, error)"""
+    pk, path, square, max_bytes = job
+    try:
+        with model_logic.resize_image(path, square=square, max_bytes=max_bytes) as image:
+            return pk, path, image.size, model_logic.get_placeholder(image), None
+    except (OSError, MemoryError) as error:
+        return pk, path, None, None, str(error) or error.__class__.__name__
+
+
+class Command(BaseCommand):
+    help = 'Regenerates resized images of articles and writers using current resize parameters'
+
+    sources = {
+        'article': (Article, False),
+        'writer': (Writer, True),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--max-tasks-per-worker', type=int, default=100,
+                            help='Worker process is replaced after this many images')
+        parser.add_argument('--max-worker-memory', type=int, default=None,
+                            help='Address space limit of every worker in megabytes')
+        parser.add_argument('--checkpoint', default=os.path.join(settings.BASE_DIR, 'reprocess_images.checkpoint'))
+        parser.add_argument('--restart', action='store_true', help='Ignore existing checkpoint')
+
+    def handle(self, *args, **options):
+        self.checkpoint_path = options['checkpoint']
+        checkpoint = {} if options['restart'] else self.load_checkpoint()
+        if checkpoint:
+            self.stdout.write('Resuming from checkpoint {}'.format(checkpoint))
+
+        self.processed, self.failed = 0, 0
+        self.started = time.monotonic()
+
+        with Pool(
+            processes=options['workers'],
+            initializer=limit_worker_memory,
+            initargs=(options['max_worker_memory'], ),
+            maxtasksperchild=options['max_tasks_per_worker'],
+        ) as pool:
+            for source in self.sources:
+                self.process_source(pool, source, checkpoint, options['batch_size'])
+
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+        self.stdout.write(self.style.SUCCESS('Done: {} images, {} failed, {:.1f} images/s'.format(
+            self.processed, self.failed, self.get_throughput()
+        )))
+
+    def process_source(self, pool: Pool, source: str, checkpoint: dict, batch_size: int):
+        model, square = self.sources[source]
+        for batch in self.get_batches(model, checkpoint.get(source, 0), batch_size):
+            max_bytes = model_logic.max_image_bytes[source]
+            jobs = [(pk, os.path.join(settings.MEDIA_ROOT, image), square, max_bytes) for pk, image in batch]
+            updated = []
+            for pk, path, size, placeholder, error in pool.imap_unordered(reprocess_image, jobs):
+                if error is None:
+                    self.processed += 1
+                    updated.append(model(pk=pk, image_width=size[0], image_height=size[1], image_placeholder=placeholder))
+                else:
+                    self.failed += 1
+                    self.stderr.write('{}: {}'.format(path, error))
+            model.objects.bulk_update(updated, ['image_width', 'image_height', 'image_placeholder'])
+
+            checkpoint[source] = batch[-1][0]
+            self.save_checkpoint(checkpoint)
+            self.stdout.write('{}: up to id {}, {} images, {:.1f} images/s'.format(
+                source, checkpoint[source], self.processed, self.get_throughput()
+            ))
+
+    def get_batches(self, model, last_pk: int, batch_size: int):
+        """Keyset pagination, so only one batch of rows is held in memory"""
+        while True:
+            batch = list(
+                model.objects
+                .filter(pk__gt=last_pk)
+                .exclude(image='')
+                .exclude(image__isnull=True)
+                .exclude(image=model_logic.default_writer_image)
+                .order_by('pk')
+                .values_list('pk', 'image')[:batch_size]
+            )
+            if not batch:
+                return
+            yield batch
+            last_pk = batch[-1][0]
+
+    def get_throughput(self):
+        elapsed = time.monotonic() - self.started
+        if elapsed == 0:
+            return 0.0
+        return (self.processed + self.failed) / elapsed
+
+    def load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path) as file:
+            return json.load(file)
+
+    def save_checkpoint(self, checkpoint: dict):
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(checkpoint, file)
+        os.replace(tmp_path, self.checkpoint_path)
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.seed import seed
+
+
+class Command(BaseCommand):
+    help = 'Fills the database with generated writers, tags, articles, comments and reports (password of users: seed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=100)
+        parser.add_argument('--tags', type=int, default=20)
+        parser.add_argument('--articles', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--reports', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0, help='Same seed on empty database gives same data')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        created = seed(
+            writers=options['writers'],
+            tags=options['tags'],
+            articles=options['articles'],
+            comments=options['comments'],
+            reports=options['reports'],
+            random_seed=options['seed'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS('Created {} in {:.1f}s'.format(
+            ', '.join(f'{count} {name}' for name, count in created.items()), time.perf_counter() - started
+        )))
@@ -0,0 +1,209 @@
+"""
+In-process metrics in Prometheus text format, served by views.metrics.
+Every metric has its own lock held only for a dict update. With METRICS_MULTIPROCESS_DIR set
+(pre-fork servers) every process writes its values to <pid>.json there at most every
+METRICS_FLUSH_INTERVAL seconds, and the scraped process sums files of all processes
+"""
+import os
+import json
+import time
+import atexit
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+class Metric:
+    type = None
+
+    def __init__(self, registry, name: str, help: str, labels: tuple = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def get_key(self, labels: dict):
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def snapshot(self):
+        with self.lock:
+            return [[list(key), self.copy(value)] for key, value in self.values.items()]
+
+    def copy(self, value):
+        return value
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self.get_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry.changed()
+
+    def merge(self, value, other):
+        return value + other
+
+    def format(self, key: tuple, value):
+        yield self.name, self.labels, key, value
+
+
+class Histogram(Metric):
+    """Fixed buckets; value of a label set is [count of every bucket and +Inf..., sum]"""
+    type = 'histogram'
+    default_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, registry, name: str, help: str, labels: tuple = (), buckets: tuple = default_buckets):
+        super().__init__(registry, name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self.get_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.values.get(key)
+            if counts is None:
+                counts = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+        self.registry.changed()
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def copy(self, value):
+        return list(value)
+
+    def merge(self, value, other):
+        return [a + b for a, b in zip(value, other)]
+
+    def format(self, key: tuple, value):
+        labels = self.labels + ('le',)
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), value[:-1]):
+            cumulative += count
+            yield self.name + '_bucket', labels, key + (str(bound),), cumulative
+        yield self.name + '_sum', self.labels, key, value[-1]
+        yield self.name + '_count', self.labels, key, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.flush_lock = threading.Lock()
+        self.flushed = 0.0
+        atexit.register(self.flush)
+
+    def counter(self, name: str, help: str, labels: tuple = ()):
+        return self.register(Counter(self, name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple = (), **kwargs):
+        return self.register(Histogram(self, name, help, labels, **kwargs))
+
+    def register(self, metric: Metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def get_directory(self):
+        return getattr(settings, 'METRICS_MULTIPROCESS_DIR', None)
+
+    def changed(self):
+        if self.get_directory() and time.monotonic() - self.flushed >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """Writes values of this process for other processes to aggregate; skipped if a flush is running"""
+        directory = self.get_directory()
+        if not directory or not self.flush_lock.acquire(blocking=False):
+            return
+        try:
+            self.flushed = time.monotonic()
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, '{}.json'.format(os.getpid()))
+            with open(path + '.tmp', 'w') as file:
+                json.dump(self.snapshot(), file)
+            os.replace(path + '.tmp', path)
+        finally:
+            self.flush_lock.release()
+
+    def collect(self):
+        """Values of all processes in multiprocess mode, of this process otherwise"""
+        directory = self.get_directory()
+        if not directory:
+            return self.snapshot()
+
+        self.flush()
+        merged = {}
+        for name in os.listdir(directory):
+            if not name.endswith('.json'):
+                continue
+            with open(os.path.join(directory, name)) as file:
+                snapshot = json.load(file)
+            for metric_name, values in snapshot.items():
+                metric = self.metrics.get(metric_name)
+                if metric is None:
+                    continue
+                merged_values = merged.setdefault(metric_name, {})
+                for key, value in values:
+                    key = tuple(key)
+                    merged_values[key] = metric.merge(merged_values[key], value) if key in merged_values else value
+        return {name: list(values.items()) for name, values in merged.items()}
+
+    def render(self):
+        lines = []
+        for name, values in sorted(self.collect().items()):
+            metric = self.metrics[name]
+            lines.append(f'# HELP {name} {metric.help}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            for key, value in sorted(values, key=lambda item: tuple(item[0])):
+                for sample_name, labels, label_values, sample in metric.format(tuple(key), value):
+                    lines.append(f'{sample_name}{format_labels(labels, label_values)} {sample}')
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels: tuple, values: tuple):
+    if not labels:
+        return ''
+    pairs = ('{}="{}"'.format(label, escape(value)) for label, value in zip(labels, values))
+    return '{' + ','.join(pairs) + '}'
+
+
+def escape(value: str):
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+registry = Registry()
+
+requests = registry.counter('blog_requests_total', 'Requests by view and status code', ('view', 'status'))
+request_duration = registry.histogram('blog_request_duration_seconds', 'Request duration by view', ('view',))
+cache_requests = registry.counter('blog_cache_requests_total', 'Cache lookups by cache and result', ('cache', 'result'))
+image_processing = registry.histogram(
+    'blog_image_processing_seconds', 'Image processing duration by operation', ('operation',),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+dropped_log_records = registry.counter(
+    'blog_log_records_dropped_total', 'Log records dropped because the logging queue was full', ('logger',)
+)
+
+
+def record_request(view: str, status: int, duration: float):
+    requests.inc(view=view, status=status)
+    request_duration.observe(duration, view=view)
+
+
+def record_cache(cache: str, hit: bool):
+    cache_requests.inc(cache=cache, result='hit' if hit else 'miss')
@@ -0,0 +1,197 @@
+import os
+import re
+import time
+import uuid
+import gzip
+import random
+import marshal
+import cProfile
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import SimpleLazyObject
+
+from .models import Writer
+from .logs import set_request_context, reset_request_context
+
+
+request_logger = logging.getLogger('blog_request_logger')
+
+
+def get_writer(user):
+    """Writer linked to user; writers created before the link existed are matched by name and linked"""
+    if not user.is_authenticated:
+        return None
+    # at most two rows: the linked writer and an unlinked one with the same name; linked one wins
+    writers = list(Writer.objects.filter(Q(user=user) | Q(name=user.username, user__isnull=True))[:2])
+    writer = next((writer for writer in writers if writer.user_id == user.pk), writers[0] if writers else None)
+    if writer is not None and writer.user_id is None:
+        writer.user = user
+        Writer.objects.filter(pk=writer.pk).update(user=user)
+    return writer
+
+
+class CurrentWriterMiddleware:
+    """Sets request.writer, resolved lazily and at most once per request (None for anonymous users)"""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.writer = SimpleLazyObject(lambda: get_writer(request.user))
+        return self.get_response(request)
+
+
+class RequestContextMiddleware:
+    """
+    Gives every request an ID (valid incoming X-Request-ID or a new one), returned in X-Request-ID header.
+    ID and resolved view name are added to every record logged during the request
+    """
+    header_pattern = re.compile(r'^[\w.-]{1,64}$')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.id = self.get_request_id(request)
+        token = set_request_context(request_id=request.id)
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_request_context(token)
+        response['X-Request-ID'] = request.id
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        set_request_context(view=request.resolver_match.view_name)
+
+    def get_request_id(self, request):
+        request_id = request.headers.get('X-Request-ID', '')
+        if self.header_pattern.match(request_id):
+            return request_id
+        return uuid.uuid4().hex
+
+
+class QueryCollector:
+    """connection.execute_wrapper collecting number, time and duplicates of queries, works without DEBUG"""
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.seen = set()
+        self.duplicates = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - started
+            self.count += 1
+            key = (sql, repr(params))
+            if key in self.seen:
+                self.duplicates += 1
+            else:
+                self.seen.add(key)
+
+
+class RequestMetricsMiddleware:
+    """
+    Logs number of queries, SQL time, duplicate queries and total time of every view,
+    at WARNING if request took longer than REQUEST_METRICS_SLOW_MS, at INFO otherwise.
+    In DEBUG the same values are added to the response as X-Request-Metrics header
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        collector = QueryCollector()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(collector))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        metrics = {
+            'view': request.resolver_match.view_name if request.resolver_match else None,
+            'method': request.method,
+            'status': response.status_code,
+            'queries': collector.count,
+            'duplicates': collector.duplicates,
+            'sql_ms': round(collector.time * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+        }
+        self.log(metrics)
+        if settings.DEBUG:
+            response['X-Request-Metrics'] = ';'.join(f'{key}={value}' for key, value in metrics.items())
+        return response
+
+    def log(self, metrics: dict):
+        level = logging.WARNING if metrics['total_ms'] >= settings.REQUEST_METRICS_SLOW_MS else logging.INFO
+        message = ' '.join(f'{key}={value}' for key, value in metrics.items())
+        request_logger.log(level, message, extra={'metrics': metrics})
+
+
+class ProfilingMiddleware:
+    """
+    Profiles PROFILING_SAMPLE_RATE of requests and requests with a valid signed X-Profile header
+    (value made by get_profiling_token), dumps are written gzipped to PROFILING_DIR,
+    only the newest PROFILING_MAX_DUMPS are kept. manage.py profile_report aggregates them per view
+    """
+    salt = 'blog.profiling'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.is_sampled(request):
+            return self.get_response(request)
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return self.get_response(request)  # another profiler is already active in this thread
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.disable()
+        self.dump(profile, request.resolver_match.view_name if request.resolver_match else 'unresolved')
+        return response
+
+    def is_sampled(self, request):
+        token = request.headers.get('X-Profile')
+        if token is not None:
+            try:
+                signing.loads(token, salt=self.salt, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+                return True
+            except signing.BadSignature:
+                pass
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+    def dump(self, profile: cProfile.Profile, view_name: str):
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        profile.create_stats()
+        name = '{}.{}.prof.gz'.format(view_name.replace(':', '-'), time.time_ns())
+        path = os.path.join(settings.PROFILING_DIR, name)
+        with open(path + '.tmp', 'wb') as file:
+            file.write(gzip.compress(marshal.dumps(profile.stats)))
+        os.replace(path + '.tmp', path)
+        self.rotate()
+
+    def rotate(self):
+        with os.scandir(settings.PROFILING_DIR) as entries:
+            dumps = sorted((e for e in entries if e.name.endswith('.prof.gz')), key=lambda e: e.stat().st_mtime_ns)
+        for entry in dumps[:-settings.PROFILING_MAX_DUMPS]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass  # removed by another worker
+
+
+def get_profiling_token():
+    """Value for X-Profile header, valid for PROFILING_TOKEN_MAX_AGE seconds"""
+    return signing.dumps('profile', salt=ProfilingMiddleware.salt)
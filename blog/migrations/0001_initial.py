@@ -0,0 +1,72 @@
+# Generated by Django 3.0.8 on 2026-10-19 18:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Article',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=70)),
+                ('text', models.CharField(max_length=100000)),
+                ('image', models.ImageField(max_length=1000, null=True, upload_to='articles/images')),
+                ('pub_date', models.DateTimeField()),
+                ('last_edit', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=70)),
+                ('image', models.ImageField(default='tags/images/black.jpg', max_length=1000, null=True, upload_to='tags/images')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Writer',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('bio', models.CharField(max_length=1000, null=True)),
+                ('age', models.IntegerField(null=True)),
+                ('image', models.ImageField(default='writers/images/default.jpg', max_length=1000, null=True, upload_to='writers/images')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Report',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='blog.Article')),
+                ('reporter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='blog.Writer')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Comment',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.CharField(max_length=1000)),
+                ('comment_date', models.DateTimeField()),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='blog.Article')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='blog.Writer')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='blog.Writer'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='tag',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='blog.Tag'),
+        ),
+    ]
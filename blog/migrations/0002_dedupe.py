@@ -0,0 +1,79 @@
+# Generated by Django 3.0.8 on 2026-10-19 18:50
+
+from django.db import migrations
+from django.db.models import Min, Count
+
+
+def merge_duplicates(model, references):
+    """Keeps the first row of every name, rows referring to the others are moved to it"""
+    duplicates = (
+        model.objects
+        .values('name')
+        .annotate(first=Min('id'), count=Count('id'))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        others = list(model.objects.filter(name=duplicate['name']).exclude(id=duplicate['first']).values_list('id', flat=True))
+        for referring_model, field in references:
+            referring_model.objects.filter(**{field + '__in': others}).update(**{field + '_id': duplicate['first']})
+        model.objects.filter(id__in=others).delete()
+
+
+def merge_duplicate_writers_and_tags(apps, schema_editor):
+    """Writers and tags created twice by concurrent requests would violate unique names"""
+    Article = apps.get_model('blog', 'Article')
+    merge_duplicates(apps.get_model('blog', 'Writer'), [
+        (Article, 'author'),
+        (apps.get_model('blog', 'Comment'), 'author'),
+        (apps.get_model('blog', 'Report'), 'reporter'),
+    ])
+    merge_duplicates(apps.get_model('blog', 'Tag'), [(Article, 'tag')])
+
+
+def rename_duplicate_articles(apps, schema_editor):
+    """Articles of one writer with the same name (also after merging writers) get their id appended"""
+    Article = apps.get_model('blog', 'Article')
+    max_length = Article._meta.get_field('name').max_length
+    duplicates = (
+        Article.objects
+        .values('author', 'name')
+        .annotate(first=Min('id'), count=Count('id'))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        articles = Article.objects.filter(author=duplicate['author'], name=duplicate['name']).exclude(id=duplicate['first'])
+        for article in articles:
+            suffix = ' ({})'.format(article.id)
+            article.name = article.name[:max_length - len(suffix)] + suffix
+            article.save(update_fields=['name'])
+
+
+def delete_duplicate_reports(apps, schema_editor):
+    """Reports created twice by concurrent requests would violate unique_report_per_reporter"""
+    Report = apps.get_model('blog', 'Report')
+    duplicates = (
+        Report.objects
+        .values('reporter', 'article')
+        .annotate(first=Min('id'), count=Count('id'))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        Report.objects.filter(
+            reporter=duplicate['reporter'],
+            article=duplicate['article'],
+        ).exclude(id=duplicate['first']).delete()
+
+
+# Removes rows violating the constraints added by 0003_hot_lookup_indexes. It is a separate migration, because
+# PostgreSQL cannot alter a table in the transaction whose updates left deferred foreign key checks pending on it
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_writers_and_tags, migrations.RunPython.noop),
+        migrations.RunPython(rename_duplicate_articles, migrations.RunPython.noop),
+        migrations.RunPython(delete_duplicate_reports, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.0.8 on 2026-10-19 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_dedupe'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tag',
+            name='name',
+            field=models.CharField(max_length=70, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='writer',
+            name='name',
+            field=models.CharField(max_length=50, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['author', '-pub_date'], name='article_author_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['article', '-comment_date'], name='comment_article_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='article',
+            constraint=models.UniqueConstraint(fields=('author', 'name'), name='unique_article_name_per_author'),
+        ),
+        migrations.AddConstraint(
+            model_name='report',
+            constraint=models.UniqueConstraint(fields=('reporter', 'article'), name='unique_report_per_reporter'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.0.8 on 2026-10-19 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='image_height',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='image_placeholder',
+            field=models.CharField(max_length=4000, null=True),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='image_width',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='writer',
+            name='image_height',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='writer',
+            name='image_placeholder',
+            field=models.CharField(max_length=4000, null=True),
+        ),
+        migrations.AddField(
+            model_name='writer',
+            name='image_width',
+            field=models.IntegerField(null=True),
+        ),
+    ]
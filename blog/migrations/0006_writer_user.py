@@ -0,0 +1,29 @@
+# Generated by Django 3.0.8 on 2026-10-19 18:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def link_writers_to_users(apps, schema_editor):
+    Writer = apps.get_model('blog', 'Writer')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    users = User.objects.filter(username=models.OuterRef('name')).values('pk')[:1]
+    Writer.objects.filter(user__isnull=True).update(user=models.Subquery(users))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0005_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='writer',
+            name='user',
+            field=models.OneToOneField(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='writer', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(link_writers_to_users, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 3.0.8 on 2026-10-19 18:58
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+import django.db.models.deletion
+
+
+def rebuild(entry_model, source_model, key: str, batch_size: int = 1000):
+    # frozen copy of blog.leaderboards.rebuild at the time of this migration
+    rows = (
+        source_model.objects
+        .annotate(num_articles=Count('article'), last_activity=Max('article__last_edit'))
+        .order_by('-num_articles', 'pk')
+        .values_list('pk', 'num_articles', 'last_activity')
+    )
+    entry_model.objects.all().delete()
+    batch, rank, previous = [], 0, None
+    for position, (pk, num_articles, last_activity) in enumerate(rows.iterator(), start=1):
+        if num_articles != previous:
+            rank, previous = position, num_articles
+        batch.append(entry_model(**{
+            key + '_id': pk,
+            'num_articles': num_articles,
+            'last_activity': last_activity,
+            'rank': rank,
+        }))
+        if len(batch) >= batch_size:
+            entry_model.objects.bulk_create(batch)
+            batch = []
+    entry_model.objects.bulk_create(batch)
+
+
+def populate_leaderboards(apps, schema_editor):
+    rebuild(apps.get_model('blog', 'WriterLeaderboard'), apps.get_model('blog', 'Writer'), 'writer')
+    rebuild(apps.get_model('blog', 'TagLeaderboard'), apps.get_model('blog', 'Tag'), 'tag')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_writer_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagLeaderboard',
+            fields=[
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='leaderboard', serialize=False, to='blog.Tag')),
+                ('num_articles', models.IntegerField(default=0)),
+                ('last_activity', models.DateTimeField(null=True)),
+                ('rank', models.IntegerField(null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WriterLeaderboard',
+            fields=[
+                ('writer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='leaderboard', serialize=False, to='blog.Writer')),
+                ('num_articles', models.IntegerField(default=0)),
+                ('last_activity', models.DateTimeField(null=True)),
+                ('rank', models.IntegerField(null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='writerleaderboard',
+            index=models.Index(fields=['-num_articles', 'writer'], name='writer_leaderboard_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tagleaderboard',
+            index=models.Index(fields=['-num_articles', 'tag'], name='tag_leaderboard_idx'),
+        ),
+        migrations.RunPython(populate_leaderboards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 3.0.8 on 2026-10-19 19:00
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def populate_writer_stats(apps, schema_editor):
+    # frozen copy of blog.stats.rebuild
+    WriterStats, Writer, Article, Comment = (
+        apps.get_model('blog', name) for name in ('WriterStats', 'Writer', 'Article', 'Comment')
+    )
+    comments = (
+        Comment.objects.filter(article__author=OuterRef('pk'))
+        .order_by().values('article__author').annotate(count=Count('pk')).values('count')
+    )
+    latest_comment = Comment.objects.filter(author=OuterRef('pk')).order_by('-comment_date')
+    articles = Article.objects.filter(author=OuterRef('pk')).order_by().values('author')
+    rows = Writer.objects.annotate(
+        num_articles=Coalesce(Subquery(articles.annotate(count=Count('pk')).values('count')), 0),
+        num_comments_received=Coalesce(Subquery(comments), 0),
+        last_article=Subquery(articles.annotate(latest=Max('last_edit')).values('latest')),
+        last_comment=Subquery(latest_comment.values('comment_date')[:1]),
+    ).values_list('pk', 'num_articles', 'num_comments_received', 'last_article', 'last_comment')
+
+    WriterStats.objects.all().delete()
+    WriterStats.objects.bulk_create((
+        WriterStats(
+            writer_id=pk,
+            num_articles=num_articles,
+            num_comments_received=num_comments_received,
+            last_activity=max((date for date in (last_article, last_comment) if date), default=None),
+        )
+        for pk, num_articles, num_comments_received, last_article, last_comment in rows.iterator()
+    ), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_leaderboards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WriterStats',
+            fields=[
+                ('writer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='blog.Writer')),
+                ('num_articles', models.IntegerField(default=0)),
+                ('num_comments_received', models.IntegerField(default=0)),
+                ('last_activity', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.RunPython(populate_writer_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.0.8 on 2026-10-19 19:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_writer_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['tag', '-pub_date'], name='article_tag_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['-last_edit'], name='article_last_edit_idx'),
+        ),
+    ]
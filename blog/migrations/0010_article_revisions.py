@@ -0,0 +1,30 @@
+# Generated by Django 3.0.8 on 2026-10-19 19:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_feed_and_tag_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleRevision',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.IntegerField()),
+                ('is_snapshot', models.BooleanField()),
+                ('data', models.BinaryField()),
+                ('length', models.IntegerField()),
+                ('created', models.DateTimeField()),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='blog.Article')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='articlerevision',
+            constraint=models.UniqueConstraint(fields=('article', 'number'), name='unique_revision_number_per_article'),
+        ),
+    ]
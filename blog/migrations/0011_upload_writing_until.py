@@ -0,0 +1,18 @@
+# Generated by Django 3.0.8 on 2026-10-19 20:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_article_revisions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='writing_until',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
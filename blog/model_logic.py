@@ -1,15 +1,39 @@
+import io
 import os
-from PIL import Image
+import math
+import uuid
+import base64
+import datetime
+import shutil
+from PIL import Image, ImageOps, ImageChops, ImageStat
 
 from django.core.files.storage import default_storage
 from django.core.files import File
+from django.core.files.move import file_move_safe
 from django.conf import settings
 from django.db.models import Model
 
+from . import metrics
+
+
+max_image_size = (1500, 1500)
+placeholder_size = (20, 20)
+max_image_bytes = {
+    'article': 400 * 1024,
+    'writer': 150 * 1024,
+}
+jpeg_quality_range = (40, 75)
+upload_staging_dir = r'uploads/staging'
+max_upload_size = 50 * 1024 * 1024
+upload_chunk_timeout = datetime.timedelta(minutes=10)
+default_writer_image = r'writers/images/default.jpg'
+default_tag_image = r'tags/images/black.jpg'
+
 
 def delete(instance: Model):
     delete_from_storage(instance)
     instance.image = None
+    set_image_metadata(instance, None)
     instance.save()
 
 
@@ -17,8 +41,8 @@ def delete_from_storage(instance: Model):
     if not instance.image:
         return
     path = instance.image.path
-    default_writer_image_path = os.path.join(settings.MEDIA_ROOT, r'writers/images/default.jpg')
-    default_tag_image_path = os.path.join(settings.MEDIA_ROOT, r'tags/images/black.jpg')
+    default_writer_image_path = os.path.join(settings.MEDIA_ROOT, default_writer_image)
+    default_tag_image_path = os.path.join(settings.MEDIA_ROOT, default_tag_image)
     if path != default_writer_image_path and path != default_tag_image_path:
         default_storage.delete(path)
 
@@ -26,18 +50,91 @@ def delete_from_storage(instance: Model):
 def upload_to_storage(file: File, path: str):
     if not os.path.exists(os.path.dirname(path)):
         os.makedirs(os.path.dirname(path))
+    if hasattr(file, 'temporary_file_path'):
+        file_move_safe(file.temporary_file_path(), path, allow_overwrite=True)
+        return
     with open(path, 'wb+') as dest:
         for c in file.chunks():
             dest.write(c)
 
 
-def resize_image(path: str, square: bool = False):
-    image = Image.open(path)
-    image.thumbnail((1500, 1500))
+def get_image_name(directory: str, stem: str, ext: str):
+    """Storage name not used before, so a new image never overwrites the one still referenced"""
+    return os.path.join(directory, '{}_{}{}'.format(stem, uuid.uuid4().hex[:8], ext))
+
+
+def store_image(instance: Model, file: File, name: str, square: bool = False, max_bytes: int = None):
+    """Writes and resizes file as storage name and sets it with metadata on instance, without saving"""
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    upload_to_storage(file, path)
+    try:
+        with resize_image(path, square=square, max_bytes=max_bytes) as image:
+            set_image_metadata(instance, image)
+    except Exception:
+        default_storage.delete(name)
+        raise
+    instance.image = name
+
+
+def copy_image(instance: Model, name: str):
+    """Gives the image of instance another storage name (hard link if possible), the old name stays valid"""
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    try:
+        os.link(instance.image.path, path)
+    except OSError:
+        shutil.copyfile(instance.image.path, path)
+    instance.image = name
+
+
+class StagedFile(File):
+    """Finished chunked upload, moved into storage instead of being copied"""
+    def __init__(self, path: str, name: str):
+        super().__init__(None, name)
+        self.path = path
+
+    def temporary_file_path(self):
+        return self.path
+
+
+def get_staging_path(name: str):
+    return os.path.join(settings.MEDIA_ROOT, upload_staging_dir, name)
+
+
+def write_chunk(path: str, stream, offset: int, length: int, chunk_size: int = 64 * 1024):
+    """Writes length bytes read from stream at offset of the staging file, returns number of bytes written"""
+    if not os.path.exists(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    written = 0
+    with open(path, 'r+b' if os.path.exists(path) else 'wb') as dest:
+        dest.seek(offset)
+        while written < length:
+            chunk = stream.read(min(chunk_size, length - written))
+            if not chunk:
+                break
+            dest.write(chunk)
+            written += len(chunk)
+        dest.truncate()
+    return written
+
+
+def is_image(path: str):
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except Exception:
+        return False
+    return True
+
 
-    if square:
-        image = square_image(image)
-    image.save(path)
+def resize_image(path: str, square: bool = False, max_bytes: int = None, min_psnr: float = None):
+    with metrics.image_processing.time(operation='resize'):
+        with Image.open(path) as original:
+            image = ImageOps.exif_transpose(original)
+        image.thumbnail(max_image_size)
+
+        if square:
+            image = square_image(image)
+        encode_image(image, path, max_bytes, min_psnr)
 
     return Image.open(path)
 
@@ -56,3 +153,102 @@ def square_image(image: Image):
 
     image = image.crop((left, upper, right, lower))
     return image
+
+
+def encode_image(image: Image, path: str, max_bytes: int = None, min_psnr: float = None):
+    """
+    Writes image to path without EXIF and other metadata (ICC profile is kept)
+    JPEG is written progressive with optimized Huffman tables, quality is searched in jpeg_quality_range:
+    the highest quality that fits max_bytes, lowered further while PSNR stays above min_psnr
+    """
+    image_format = Image.registered_extensions().get(os.path.splitext(path)[1].lower())
+    with metrics.image_processing.time(operation='encode'):
+        if image_format == 'JPEG':
+            data = encode_jpeg(image, max_bytes, min_psnr)
+        else:
+            buffer = io.BytesIO()
+            image.save(buffer, format=image_format, optimize=True)
+            data = buffer.getvalue()
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as dest:
+        dest.write(data)
+    os.replace(tmp_path, path)
+
+
+def encode_jpeg(image: Image, max_bytes: int = None, min_psnr: float = None):
+    if image.mode not in ('RGB', 'L', 'CMYK'):
+        image = image.convert('RGB')
+    lowest, highest = jpeg_quality_range
+
+    quality, data = highest, to_jpeg(image, highest)
+    if max_bytes is not None and len(data) > max_bytes:
+        quality, data = search_quality(image, lowest, highest - 1, lambda data: len(data) <= max_bytes, prefer_high=True)
+        if data is None:
+            quality, data = lowest, to_jpeg(image, lowest)
+
+    if min_psnr is not None:
+        _, lower_data = search_quality(
+            image, lowest, quality - 1, lambda data: get_psnr(image, data) >= min_psnr, prefer_high=False
+        )
+        if lower_data is not None:
+            data = lower_data
+    return data
+
+
+def search_quality(image: Image, lowest: int, highest: int, is_ok, prefer_high: bool):
+    """Binary search for the highest (or lowest) quality whose encoded data is_ok, returns (quality, data)"""
+    found = (None, None)
+    while lowest <= highest:
+        quality = (lowest + highest) // 2
+        data = to_jpeg(image, quality)
+        ok = is_ok(data)
+        if ok:
+            found = (quality, data)
+        if ok == prefer_high:
+            lowest = quality + 1
+        else:
+            highest = quality - 1
+    return found
+
+
+def to_jpeg(image: Image, quality: int):
+    buffer = io.BytesIO()
+    image.save(
+        buffer,
+        format='JPEG',
+        quality=quality,
+        optimize=True,
+        progressive=True,
+        icc_profile=image.info.get('icc_profile'),
+    )
+    return buffer.getvalue()
+
+
+def get_psnr(image: Image, data: bytes):
+    with Image.open(io.BytesIO(data)) as decoded:
+        difference = ImageChops.difference(image, decoded.convert(image.mode))
+    mse = sum(ImageStat.Stat(difference).sum2) / (image.width * image.height * len(image.getbands()))
+    if mse == 0:
+        return math.inf
+    return 10 * math.log10(255 ** 2 / mse)
+
+
+def set_image_metadata(instance: Model, image: Image):
+    if image is None:
+        instance.image_width, instance.image_height, instance.image_placeholder = None, None, None
+        return
+    instance.image_width, instance.image_height = image.size
+    instance.image_placeholder = get_placeholder(image)
+
+
+def get_placeholder(image: Image):
+    """Tiny blurred preview of image as data URI, rendered inline until the real image is loaded"""
+    placeholder = image.copy()
+    placeholder.thumbnail(placeholder_size)
+    if placeholder.mode != 'RGB':
+        placeholder = placeholder.convert('RGB')
+
+    buffer = io.BytesIO()
+    placeholder.save(buffer, format='JPEG', quality=40, optimize=True)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
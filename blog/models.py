@@ -1,6 +1,9 @@
 import os
+import uuid
 
 from django.db.models import Model, ForeignKey, CharField, ImageField, CASCADE, DateTimeField, IntegerField
+from django.db.models import UUIDField, BigIntegerField, Index, UniqueConstraint, OneToOneField, SET_NULL
+from django.db.models import BinaryField, BooleanField
 from django.conf import settings
 
 from . import model_logic
@@ -11,10 +14,30 @@ class Article(Model):
     name = CharField(max_length=70)
     text = CharField(max_length=100000)
     image = ImageField(max_length=1000, upload_to=r'articles/images', null=True)
+    image_width = IntegerField(null=True)
+    image_height = IntegerField(null=True)
+    image_placeholder = CharField(max_length=4000, null=True)
     tag = ForeignKey('Tag', on_delete=CASCADE, null=True)
     pub_date = DateTimeField()
     last_edit = DateTimeField()
 
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=['author', 'name'], name='unique_article_name_per_author'),
+        ]
+        indexes = [
+            Index(fields=['author', '-pub_date'], name='article_author_pub_date_idx'),
+            Index(fields=['tag', '-pub_date'], name='article_tag_pub_date_idx'),
+            Index(fields=['-last_edit'], name='article_last_edit_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        article = super().from_db(db, field_names, values)
+        # tag the article was loaded with, leaderboards move the article between tags on change
+        article.loaded_tag_id = article.__dict__.get('tag_id')
+        return article
+
     def __str__(self):
         return self.name
 
@@ -26,7 +49,8 @@ class Article(Model):
         filename = os.path.join('articles/images/', filename)
 
         model_logic.upload_to_storage(file, filename)
-        model_logic.resize_image(filename, square=False)
+        image = model_logic.resize_image(filename, square=False, max_bytes=model_logic.max_image_bytes['article'])
+        model_logic.set_image_metadata(self, image)
         self.image = filename
         self.save()
 
@@ -35,10 +59,14 @@ class Article(Model):
 
 
 class Writer(Model):
-    name = CharField(max_length=50)
+    user = OneToOneField(settings.AUTH_USER_MODEL, on_delete=SET_NULL, null=True, related_name='writer')
+    name = CharField(max_length=50, unique=True)
     bio = CharField(max_length=1000, null=True)
     age = IntegerField(null=True)
     image = ImageField(max_length=1000, upload_to=r'writers/images', default=r'writers/images/default.jpg', null=True)
+    image_width = IntegerField(null=True)
+    image_height = IntegerField(null=True)
+    image_placeholder = CharField(max_length=4000, null=True)
 
     def __str__(self):
         return self.name
@@ -51,7 +79,8 @@ class Writer(Model):
         filename = os.path.join('writers/images/', filename)
 
         model_logic.upload_to_storage(file, filename)
-        model_logic.resize_image(filename, square=True)
+        image = model_logic.resize_image(filename, square=True, max_bytes=model_logic.max_image_bytes['writer'])
+        model_logic.set_image_metadata(self, image)
         self.image = filename
         self.save()
 
@@ -65,12 +94,17 @@ class Comment(Model):
     text = CharField(max_length=1000)
     comment_date = DateTimeField()
 
+    class Meta:
+        indexes = [
+            Index(fields=['article', '-comment_date'], name='comment_article_date_idx'),
+        ]
+
     def __str__(self):
         return self.text
 
 
 class Tag(Model):
-    name = CharField(max_length=70)
+    name = CharField(max_length=70, unique=True)
     image = ImageField(max_length=1000, upload_to=r'tags/images', default=r'tags/images/black.jpg', null=True)
 
     def __str__(self):
@@ -80,3 +114,96 @@ class Tag(Model):
 class Report(Model):
     reporter = ForeignKey('Writer', on_delete=CASCADE)
     article = ForeignKey('Article', on_delete=CASCADE)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=['reporter', 'article'], name='unique_report_per_reporter'),
+        ]
+
+
+class Upload(Model):
+    id = UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = ForeignKey('Writer', on_delete=CASCADE)
+    filename = CharField(max_length=255)
+    size = BigIntegerField()
+    offset = BigIntegerField(default=0)
+    created = DateTimeField()
+    # set while a chunk is written, so a concurrent PATCH does not write the same range
+    writing_until = DateTimeField(null=True)
+
+    def __str__(self):
+        return self.filename
+
+    def is_complete(self):
+        return self.offset == self.size
+
+    def staging_path(self):
+        return model_logic.get_staging_path(str(self.id))
+
+    def get_file(self):
+        return model_logic.StagedFile(self.staging_path(), self.filename)
+
+    def delete_staged(self):
+        if os.path.exists(self.staging_path()):
+            os.remove(self.staging_path())
+
+
+class WriterLeaderboard(Model):
+    """Materialized Writer.objects.annotate(num_articles=Count('article')), kept up to date by leaderboards.py"""
+    writer = OneToOneField('Writer', on_delete=CASCADE, primary_key=True, related_name='leaderboard')
+    num_articles = IntegerField(default=0)
+    last_activity = DateTimeField(null=True)
+    rank = IntegerField(null=True)
+
+    class Meta:
+        indexes = [
+            Index(fields=['-num_articles', 'writer'], name='writer_leaderboard_idx'),
+        ]
+
+    def get_writer(self):
+        """Writer with leaderboard values attached, as the annotated queryset used to return them"""
+        writer = self.writer
+        writer.num_articles, writer.last_activity, writer.rank = self.num_articles, self.last_activity, self.rank
+        return writer
+
+
+class TagLeaderboard(Model):
+    """Materialized Tag.objects.annotate(num_articles=Count('article')), kept up to date by leaderboards.py"""
+    tag = OneToOneField('Tag', on_delete=CASCADE, primary_key=True, related_name='leaderboard')
+    num_articles = IntegerField(default=0)
+    last_activity = DateTimeField(null=True)
+    rank = IntegerField(null=True)
+
+    class Meta:
+        indexes = [
+            Index(fields=['-num_articles', 'tag'], name='tag_leaderboard_idx'),
+        ]
+
+    def get_tag(self):
+        """Tag with leaderboard values attached, as the annotated queryset used to return them"""
+        tag = self.tag
+        tag.num_articles, tag.last_activity, tag.rank = self.num_articles, self.last_activity, self.rank
+        return tag
+
+
+class WriterStats(Model):
+    """Profile statistics of a writer, kept up to date by stats.py instead of aggregating on every view"""
+    writer = OneToOneField('Writer', on_delete=CASCADE, primary_key=True, related_name='stats')
+    num_articles = IntegerField(default=0)
+    num_comments_received = IntegerField(default=0)
+    last_activity = DateTimeField(null=True)
+
+
+class ArticleRevision(Model):
+    """Version of an article text: a compressed snapshot or compressed changes to the previous one (revisions.py)"""
+    article = ForeignKey('Article', on_delete=CASCADE, related_name='revisions')
+    number = IntegerField()
+    is_snapshot = BooleanField()
+    data = BinaryField()
+    length = IntegerField()
+    created = DateTimeField()
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=['article', 'number'], name='unique_revision_number_per_article'),
+        ]
@@ -0,0 +1,83 @@
+import time
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.http import Http404
+
+from .models import Tag
+from . import metrics
+
+
+class TagRegistry:
+    """
+    Tags loaded once per worker process and kept in memory.
+    Version in the shared cache is bumped on every Tag save/delete,
+    registry reloads all tags when it sees a version it has not loaded yet
+    or when they were loaded more than TAG_REGISTRY_MAX_AGE seconds ago
+    """
+    version_key = 'blog:tag_registry_version'
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.loaded_at = None
+        self.tags = []
+        self.by_name = {}
+
+    def get_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            # evicted or never set: any value differing from loaded versions forces reload
+            cache.add(self.version_key, time.time_ns(), None)
+            version = cache.get(self.version_key)
+        return version
+
+    def refresh(self):
+        version = self.get_version()
+        # a process-local cache never sees versions bumped by other processes, tags expire to bound that
+        is_fresh = self.loaded_at is not None and time.monotonic() - self.loaded_at < settings.TAG_REGISTRY_MAX_AGE
+        if version is not None and version == self.version and is_fresh:
+            metrics.record_cache('tag_registry', True)
+            return
+        metrics.record_cache('tag_registry', False)
+        with self.lock:
+            # from the primary: tags of a lagging replica would be kept under the new version
+            loaded_at = time.monotonic()
+            tags = list(Tag.objects.using(router.db_for_write(Tag)).order_by('pk'))
+            self.tags, self.by_name, self.version = tags, {tag.name: tag for tag in tags}, version
+            self.loaded_at = loaded_at
+
+    def all(self):
+        self.refresh()
+        return self.tags
+
+    def get(self, name: str):
+        self.refresh()
+        return self.by_name.get(name)
+
+    def get_or_404(self, name: str):
+        tag = self.get(name)
+        if tag is None:
+            raise Http404('No Tag matches the given query.')
+        return tag
+
+    def bump_version(self):
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.add(self.version_key, time.time_ns(), None)
+
+
+tag_registry = TagRegistry()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_registry(sender, **kwargs):
+    # bumped again after commit, so other workers do not keep a version loaded before the change was visible
+    tag_registry.bump_version()
+    transaction.on_commit(tag_registry.bump_version)
@@ -0,0 +1,141 @@
+"""
+Revision history of article texts. Revisions 1, 1 + REVISION_SNAPSHOT_INTERVAL, ... are full snapshots,
+the ones between store only the changes to the previous revision, so any revision is rebuilt from
+one snapshot and fewer than REVISION_SNAPSHOT_INTERVAL deltas. Both are zlib-compressed.
+Changes are sorted, non-overlapping [start, end, replacement] ranges of the previous text; autosave
+of the edit page sends the same format against the revision the editor started from
+"""
+import json
+import zlib
+import difflib
+from itertools import accumulate
+
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.utils import timezone
+
+from .models import Article, ArticleRevision
+
+
+class InvalidChanges(Exception):
+    pass
+
+
+class Conflict(Exception):
+    """Changes are based on a revision that is not the latest one anymore"""
+    def __init__(self, latest: int):
+        super().__init__('Latest revision is {}'.format(latest))
+        self.latest = latest
+
+
+def apply_changes(text: str, changes) -> str:
+    if not isinstance(changes, list):
+        raise InvalidChanges('Changes must be a list')
+    parts, position = [], 0
+    for change in changes:
+        if (not isinstance(change, list) or len(change) != 3 or not isinstance(change[2], str)
+                or not all(isinstance(value, int) and not isinstance(value, bool) for value in change[:2])):
+            raise InvalidChanges('Change must be [start, end, text]')
+        start, end, replacement = change
+        if not position <= start <= end <= len(text):
+            raise InvalidChanges('Changes must be sorted, not overlapping ranges of the text')
+        parts.append(text[position:start])
+        parts.append(replacement)
+        position = end
+    parts.append(text[position:])
+    return ''.join(parts)
+
+
+def get_changes(old: str, new: str) -> list:
+    """Changes turning old into new, compared line by line"""
+    old_lines, new_lines = old.splitlines(keepends=True), new.splitlines(keepends=True)
+    offsets = [0] + list(accumulate(len(line) for line in old_lines))
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    return [
+        [offsets[i1], offsets[i2], ''.join(new_lines[j1:j2])]
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal'
+    ]
+
+
+def compress(value: str) -> bytes:
+    return zlib.compress(value.encode())
+
+
+def decompress(data) -> str:
+    return zlib.decompress(bytes(data)).decode()
+
+
+def normalize(text: str) -> str:
+    """Line breaks as in textarea values, which autosave offsets are counted in; forms post them as CRLF"""
+    return text.replace('\r\n', '\n')
+
+
+def get_text(article_id: int, number: int) -> str:
+    """Text of a revision: the latest snapshot up to it and the deltas after that snapshot"""
+    revisions = ArticleRevision.objects.filter(article=article_id, number__lte=number)
+    snapshot = revisions.filter(is_snapshot=True).order_by('-number').values_list('number', 'data').first()
+    if snapshot is None:
+        raise ArticleRevision.DoesNotExist('Revision {} does not exist'.format(number))
+    deltas = list(revisions.filter(number__gt=snapshot[0]).order_by('number').values_list('data', flat=True))
+    if snapshot[0] + len(deltas) != number:
+        raise ArticleRevision.DoesNotExist('Revision {} does not exist'.format(number))
+
+    text = decompress(snapshot[1])
+    for data in deltas:
+        text = apply_changes(text, json.loads(decompress(data)))
+    return text
+
+
+def get_latest(article: Article, original: str = None):
+    """
+    (number, text) of the latest revision. Articles without revisions get (0, original),
+    the text the article had before its first revision, article.text by default
+    """
+    number = ArticleRevision.objects.filter(article=article).order_by('-number').values_list('number', flat=True).first()
+    if number is None:
+        return 0, normalize(article.text if original is None else original)
+    return number, get_text(article.pk, number)
+
+
+def save_changes(article: Article, base: int, changes) -> int:
+    """Adds a revision with changes to revision base (0 for article text), returns its number"""
+    number, text = get_latest(article)
+    if base != number:
+        raise Conflict(number)
+    return add(article, number, text, apply_changes(text, changes), changes)
+
+
+def record(article: Article, text: str, original: str = None) -> int:
+    """Adds text as a revision unless it is the latest text already, returns the latest number"""
+    number, latest = get_latest(article, original)
+    text = normalize(text)
+    if text == latest:
+        return number
+    return add(article, number, latest, text, get_changes(latest, text))
+
+
+def add(article: Article, number: int, base_text: str, text: str, changes: list) -> int:
+    if len(text) >= Article._meta.get_field('text').max_length:
+        raise InvalidChanges('Text is too long')
+    try:
+        with transaction.atomic():
+            if number == 0:
+                # text the article had before its first revision
+                create(article, 1, True, compress(base_text), len(base_text))
+                number = 1
+            number += 1
+            if (number - 1) % settings.REVISION_SNAPSHOT_INTERVAL == 0:
+                create(article, number, True, compress(text), len(text))
+            else:
+                create(article, number, False, compress(json.dumps(changes, separators=(',', ':'))), len(text))
+    except IntegrityError:
+        # another save added the same number first
+        raise Conflict(ArticleRevision.objects.filter(article=article).order_by('-number')
+                       .values_list('number', flat=True).first())
+    return number
+
+
+def create(article: Article, number: int, is_snapshot: bool, data: bytes, length: int):
+    ArticleRevision.objects.create(
+        article=article, number=number, is_snapshot=is_snapshot, data=data, length=length, created=timezone.now(),
+    )
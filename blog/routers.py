@@ -0,0 +1,122 @@
+"""
+Reads of views marked with read_only go to settings.REPLICA_DATABASE, everything else to default.
+The primary is used instead while a user's own POST is recent (REPLICA_STICKY_SECONDS, remembered
+in a cookie), inside transactions, and while the replica is unreachable or lags behind by more
+than REPLICA_MAX_LAG seconds
+"""
+import time
+import functools
+import threading
+import contextvars
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.utils import ConnectionDoesNotExist
+
+
+sticky_cookie = 'blog_primary_until'
+read_alias = contextvars.ContextVar('read_alias', default=None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = read_alias.get()
+        # sessions and users stay on the primary, a fresh login must be visible on the next request
+        if alias is None or model._meta.app_label != 'blog' or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replica holds the same data, objects read from it may be related to objects of the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replica gets schema by replication
+        return db != settings.REPLICA_DATABASE
+
+
+class ReplicaLag:
+    """Lag of the replica in seconds, checked at most every REPLICA_LAG_CHECK_INTERVAL seconds per process"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked = None
+        self.lag = None
+
+    def get(self, alias: str):
+        now = time.monotonic()
+        expired = self.checked is None or now - self.checked >= settings.REPLICA_LAG_CHECK_INTERVAL
+        # one thread checks, others keep using the last known lag meanwhile
+        if expired and self.lock.acquire(blocking=False):
+            try:
+                self.lag, self.checked = self.query(alias), now
+            finally:
+                self.lock.release()
+        return self.lag
+
+    def query(self, alias: str):
+        """None if replica cannot be used; replicas without replication info (SQLite) have no lag"""
+        try:
+            connection = connections[alias]
+            with connection.cursor() as cursor:
+                if connection.vendor != 'postgresql':
+                    cursor.execute('SELECT 1')
+                    return 0.0
+                # time since the last replayed transaction grows while nothing is written,
+                # it is the lag only while received WAL is still waiting to be replayed
+                cursor.execute(
+                    'SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 '
+                    'WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+                    'ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END'
+                )
+                return float(cursor.fetchone()[0])
+        except (ConnectionDoesNotExist, DatabaseError):
+            return None
+
+
+replica_lag = ReplicaLag()
+
+
+def get_read_alias(request):
+    alias = settings.REPLICA_DATABASE
+    if not alias or request.method not in ('GET', 'HEAD') or is_sticky(request):
+        return None
+    lag = replica_lag.get(alias)
+    if lag is None or lag > settings.REPLICA_MAX_LAG:
+        return None
+    return alias
+
+
+def is_sticky(request):
+    try:
+        return float(request.COOKIES.get(sticky_cookie, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_only(fun):
+    """View hint: reads of a GET request may be served by the replica"""
+    @functools.wraps(fun)
+    def inner(request, *args, **kwargs):
+        token = read_alias.set(get_read_alias(request))
+        try:
+            return fun(request, *args, **kwargs)
+        finally:
+            read_alias.reset(token)
+    return inner
+
+
+class ReplicaStickinessMiddleware:
+    """After a user's own POST (or other unsafe request) their reads go to the primary for a while"""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if settings.REPLICA_DATABASE and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            until = time.time() + settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(sticky_cookie, '{:.3f}'.format(until), max_age=settings.REPLICA_STICKY_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
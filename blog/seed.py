@@ -0,0 +1,168 @@
+"""
+Generates a reproducible dataset with bulk_create for benchmarks and query plan tests.
+Sizes follow skewed distributions of a real blog: few prolific writers and popular tags,
+most articles with few comments, log-normal lengths of texts
+"""
+import random
+import datetime
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Article, Writer, Tag, Comment, Report, WriterStats
+from . import feeds
+from . import leaderboards
+from . import stats
+from .registry import tag_registry
+
+
+password = 'seed'
+words = (
+    'the of and to in is that for it as was with be by on not he this are or his from at which but have an they '
+    'you were her she there been one all we their has would when if so no will what can more about up out them '
+    'time people could some into than its first then two like other only new very after years way most also city '
+    'blog article story coffee travel code design music garden street night morning river light winter summer '
+    'python django image server query index cache write read think small great little long world house country'
+).split()
+
+
+def seed(writers: int = 100, tags: int = 20, articles: int = 2000, comments: int = 20000, reports: int = 200,
+         random_seed: int = 0, batch_size: int = 1000):
+    """Adds the dataset to the current database, returns dict with number of created rows"""
+    rng = random.Random(random_seed)
+    now = timezone.now()
+    pool = ' '.join(rng.choice(words) for _ in range(200000))
+
+    with transaction.atomic():
+        writer_ids = create_writers(rng, writers, batch_size)
+        tag_ids = create_tags(tags, batch_size)
+        article_ids, pub_dates = create_articles(rng, pool, now, writer_ids, tag_ids, articles, batch_size)
+        create_comments(rng, pool, now, writer_ids, article_ids, pub_dates, comments, batch_size)
+        num_reports = create_reports(rng, writer_ids, article_ids, reports, batch_size)
+
+    rebuild_summaries()
+    return {
+        'writers': len(writer_ids),
+        'tags': len(tag_ids),
+        'articles': len(article_ids),
+        'comments': comments if article_ids else 0,
+        'reports': num_reports,
+    }
+
+
+def rebuild_summaries():
+    # bulk_create sends no signals, summaries are rebuilt once instead
+    leaderboards.rebuild_all()
+    stats.rebuild(WriterStats, Writer, Article, Comment)
+    tag_registry.bump_version()
+    feeds.invalidate_all()
+
+
+def bulk_create_ids(model, objects, batch_size: int):
+    """bulk_create returning primary keys in insertion order, also on backends that do not return them"""
+    last_pk = model.objects.aggregate(last_pk=Max('pk'))['last_pk'] or 0
+    bulk_create(model, objects, batch_size)
+    return list(model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True))
+
+
+def bulk_create(model, objects: list, batch_size: int):
+    # not bulk_create(batch_size=...), it would override smaller batches needed by SQLite
+    for start in range(0, len(objects), batch_size):
+        model.objects.bulk_create(objects[start:start + batch_size])
+
+
+def get_text(rng: random.Random, pool: str, median: int, sigma: float, max_length: int):
+    length = min(max_length, max(1, int(rng.lognormvariate(0, sigma) * median)))
+    start = rng.randrange(0, len(pool) - max_length)
+    return pool[start:start + length].strip() or 'text'
+
+
+def get_skewed_weights(rng: random.Random, count: int, alpha: float = 1.2):
+    return [rng.paretovariate(alpha) for _ in range(count)]
+
+
+def get_date_after(rng: random.Random, start: datetime.datetime, end: datetime.datetime):
+    return start + (end - start) * rng.random()
+
+
+def create_writers(rng: random.Random, count: int, batch_size: int):
+    offset = Writer.objects.count()
+    names = ['{}_{}{}'.format(rng.choice(words), rng.choice(words), offset + i) for i in range(count)]
+    hashed = make_password(password)  # hashing once, it is the slow part of creating users
+    user_ids = bulk_create_ids(User, [User(username=name, password=hashed) for name in names], batch_size)
+    pool = ' '.join(words)
+    return bulk_create_ids(Writer, [
+        Writer(
+            name=name,
+            user_id=user_id,
+            age=rng.randint(16, 80) if rng.random() < 0.7 else None,
+            bio=pool[:rng.randint(20, 300)] if rng.random() < 0.6 else None,
+        )
+        for name, user_id in zip(names, user_ids)
+    ], batch_size)
+
+
+def create_tags(count: int, batch_size: int):
+    offset = Tag.objects.count()
+    return bulk_create_ids(Tag, [Tag(name='{}{}'.format(words[i % len(words)], offset + i)) for i in range(count)],
+                           batch_size)
+
+
+def create_articles(rng: random.Random, pool: str, now: datetime.datetime, writer_ids: list, tag_ids: list,
+                    count: int, batch_size: int):
+    if not writer_ids:
+        return [], []
+    authors = rng.choices(writer_ids, get_skewed_weights(rng, len(writer_ids)), k=count)
+    # tag popularity is close to Zipf's law
+    if tag_ids:
+        tags = rng.choices(tag_ids, [1 / rank for rank in range(1, len(tag_ids) + 1)], k=count)
+    else:
+        tags = [None] * count
+    start = now - datetime.timedelta(days=730)
+
+    objects, pub_dates = [], []
+    for i, (author_id, tag_id) in enumerate(zip(authors, tags)):
+        pub_date = get_date_after(rng, start, now)
+        last_edit = get_date_after(rng, pub_date, now) if rng.random() < 0.3 else pub_date
+        objects.append(Article(
+            author_id=author_id,
+            tag_id=tag_id,
+            name='{} {} {}'.format(rng.choice(words), rng.choice(words), i),
+            text=get_text(rng, pool, 3000, 0.8, 100000),
+            pub_date=pub_date,
+            last_edit=last_edit,
+        ))
+        pub_dates.append(pub_date)
+    return bulk_create_ids(Article, objects, batch_size), pub_dates
+
+
+def create_comments(rng: random.Random, pool: str, now: datetime.datetime, writer_ids: list, article_ids: list,
+                    pub_dates: list, count: int, batch_size: int):
+    if not article_ids:
+        return
+    indexes = rng.choices(range(len(article_ids)), get_skewed_weights(rng, len(article_ids), 1.1), k=count)
+    authors = rng.choices(writer_ids, get_skewed_weights(rng, len(writer_ids)), k=count)
+    batch = []
+    for index, author_id in zip(indexes, authors):
+        batch.append(Comment(
+            article_id=article_ids[index],
+            author_id=author_id,
+            text=get_text(rng, pool, 120, 0.9, 1000),
+            comment_date=get_date_after(rng, pub_dates[index], now),
+        ))
+        if len(batch) >= batch_size:
+            Comment.objects.bulk_create(batch)
+            batch = []
+    Comment.objects.bulk_create(batch)
+
+
+def create_reports(rng: random.Random, writer_ids: list, article_ids: list, count: int, batch_size: int):
+    count = min(count, len(writer_ids) * len(article_ids))
+    pairs = set()
+    while len(pairs) < count:
+        pairs.add((rng.choice(writer_ids), rng.choice(article_ids)))
+    bulk_create(Report, [Report(reporter_id=r, article_id=a) for r, a in sorted(pairs)], batch_size)
+    return len(pairs)
@@ -14,3 +14,73 @@ document.getElementById("photobtn").onclick = function(event){
     event.preventDefault();
     document.getElementById("searitem").style.display = "block";
 }
+
+
+// Autosave sends only the changed range of the text against the last saved revision
+(function () {
+    let form = document.getElementById("edit_form");
+    let textarea = document.getElementById("art");
+    let status = document.getElementById("autosave_status");
+    if (!form || !textarea) {
+        return;
+    }
+    let revision = parseInt(form.dataset.revision, 10);
+    let saved = textarea.value;
+    let timer = null;
+    let saving = false;
+
+    // offsets count characters like the server does, not UTF-16 code units
+    function getChanges(oldText, newText) {
+        let old = Array.from(oldText);
+        let text = Array.from(newText);
+        let start = 0;
+        while (start < old.length && start < text.length && old[start] === text[start]) {
+            start++;
+        }
+        let end = 0;
+        while (end < old.length - start && end < text.length - start
+               && old[old.length - 1 - end] === text[text.length - 1 - end]) {
+            end++;
+        }
+        return [[start, old.length - end, text.slice(start, text.length - end).join("")]];
+    }
+
+    function save() {
+        let text = textarea.value;
+        if (saving || text === saved) {
+            return;
+        }
+        saving = true;
+        fetch(form.dataset.autosaveUrl, {
+            method: "POST",
+            credentials: "same-origin",
+            headers: {
+                "Content-Type": "application/json",
+                "X-CSRFToken": form.querySelector("[name=csrfmiddlewaretoken]").value
+            },
+            body: JSON.stringify({base: revision, changes: getChanges(saved, text)})
+        }).then(function (response) {
+            return response.json();
+        }).then(function (data) {
+            saving = false;
+            if (data.ok) {
+                revision = data.revision;
+                saved = text;
+                status.textContent = "Draft saved";
+            } else {
+                // edited elsewhere: saving the form still works, autosave stops
+                status.textContent = data.message;
+                textarea.removeEventListener("input", schedule);
+            }
+        }).catch(function () {
+            saving = false;
+        });
+    }
+
+    function schedule() {
+        clearTimeout(timer);
+        timer = setTimeout(save, 2000);
+    }
+
+    textarea.addEventListener("input", schedule);
+})();
@@ -0,0 +1,95 @@
+"""
+WriterStats are updated in place by article and comment create/delete events.
+Last activity is the latest of writer's own article edits and comments
+"""
+from django.db import transaction
+from django.db.models import F, Count, Max, Value, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Article, Comment, Writer, WriterStats
+
+
+def rebuild(stats_model, writer_model, article_model, comment_model):
+    """Recomputes stats of all writers"""
+    comments = (
+        comment_model.objects.filter(article__author=OuterRef('pk'))
+        .order_by().values('article__author').annotate(count=Count('pk')).values('count')
+    )
+    latest_comment = comment_model.objects.filter(author=OuterRef('pk')).order_by('-comment_date')
+    # subqueries rather than Count('article'): with a join the GROUP BY repeats the comment subquery per article
+    articles = article_model.objects.filter(author=OuterRef('pk')).order_by().values('author')
+    rows = writer_model.objects.annotate(
+        num_articles=Coalesce(Subquery(articles.annotate(count=Count('pk')).values('count')), 0),
+        num_comments_received=Coalesce(Subquery(comments), 0),
+        last_article=Subquery(articles.annotate(latest=Max('last_edit')).values('latest')),
+        last_comment=Subquery(latest_comment.values('comment_date')[:1]),
+    ).values_list('pk', 'num_articles', 'num_comments_received', 'last_article', 'last_comment')
+
+    with transaction.atomic():
+        stats_model.objects.all().delete()
+        stats_model.objects.bulk_create((
+            stats_model(
+                writer_id=pk,
+                num_articles=num_articles,
+                num_comments_received=num_comments_received,
+                last_activity=max((date for date in (last_article, last_comment) if date), default=None),
+            )
+            for pk, num_articles, num_comments_received, last_article, last_comment in rows.iterator()
+        ), batch_size=1000)
+
+
+def get_stats(writer_id: int):
+    return WriterStats.objects.filter(writer=writer_id)
+
+
+def get_stats_of_article_author(article_id: int):
+    return WriterStats.objects.filter(writer=Subquery(Article.objects.filter(pk=article_id).values('author')))
+
+
+def touch(date):
+    return Greatest(Coalesce(F('last_activity'), Value(date)), Value(date))
+
+
+def recompute_last_activity():
+    last_article = Article.objects.filter(author=OuterRef('writer')).order_by('-last_edit').values('last_edit')[:1]
+    last_comment = Comment.objects.filter(author=OuterRef('writer')).order_by('-comment_date').values('comment_date')[:1]
+    # Greatest returns NULL on SQLite if any argument is NULL, so each side falls back to the other
+    return Greatest(
+        Coalesce(Subquery(last_article), Subquery(last_comment)),
+        Coalesce(Subquery(last_comment), Subquery(last_article)),
+    )
+
+
+@receiver(post_save, sender=Writer)
+def create_writer_stats(sender, instance, created, **kwargs):
+    if created:
+        WriterStats.objects.get_or_create(writer=instance)
+
+
+@receiver(post_save, sender=Article)
+def article_saved(sender, instance, created, **kwargs):
+    if created:
+        get_stats(instance.author_id).update(num_articles=F('num_articles') + 1, last_activity=touch(instance.last_edit))
+    else:
+        get_stats(instance.author_id).update(last_activity=touch(instance.last_edit))
+
+
+@receiver(post_delete, sender=Article)
+def article_deleted(sender, instance, **kwargs):
+    get_stats(instance.author_id).update(num_articles=F('num_articles') - 1, last_activity=recompute_last_activity())
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        get_stats_of_article_author(instance.article_id).update(num_comments_received=F('num_comments_received') + 1)
+        get_stats(instance.author_id).update(last_activity=touch(instance.comment_date))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    # comments are deleted before their article on cascade, so the article is still there to find its author
+    get_stats_of_article_author(instance.article_id).update(num_comments_received=F('num_comments_received') - 1)
+    get_stats(instance.author_id).update(last_activity=recompute_last_activity())
@@ -0,0 +1,18 @@
+from django.template import Library
+from django.utils.html import format_html
+
+
+register = Library()
+
+
+@register.simple_tag
+def image_attrs(instance):
+    """Intrinsic size and inline placeholder, so layout does not jump while image is loading"""
+    if not getattr(instance, 'image_width', None) or not getattr(instance, 'image_placeholder', None):
+        return ''
+    return format_html(
+        'width="{}" height="{}" style="background: url({}) center / cover no-repeat;"',
+        instance.image_width,
+        instance.image_height,
+        instance.image_placeholder,
+    )
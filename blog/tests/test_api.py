@@ -0,0 +1,106 @@
+import json
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog.api import encode_cursor, decode_cursor, InvalidQuery
+from blog.tests.test_models import create_writer, create_article, create_tag
+from blog.tests.test_stats import create_comment
+
+
+class ApiTestCase(TestCase):
+
+    def setUp(self):
+        self.writer = create_writer('test_writer', 30, bio='test_bio')
+        self.other_writer = create_writer('test_other_writer', 0)
+        self.tag = create_tag('test_tag')
+        self.articles = [
+            create_article(self.writer, 'test_article_{}'.format(i), 'test_text', tag=self.tag) for i in range(5)
+        ]
+        self.other_article = create_article(self.other_writer, 'test_other_article', 'test_text')
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_articles(self):
+        data = self.get(reverse('blog:api_articles'))
+        self.assertEqual([item['name'] for item in data['results']],
+                         [article.name for article in self.articles + [self.other_article]])
+        self.assertIsNone(data['next'])
+        item = data['results'][0]
+        self.assertEqual(item['author'], 'test_writer')
+        self.assertEqual(item['tag'], 'test_tag')
+        self.assertNotIn('text', item)
+
+    def test_articles_by_writer_and_tag(self):
+        self.assertEqual(len(self.get(reverse('blog:api_articles'), {'writer': 'test_other_writer'})['results']), 1)
+        self.assertEqual(len(self.get(reverse('blog:api_articles'), {'tag': 'test_tag'})['results']), 5)
+
+    def test_field_selection_reads_only_selected_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get(reverse('blog:api_articles'), {'fields': 'name,text'})
+        self.assertEqual(data['results'][0], {'name': 'test_article_0', 'text': 'test_text'})
+        select = [query['sql'] for query in queries if 'blog_article' in query['sql']][-1]
+        self.assertNotIn('pub_date', select)
+
+    @override_settings(API_CHUNK_SIZE=2)
+    def test_cursor_pagination(self):
+        data = self.get(reverse('blog:api_articles'), {'limit': 2, 'fields': 'name'})
+        names = [item['name'] for item in data['results']]
+        while data['next'] is not None:
+            data = self.get(data['next'])
+            self.assertLessEqual(len(data['results']), 2)
+            names += [item['name'] for item in data['results']]
+        self.assertEqual(names, [article.name for article in self.articles + [self.other_article]])
+
+    def test_writers(self):
+        data = self.get(reverse('blog:api_writers'), {'name': 'test_writer'})
+        self.assertEqual(len(data['results']), 1)
+        self.assertEqual(data['results'][0]['bio'], 'test_bio')
+        self.assertEqual(data['results'][0]['num_articles'], 5)
+
+    def test_tags(self):
+        data = self.get(reverse('blog:api_tags'))
+        self.assertEqual(data['results'], [{
+            'id': self.tag.pk, 'name': 'test_tag', 'image': '/media/tags/images/black.jpg', 'num_articles': 5
+        }])
+
+    def test_comments_of_article(self):
+        comment = create_comment(self.articles[0], self.other_writer, 'test_comment')
+        create_comment(self.articles[1], self.other_writer, 'test_other_comment')
+        data = self.get(reverse('blog:api_comments'), {'article': self.articles[0].pk})
+        self.assertEqual([item['id'] for item in data['results']], [comment.pk])
+        self.assertEqual(data['results'][0]['author'], 'test_other_writer')
+
+    def test_invalid_queries(self):
+        for name, params in [
+            ('api_articles', {'fields': 'name,password'}),
+            ('api_articles', {'limit': 0}),
+            ('api_articles', {'limit': 'x'}),
+            ('api_articles', {'cursor': '!!'}),
+            ('api_comments', {'article': 'x'}),
+        ]:
+            response = self.client.get(reverse('blog:' + name), params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertFalse(response.json()['ok'])
+
+    def test_post_is_not_allowed(self):
+        self.assertEqual(self.client.post(reverse('blog:api_articles')).status_code, 405)
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(12345)), 12345)
+        with self.assertRaises(InvalidQuery):
+            decode_cursor('abc')
+
+    def test_large_page_is_streamed_in_chunks(self):
+        with mock.patch('blog.api.buffer_size', 100):
+            response = self.client.get(reverse('blog:api_articles'))
+            chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(len(json.loads(b''.join(chunks))['results']), 6)
@@ -0,0 +1,59 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.core.cache import cache
+from django.urls import reverse
+
+from blog.auth import CachedModelBackend, get_cache_key
+from blog.tests.test_models import create_writer, create_user
+
+
+@mock.patch('blog.auth.cache_is_shared', return_value=True)
+class CachedModelBackendTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user('test_writer', 'test_writer')
+        self.writer = create_writer('test_writer', 0)
+        self.backend = CachedModelBackend()
+
+    def test_user_is_loaded_once(self, cache_is_shared):
+        self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+
+    def test_user_is_invalidated_on_save(self, cache_is_shared):
+        self.backend.get_user(self.user.pk)
+        self.user.set_password('new_password')
+        self.user.save()
+        self.assertIsNone(cache.get(get_cache_key(self.user.pk)))
+
+    def test_authenticated_request_without_auth_queries(self, cache_is_shared):
+        self.client.login(username='test_writer', password='test_writer')
+        self.client.get(reverse('blog:authors'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('blog:authors'))
+        self.assertEqual(response.status_code, 200)
+        for query in queries.captured_queries:
+            self.assertNotIn('django_session', query['sql'])
+            self.assertNotIn('auth_user', query['sql'])
+
+    def test_password_change_logs_out_other_sessions(self, cache_is_shared):
+        self.client.login(username='test_writer', password='test_writer')
+        self.client.get(reverse('blog:my_page'))
+
+        self.user.set_password('new_password')
+        self.user.save()
+
+        response = self.client.get(reverse('blog:my_page'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_users_are_not_cached_in_process_local_cache(self, cache_is_shared):
+        cache_is_shared.return_value = False
+        self.backend.get_user(self.user.pk)
+        self.assertIsNone(cache.get(get_cache_key(self.user.pk)))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.backend.get_user(self.user.pk), self.user)
@@ -0,0 +1,47 @@
+from io import StringIO
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from blog import benchmarks
+
+
+class BenchmarksTestCase(SimpleTestCase):
+
+    def test_every_case_has_baseline(self):
+        self.assertEqual(sorted(benchmarks.load_baseline()), sorted(benchmarks.cases))
+
+    def test_cases_run(self):
+        results = benchmarks.run(['index_get_groups', 'get_datetime_tag', 'square_image'], rounds=1)
+        for result in results.values():
+            self.assertGreater(result['seconds'], 0)
+
+    def test_compare(self):
+        results = {'fast': {'relative': 1.1}, 'slow': {'relative': 1.5}, 'new': {'relative': 9}}
+        self.assertEqual(benchmarks.compare(results, {'fast': 1, 'slow': 1}, 25), [('slow', 50.0)])
+
+    def test_compare_scales_max_slowdown_by_tolerance(self):
+        results = {'get_datetime_tag': {'relative': 1.8}, 'square_image': {'relative': 1.8}}
+        baseline = {'get_datetime_tag': 1, 'square_image': 1}
+        self.assertEqual(benchmarks.compare(results, baseline, 50), [('square_image', 80.0)])
+
+    def test_rounds_of_seeded_cases_do_the_same_work(self):
+        fun = benchmarks.cases['index_append_to_groups'][0]()
+        rounds = []
+        for _ in range(2):
+            fun.before_round()
+            rounds.append([fun() for _ in range(10)])
+        self.assertEqual(rounds[0], rounds[1])
+
+    def test_command_fails_on_regression(self):
+        with mock.patch.object(benchmarks, 'load_baseline', return_value={'get_datetime_tag': 1e-9}):
+            with self.assertRaises(CommandError):
+                call_command('benchmark_functions', 'get_datetime_tag', rounds=1, stdout=StringIO())
+
+    def test_command_passes_within_tolerance(self):
+        with mock.patch.object(benchmarks, 'load_baseline', return_value={'get_datetime_tag': 1e9}):
+            out = StringIO()
+            call_command('benchmark_functions', 'get_datetime_tag', rounds=1, stdout=out)
+        self.assertIn('No regressions', out.getvalue())
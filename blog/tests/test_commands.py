@@ -0,0 +1,133 @@
+import os
+import json
+import tempfile
+import datetime
+from io import StringIO
+from PIL import Image
+
+from django.test import TestCase
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.tests.test_models import create_writer, create_article, create_tag
+from blog.models import Upload
+
+
+class ReprocessImagesCommandTestCase(TestCase):
+
+    def setUp(self):
+        self.writer = create_writer('test_writer', 0)
+        self.tag = create_tag('test_tag')
+        self.articles = []
+        for i in range(3):
+            article = create_article(self.writer, 'test_article' + str(i), 'test_article text', tag=self.tag)
+            with open(os.path.join(settings.MEDIA_ROOT, r'test/images/test' + str(i) + '.jpg'), 'rb') as file:
+                image = SimpleUploadedFile('test' + str(i) + '.jpg', file.read(), content_type='image/jpg')
+            article.upload_image(image)
+            self.articles.append(article)
+
+        self.checkpoint_dir = tempfile.TemporaryDirectory()
+        self.checkpoint = os.path.join(self.checkpoint_dir.name, 'checkpoint')
+
+    def tearDown(self):
+        self.checkpoint_dir.cleanup()
+        for name in default_storage.listdir('articles/images')[1]:
+            if name.startswith('test_writer_test_article'):
+                default_storage.delete('articles/images/' + name)
+
+    def call(self, **options):
+        stdout = StringIO()
+        call_command('reprocess_images', workers=2, batch_size=2, checkpoint=self.checkpoint, stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_reprocesses_all_images(self):
+        output = self.call()
+        self.assertIn('Done: 3 images, 0 failed', output)
+        self.assertIn('images/s', output)
+        for article in self.articles:
+            image = Image.open(article.image.path)
+            self.assertTrue(image.width <= 1500 and image.height <= 1500)
+
+    def test_removes_checkpoint_when_done(self):
+        self.call()
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resumes_from_checkpoint(self):
+        with open(self.checkpoint, 'w') as file:
+            json.dump({'article': self.articles[1].pk}, file)
+        output = self.call()
+        self.assertIn('Resuming', output)
+        self.assertIn('Done: 1 images, 0 failed', output)
+
+    def test_restart_ignores_checkpoint(self):
+        with open(self.checkpoint, 'w') as file:
+            json.dump({'article': self.articles[2].pk}, file)
+        output = self.call(restart=True)
+        self.assertIn('Done: 3 images, 0 failed', output)
+
+
+class CollectOrphanedMediaCommandTestCase(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.override = self.settings(MEDIA_ROOT=self.media_root.name)
+        self.override.enable()
+
+        self.writer = create_writer('test_writer', 0)
+        self.article = create_article(self.writer, 'test_article', 'text', image='articles/images/referenced.jpg')
+        for name in ['articles/images/referenced.jpg', 'articles/images/orphan.jpg',
+                     'writers/images/default.jpg', 'writers/images/nested/orphan.jpg']:
+            self.create_file(name)
+
+    def tearDown(self):
+        self.override.disable()
+        self.media_root.cleanup()
+
+    def create_file(self, name):
+        path = os.path.join(self.media_root.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(b'image')
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.media_root.name, name))
+
+    def call(self, **options):
+        stdout = StringIO()
+        call_command('collect_orphaned_media', batch_size=2, stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_deletes_only_unreferenced_files(self):
+        output = self.call(min_age=0)
+        self.assertIn('Deleted 2 of 4 files', output)
+        self.assertTrue(self.exists('articles/images/referenced.jpg'))
+        self.assertTrue(self.exists('writers/images/default.jpg'))
+        self.assertFalse(self.exists('articles/images/orphan.jpg'))
+        self.assertFalse(self.exists('writers/images/nested/orphan.jpg'))
+
+    def test_dry_run_keeps_files(self):
+        output = self.call(min_age=0, dry_run=True)
+        self.assertIn('articles/images/orphan.jpg', output)
+        self.assertIn('Would delete 2 of 4 files', output)
+        self.assertTrue(self.exists('articles/images/orphan.jpg'))
+
+    def test_keeps_recent_files(self):
+        output = self.call()
+        self.assertIn('Deleted 0 of 0 files', output)
+        self.assertTrue(self.exists('articles/images/orphan.jpg'))
+
+    def test_deletes_stale_uploads(self):
+        upload = Upload.objects.create(
+            owner=self.writer, filename='test.jpg', size=10, created=timezone.now() - datetime.timedelta(days=2)
+        )
+        self.create_file('uploads/staging/' + str(upload.id))
+        self.create_file('uploads/staging/unknown')
+
+        output = self.call(min_age=0)
+        self.assertIn('Deleted 2 staged uploads', output)
+        self.assertFalse(Upload.objects.filter(pk=upload.pk).exists())
+        self.assertFalse(self.exists('uploads/staging/' + str(upload.id)))
+        self.assertFalse(self.exists('uploads/staging/unknown'))
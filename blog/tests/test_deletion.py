@@ -0,0 +1,113 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.db.models import Count
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import deletion
+from blog.models import Article, Writer, Comment, Report, Upload, WriterStats, WriterLeaderboard, TagLeaderboard
+from blog.models import ArticleRevision
+from blog.tests.test_models import create_writer, create_article, create_tag, create_user
+from blog.tests.test_stats import create_comment
+
+
+class DeletionTestCase(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.override = self.settings(MEDIA_ROOT=self.media_root.name)
+        self.override.enable()
+
+        self.tag = create_tag('test_tag')
+        self.writer = create_writer('test_writer', 0)
+        self.other_writer = create_writer('test_other_writer', 0)
+        self.article = create_article(self.writer, 'test_article', 'test_text', tag=self.tag,
+                                      image='articles/images/test_article.jpg')
+        self.other_article = create_article(self.writer, 'test_other_article', 'test_text', tag=self.tag)
+        self.foreign_article = create_article(self.other_writer, 'test_foreign_article', 'test_text', tag=self.tag)
+        for i in range(3):
+            create_comment(self.article, self.other_writer, 'test_comment_{}'.format(i))
+        create_comment(self.other_article, self.other_writer)
+        create_comment(self.foreign_article, self.writer)
+        Report.objects.create(reporter=self.other_writer, article=self.article)
+        Report.objects.create(reporter=self.writer, article=self.foreign_article)
+        self.create_file('articles/images/test_article.jpg')
+
+    def tearDown(self):
+        self.override.disable()
+        self.media_root.cleanup()
+
+    def create_file(self, name):
+        path = os.path.join(self.media_root.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(b'image')
+
+    def assertSummariesAreConsistent(self):
+        for writer in Writer.objects.annotate(count=Count('article')):
+            self.assertEqual(WriterStats.objects.get(pk=writer.pk).num_articles, writer.count)
+            self.assertEqual(WriterLeaderboard.objects.get(pk=writer.pk).num_articles, writer.count)
+            self.assertEqual(WriterStats.objects.get(pk=writer.pk).num_comments_received,
+                             Comment.objects.filter(article__author=writer).count())
+        self.assertEqual(TagLeaderboard.objects.get(pk=self.tag.pk).num_articles,
+                         Article.objects.filter(tag=self.tag).count())
+
+    def test_delete_articles(self):
+        deleted = deletion.delete_articles(Article.objects.filter(pk=self.article.pk))
+        self.assertEqual(deleted, 1)
+        self.assertFalse(Comment.objects.filter(text__startswith='test_comment_').exists())
+        self.assertEqual(Report.objects.count(), 1)
+        self.assertEqual(Article.objects.count(), 2)
+        self.assertSummariesAreConsistent()
+
+    def test_last_activity_is_recomputed(self):
+        deletion.delete_articles(Article.objects.filter(author=self.writer))
+        latest = Comment.objects.filter(author=self.writer).latest('comment_date').comment_date
+        self.assertEqual(WriterStats.objects.get(pk=self.writer.pk).last_activity, latest)
+        self.assertIsNone(WriterLeaderboard.objects.get(pk=self.writer.pk).last_activity)
+
+    def test_delete_writers(self):
+        Upload.objects.create(owner=self.writer, filename='test.jpg', size=1, created=timezone.now())
+        deleted = deletion.delete_writers(Writer.objects.filter(pk=self.writer.pk))
+        self.assertEqual(deleted, 1)
+        self.assertEqual(list(Article.objects.all()), [self.foreign_article])
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertEqual(Report.objects.count(), 0)
+        self.assertEqual(Upload.objects.count(), 0)
+        self.assertFalse(WriterStats.objects.filter(pk=self.writer.pk).exists())
+        self.assertSummariesAreConsistent()
+
+    def test_delete_is_a_constant_number_of_queries(self):
+        for i in range(20):
+            create_comment(self.other_article, self.other_writer, 'test_more_{}'.format(i))
+        with self.assertNumQueries(15):
+            deletion.delete_articles(Article.objects.filter(author=self.writer))
+
+    def test_images_are_deleted_after_commit(self):
+        path = os.path.join(self.media_root.name, 'articles/images/test_article.jpg')
+        deletion.delete_articles(Article.objects.filter(pk=self.article.pk))
+        self.assertTrue(os.path.exists(path))
+        with mock.patch('django.db.transaction.on_commit', side_effect=lambda fun: fun()):
+            deletion.delete_writers(Writer.objects.filter(pk=self.writer.pk))
+            self.create_file('articles/images/test_other.jpg')
+            deletion.delete_files_on_commit(['articles/images/test_other.jpg', 'writers/images/default.jpg'])
+        deletion.wait_for_cleanup()
+        self.assertFalse(os.path.exists(os.path.join(self.media_root.name, 'articles/images/test_other.jpg')))
+
+    def test_every_dependent_model_is_handled(self):
+        handled = {
+            Article: {Comment, Report, ArticleRevision},
+            Writer: {Article, Comment, Report, Upload, WriterStats, WriterLeaderboard},
+        }
+        for model, related in handled.items():
+            self.assertEqual({relation.related_model for relation in model._meta.related_objects}, related, model)
+
+    def test_delete_view_uses_bulk_path(self):
+        create_user('test_writer', 'test_writer')
+        self.client.login(username='test_writer', password='test_writer')
+        with mock.patch('blog.deletion.delete_articles') as delete_articles:
+            self.client.get(reverse('blog:delete', args=(self.article.name,)))
+        self.assertEqual(list(delete_articles.call_args[0][0]), [self.article])
@@ -0,0 +1,105 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from blog import deletion, feeds
+from blog.models import Article
+from blog.tests.test_models import create_writer, create_article, create_tag
+
+
+class FeedTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.tag = create_tag('test_tag')
+        self.other_tag = create_tag('test_other_tag')
+        self.writer = create_writer('test_writer', 0)
+        self.other_writer = create_writer('test_other_writer', 0)
+        self.article = create_article(self.writer, 'test_article', 'test text ' * 100, tag=self.tag)
+        create_article(self.other_writer, 'test_other_article', 'test text', tag=self.other_tag)
+
+    def get_etags(self):
+        urls = {
+            'site': reverse('blog:feed', args=('rss', )),
+            'writer': reverse('blog:writer_feed', args=('rss', 'test_writer')),
+            'other_writer': reverse('blog:writer_feed', args=('rss', 'test_other_writer')),
+            'tag': reverse('blog:tag_feed', args=('rss', 'test_tag')),
+            'other_tag': reverse('blog:tag_feed', args=('rss', 'test_other_tag')),
+        }
+        return {scope: self.client.get(url)['ETag'] for scope, url in urls.items()}
+
+    def test_feeds(self):
+        response = self.client.get(reverse('blog:feed', args=('rss', )))
+        self.assertEqual(response['Content-Type'], 'application/rss+xml; charset=utf-8')
+        self.assertContains(response, 'test_other_article')
+        self.assertContains(response, 'http://testserver/test_writer/test_article/')
+        self.assertNotContains(response, 'test text ' * 60)
+
+        response = self.client.get(reverse('blog:writer_feed', args=('atom', 'test_writer')))
+        self.assertEqual(response['Content-Type'], 'application/atom+xml; charset=utf-8')
+        self.assertContains(response, 'test_article')
+        self.assertNotContains(response, 'test_other_article')
+
+        response = self.client.get(reverse('blog:tag_feed', args=('rss', 'test_other_tag')))
+        self.assertContains(response, 'test_other_article')
+        self.assertNotContains(response, '/test_writer/test_article/')
+
+    def test_unknown_feeds_are_404(self):
+        self.assertEqual(self.client.get(reverse('blog:feed', args=('json', ))).status_code, 404)
+        self.assertEqual(self.client.get(reverse('blog:writer_feed', args=('rss', 'nobody'))).status_code, 404)
+        self.assertEqual(self.client.get(reverse('blog:tag_feed', args=('rss', 'no_tag'))).status_code, 404)
+
+    def test_conditional_get_and_cached_feed_do_not_query(self):
+        url = reverse('blog:feed', args=('atom', ))
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            not_modified_since = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+            cached = self.client.get(url)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified_since.status_code, 304)
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+        self.assertEqual(cached.content, response.content)
+
+    def test_versions_expire(self):
+        # a process that did not see a change through its own cache regenerates the feed after FEED_MAX_AGE
+        url = reverse('blog:feed', args=('rss', ))
+        etag = self.client.get(url)['ETag']
+        with mock.patch('time.time', return_value=time.time() + settings.FEED_MAX_AGE + 1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_feeds_are_rendered_from_primary(self):
+        feed = feeds.Feed('rss', 'site', 'Blog BN', '/', '/feeds/rss/', {})
+        with mock.patch('blog.routers.ReplicaRouter.db_for_read', return_value='replica'):
+            self.assertEqual(feed.get_articles().db, 'default')
+
+    def test_article_change_invalidates_its_feeds_only(self):
+        etags = self.get_etags()
+        article = Article.objects.get(pk=self.article.pk)
+        article.tag = self.other_tag
+        article.save()
+        changed = self.get_etags()
+        self.assertEqual({scope for scope in etags if etags[scope] != changed[scope]},
+                         {'site', 'writer', 'tag', 'other_tag'})
+        response = self.client.get(reverse('blog:tag_feed', args=('rss', 'test_tag')))
+        self.assertNotContains(response, 'test_article')
+
+    def test_bulk_delete_invalidates_feeds(self):
+        etags = self.get_etags()
+        deletion.delete_articles(Article.objects.filter(pk=self.article.pk))
+        changed = self.get_etags()
+        self.assertEqual({scope for scope in etags if etags[scope] != changed[scope]}, {'site', 'writer', 'tag'})
+        self.assertNotContains(self.client.get(reverse('blog:feed', args=('rss', ))), 'test_article')
+
+    def test_writer_change_invalidates_all_feeds(self):
+        etags = self.get_etags()
+        self.other_writer.bio = 'test bio'
+        self.other_writer.save()
+        changed = self.get_etags()
+        self.assertTrue(all(etags[scope] != changed[scope] for scope in etags))
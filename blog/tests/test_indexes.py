@@ -0,0 +1,72 @@
+from django.test import TestCase
+from django.db import connection
+
+from blog.models import Writer, Article, Tag, Report, Comment
+from blog.tests.test_models import create_writer, create_article, create_tag
+
+
+def explain(queryset):
+    """Query plan of queryset as text, EXPLAIN on Postgres and EXPLAIN QUERY PLAN on SQLite"""
+    return explain_sql(*queryset.query.sql_with_params())
+
+
+def explain_sql(sql: str, params):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # tables in tests are tiny, without this planner prefers sequential scans anyway
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('EXPLAIN ' + sql, params)
+        else:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+
+
+class HotQueryIndexTestCase(TestCase):
+
+    def setUp(self):
+        self.writer = create_writer('test_writer', 0)
+        self.tag = create_tag('test_tag')
+        self.article = create_article(self.writer, 'test_article', 'test_article text', tag=self.tag)
+
+    def assertUsesIndex(self, queryset):
+        plan = explain(queryset)
+        if connection.vendor == 'postgresql':
+            self.assertIn('Index', plan)
+            self.assertNotIn('Seq Scan', plan)
+        else:
+            self.assertRegex(plan, 'USING (COVERING )?INDEX|USING INTEGER PRIMARY KEY')
+            self.assertNotRegex(plan, r'SCAN (TABLE )?blog_\w+$')
+        return plan
+
+    def assertNotSorted(self, plan):
+        if connection.vendor == 'postgresql':
+            self.assertNotIn('Sort', plan)
+        else:
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_writer_by_name(self):
+        self.assertUsesIndex(Writer.objects.filter(name='test_writer'))
+
+    def test_article_by_author_and_name(self):
+        self.assertUsesIndex(Article.objects.filter(author=self.writer, name='test_article'))
+
+    def test_tag_by_name(self):
+        self.assertUsesIndex(Tag.objects.filter(name='test_tag'))
+
+    def test_report_by_reporter_and_article(self):
+        self.assertUsesIndex(Report.objects.filter(reporter=self.writer, article=self.article))
+
+    def test_comments_of_article_by_date(self):
+        plan = self.assertUsesIndex(Comment.objects.filter(article=self.article).order_by('-comment_date'))
+        self.assertNotSorted(plan)
+
+    def test_articles_of_writer_by_pub_date(self):
+        plan = self.assertUsesIndex(self.writer.article_set.order_by('-pub_date'))
+        self.assertNotSorted(plan)
+
+    def test_articles_of_tag_by_pub_date(self):
+        plan = self.assertUsesIndex(self.tag.article_set.order_by('-pub_date'))
+        self.assertNotSorted(plan)
+
+    def test_latest_articles(self):
+        self.assertNotSorted(explain(Article.objects.order_by('-last_edit')))
@@ -0,0 +1,83 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.core.management import call_command
+
+from blog.models import Article, WriterLeaderboard, TagLeaderboard
+from blog.leaderboards import rebuild_all
+from blog.tests.test_models import create_writer, create_article, create_tag
+
+
+class LeaderboardTestCase(TestCase):
+
+    def setUp(self):
+        self.writer = create_writer('test_writer', 0)
+        self.other_writer = create_writer('test_other_writer', 0)
+        self.tag = create_tag('test_tag')
+        self.other_tag = create_tag('test_other_tag')
+
+    def get_entry(self, instance):
+        return type(instance).objects.get(pk=instance.pk).leaderboard
+
+    def test_entries_are_created_with_writers_and_tags(self):
+        self.assertEqual(self.get_entry(self.writer).num_articles, 0)
+        self.assertEqual(self.get_entry(self.tag).num_articles, 0)
+
+    def test_article_create_increments_counts(self):
+        article = create_article(self.writer, 'test_article', 'test_text', tag=self.tag)
+        self.assertEqual(self.get_entry(self.writer).num_articles, 1)
+        self.assertEqual(self.get_entry(self.writer).last_activity, article.last_edit)
+        self.assertEqual(self.get_entry(self.tag).num_articles, 1)
+        self.assertEqual(self.get_entry(self.other_writer).num_articles, 0)
+
+    def test_article_delete_decrements_counts(self):
+        first = create_article(self.writer, 'test_article_1', 'test_text', tag=self.tag)
+        create_article(self.writer, 'test_article_2', 'test_text', tag=self.tag).delete()
+        self.assertEqual(self.get_entry(self.writer).num_articles, 1)
+        self.assertEqual(self.get_entry(self.writer).last_activity, first.last_edit)
+        first.delete()
+        self.assertEqual(self.get_entry(self.tag).num_articles, 0)
+        self.assertIsNone(self.get_entry(self.tag).last_activity)
+
+    def test_tag_change_moves_article(self):
+        create_article(self.writer, 'test_article', 'test_text', tag=self.tag)
+        article = Article.objects.get(name='test_article')
+        article.tag = self.other_tag
+        article.save()
+        self.assertEqual(self.get_entry(self.tag).num_articles, 0)
+        self.assertEqual(self.get_entry(self.other_tag).num_articles, 1)
+
+    def test_rebuild_repairs_counts_and_ranks(self):
+        create_article(self.writer, 'test_article_1', 'test_text', tag=self.tag)
+        create_article(self.writer, 'test_article_2', 'test_text', tag=self.tag)
+        WriterLeaderboard.objects.update(num_articles=100)
+        TagLeaderboard.objects.all().delete()
+        rebuild_all()
+        self.assertEqual(self.get_entry(self.writer).num_articles, 2)
+        self.assertEqual(self.get_entry(self.writer).rank, 1)
+        self.assertEqual(self.get_entry(self.other_writer).rank, 2)
+        self.assertEqual(self.get_entry(self.tag).rank, 1)
+        self.assertEqual(self.get_entry(self.other_tag).num_articles, 0)
+
+    def test_equal_counts_share_rank(self):
+        rebuild_all()
+        self.assertEqual(self.get_entry(self.writer).rank, 1)
+        self.assertEqual(self.get_entry(self.other_writer).rank, 1)
+
+    def test_refresh_command(self):
+        WriterLeaderboard.objects.all().delete()
+        call_command('refresh_leaderboards', stdout=open('/dev/null', 'w'))
+        self.assertEqual(WriterLeaderboard.objects.count(), 2)
+
+    def test_pages_are_ordered_by_leaderboard(self):
+        create_article(self.other_writer, 'test_article', 'test_text', tag=self.other_tag)
+        response = self.client.get(reverse('blog:authors'))
+        self.assertEqual([w.name for w in response.context['writers']], ['test_other_writer', 'test_writer'])
+        self.assertEqual(response.context['writers'][0].num_articles, 1)
+        response = self.client.get(reverse('blog:tags'))
+        self.assertEqual([t.name for t in response.context['top_tags']], ['test_other_tag', 'test_tag'])
+
+    def test_pages_are_a_single_query(self):
+        with self.assertNumQueries(1):
+            self.client.get(reverse('blog:authors'))
+        with self.assertNumQueries(1):
+            self.client.get(reverse('blog:tags'))
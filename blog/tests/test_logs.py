@@ -0,0 +1,114 @@
+import os
+import json
+import queue
+import logging
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, SimpleTestCase
+from django.urls import reverse
+
+from blog.logs import BoundedQueueHandler, JsonFormatter, queue_handler, set_request_context, reset_request_context
+
+
+class QueueHandlerTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger('test_blog_logs')
+        self.logger.propagate = False
+        self.addCleanup(setattr, self.logger, 'handlers', [])
+
+    def test_full_queue_drops_records(self):
+        handler = BoundedQueueHandler(queue.Queue(2))
+        self.logger.addHandler(handler)
+        for i in range(5):
+            self.logger.error('record %d', i)
+        self.assertEqual(handler.queue.qsize(), 2)
+        self.assertEqual(handler.dropped, 3)
+
+    def test_record_has_request_context(self):
+        handler = BoundedQueueHandler(queue.Queue())
+        self.logger.addHandler(handler)
+        token = set_request_context(view='blog:index', request_id='abc')
+        try:
+            self.logger.error('in %s', 'view')
+        finally:
+            reset_request_context(token)
+        self.logger.error('outside')
+
+        inside, outside = handler.queue.get(), handler.queue.get()
+        self.assertEqual((inside.view, inside.request_id, inside.msg), ('blog:index', 'abc', 'in view'))
+        self.assertFalse(hasattr(outside, 'request_id'))
+
+    def get_file_handler(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'test.log')
+        handler = queue_handler(path, queue_size=100)
+        self.addCleanup(handler.stop_listener)
+        self.logger.addHandler(handler)
+        return handler, path
+
+    def read_lines(self, path: str):
+        with open(path) as file:
+            return [json.loads(line) for line in file]
+
+    def test_json_lines_are_written_by_listener(self):
+        handler, path = self.get_file_handler()
+        try:
+            raise ValueError('test error')
+        except ValueError:
+            self.logger.exception('failed')
+        handler.queue.join()
+
+        line = self.read_lines(path)[0]
+        self.assertEqual((line['level'], line['message']), ('ERROR', 'failed'))
+        self.assertIn('ValueError: test error', line['exception'])
+
+    def test_listener_is_started_by_first_record_of_every_process(self):
+        handler, path = self.get_file_handler()
+        self.assertIsNone(handler.listener)
+        self.logger.error('parent')
+        handler.queue.join()
+        parent_listener = handler.listener
+
+        with mock.patch('os.getpid', return_value=os.getpid() + 1):
+            self.logger.error('forked')
+            handler.queue.join()
+            self.assertIsNot(handler.listener, parent_listener)
+            handler.stop_listener()
+        parent_listener.stop()
+        self.assertEqual([line['message'] for line in self.read_lines(path)], ['parent', 'forked'])
+
+    def test_formatter_includes_context_fields(self):
+        record = logging.makeLogRecord({'msg': 'message', 'view': 'blog:tags', 'metrics': {'queries': 1}})
+        data = json.loads(JsonFormatter().format(record))
+        self.assertEqual(data['view'], 'blog:tags')
+        self.assertEqual(data['metrics'], {'queries': 1})
+        self.assertNotIn('request_id', data)
+
+
+class RequestContextMiddlewareTestCase(TestCase):
+
+    def test_request_id_is_generated(self):
+        response = self.client.get(reverse('blog:authors'))
+        self.assertRegex(response['X-Request-ID'], r'^[0-9a-f]{32}$')
+
+    def test_incoming_request_id_is_kept(self):
+        response = self.client.get(reverse('blog:authors'), HTTP_X_REQUEST_ID='upstream-1.2')
+        self.assertEqual(response['X-Request-ID'], 'upstream-1.2')
+
+    def test_invalid_request_id_is_replaced(self):
+        response = self.client.get(reverse('blog:authors'), HTTP_X_REQUEST_ID='bad id\n')
+        self.assertNotEqual(response['X-Request-ID'], 'bad id\n')
+
+    def test_request_log_has_view_and_request_id(self):
+        handler = BoundedQueueHandler(queue.Queue())
+        logger = logging.getLogger('blog_request_logger')
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+
+        response = self.client.get(reverse('blog:tags'))
+        record = handler.queue.get_nowait()
+        self.assertEqual(record.view, 'blog:tags')
+        self.assertEqual(record.request_id, response['X-Request-ID'])
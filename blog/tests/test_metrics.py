@@ -0,0 +1,91 @@
+import os
+import json
+import shutil
+import tempfile
+
+from django.test import TestCase, SimpleTestCase, override_settings
+from django.urls import reverse
+
+from blog.metrics import Registry
+from blog.tests.test_models import create_user
+
+
+class RegistryTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.registry = Registry()
+        self.counter = self.registry.counter('test_total', 'Test counter', ('view',))
+        self.histogram = self.registry.histogram('test_seconds', 'Test histogram', ('view',), buckets=(0.1, 1))
+
+    def test_counter(self):
+        self.counter.inc(view='index')
+        self.counter.inc(2, view='index')
+        self.counter.inc(view='tags')
+        text = self.registry.render()
+        self.assertIn('# TYPE test_total counter', text)
+        self.assertIn('test_total{view="index"} 3', text)
+        self.assertIn('test_total{view="tags"} 1', text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        for value in (0.05, 0.5, 0.5, 5):
+            self.histogram.observe(value, view='index')
+        text = self.registry.render()
+        self.assertIn('test_seconds_bucket{view="index",le="0.1"} 1', text)
+        self.assertIn('test_seconds_bucket{view="index",le="1"} 3', text)
+        self.assertIn('test_seconds_bucket{view="index",le="+Inf"} 4', text)
+        self.assertIn('test_seconds_sum{view="index"} 6.05', text)
+        self.assertIn('test_seconds_count{view="index"} 4', text)
+
+    def test_label_values_are_escaped(self):
+        self.counter.inc(view='a"b')
+        self.assertIn('test_total{view="a\\"b"} 1', self.registry.render())
+
+    def test_multiprocess_values_are_summed(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(os.path.join(directory, '1.json'), 'w') as file:
+            json.dump({
+                'test_total': [[['index'], 5]],
+                'test_seconds': [[['index'], [1, 0, 0, 0.05]]],
+            }, file)
+
+        with self.settings(METRICS_MULTIPROCESS_DIR=directory, METRICS_FLUSH_INTERVAL=0):
+            self.counter.inc(view='index')
+            self.histogram.observe(0.5, view='index')
+            text = self.registry.render()
+        self.assertIn('test_total{view="index"} 6', text)
+        self.assertIn('test_seconds_count{view="index"} 2', text)
+        self.assertIn('{}.json'.format(os.getpid()), os.listdir(directory))
+
+
+class MetricsViewTestCase(TestCase):
+
+    def test_unauthorized(self):
+        response = self.client.get(reverse('blog:metrics'))
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_wrong_token(self):
+        response = self.client.get(reverse('blog:metrics'), HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_views_are_instrumented(self):
+        self.client.get(reverse('blog:authors'))
+        self.client.get(reverse('blog:writer', args=('test_unexisting',)))
+        response = self.client.get(reverse('blog:metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+        self.assertIn('blog_requests_total{view="authors",status="200"}', text)
+        self.assertIn('blog_requests_total{view="writer",status="404"}', text)
+        self.assertIn('blog_request_duration_seconds_bucket{view="authors",le="+Inf"}', text)
+
+    def test_superuser(self):
+        user = create_user('test_admin', 'test_admin')
+        user.is_superuser = True
+        user.save()
+        self.client.login(username='test_admin', password='test_admin')
+        response = self.client.get(reverse('blog:metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('blog_cache_requests_total{cache="auth_user"', response.content.decode())
@@ -0,0 +1,46 @@
+from django.test import TestCase, RequestFactory
+from django.contrib.auth.models import AnonymousUser
+from django.urls import reverse
+
+from blog.models import Writer
+from blog.middleware import CurrentWriterMiddleware
+from blog.tests.test_models import create_writer, create_user
+
+
+class CurrentWriterMiddlewareTestCase(TestCase):
+
+    def setUp(self):
+        self.middleware = CurrentWriterMiddleware(lambda request: request)
+        self.user = create_user('test_writer', 'test_writer')
+        self.writer = create_writer('test_writer', 0)
+
+    def get_request(self, user):
+        request = RequestFactory().get('/')
+        request.user = user
+        return self.middleware(request)
+
+    def test_anonymous_user_has_no_writer(self):
+        request = self.get_request(AnonymousUser())
+        with self.assertNumQueries(0):
+            self.assertFalse(request.writer)
+
+    def test_writer_is_resolved_once(self):
+        Writer.objects.filter(pk=self.writer.pk).update(user=self.user)
+        request = self.get_request(self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(request.writer.pk, self.writer.pk)
+            self.assertEqual(request.writer.name, 'test_writer')
+
+    def test_writer_is_not_resolved_if_unused(self):
+        with self.assertNumQueries(0):
+            self.get_request(self.user)
+
+    def test_unlinked_writer_is_linked_by_name(self):
+        request = self.get_request(self.user)
+        self.assertEqual(request.writer.pk, self.writer.pk)
+        self.assertEqual(Writer.objects.get(pk=self.writer.pk).user, self.user)
+
+    def test_sign_up_links_user_and_writer(self):
+        self.client.post(reverse('blog:sign_up'), {'username': 'new_writer', 'password': 'password'})
+        writer = Writer.objects.get(name='new_writer')
+        self.assertEqual(writer.user.username, 'new_writer')
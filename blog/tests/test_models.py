@@ -1,4 +1,5 @@
 import os
+import tempfile
 from PIL import Image
 
 from django.test import TestCase
@@ -9,6 +10,7 @@ from django.utils import timezone
 from django.core.files.uploadedfile import SimpleUploadedFile
 
 from blog.models import Writer, Tag
+from blog import model_logic
 
 
 def create_writer(name, age, image=None, bio=None):
@@ -82,6 +84,16 @@ class ArticleModelTestCase(TestCase):
         self.article.delete_image()
         self.assertIs(default_storage.listdir('articles/images')[1].count('test_writer_test_article.jpg'), 0)
         self.assertIs(self.article.image.name, None)
+        self.assertIs(self.article.image_placeholder, None)
+
+    def test_upload_image_sets_placeholder_and_size(self):
+        with open(settings.MEDIA_ROOT + r'/test/images/test0.jpg', 'rb') as file:
+            image = SimpleUploadedFile('test0.jpg', file.read(), content_type='image/jpg')
+        self.article.upload_image(image)
+        image = Image.open(self.article.image.path)
+        self.assertEqual((self.article.image_width, self.article.image_height), image.size)
+        self.assertTrue(self.article.image_placeholder.startswith('data:image/jpeg;base64,'))
+        self.assertTrue(len(self.article.image_placeholder) < 2000)
 
 
 class WriterModelTestCase(TestCase):
@@ -114,3 +126,40 @@ class WriterModelTestCase(TestCase):
         self.writer.delete_image()
         self.assertIs(default_storage.listdir('writers/images')[1].count('test_writer_image.jpg'), 0)
         self.assertIs(self.writer.image.name, None)
+        self.assertIs(self.writer.image_width, None)
+
+    def test_upload_image_sets_placeholder_and_size(self):
+        self.assertEqual(self.writer.image_width, self.writer.image_height)
+        self.assertTrue(self.writer.image_placeholder.startswith('data:image/jpeg;base64,'))
+
+
+class EncodeImageTestCase(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'image.jpg')
+        with Image.open(os.path.join(settings.MEDIA_ROOT, r'test/images/test1.jpg')) as image:
+            exif = Image.Exif()
+            exif[0x010e] = 'description'
+            image.save(self.path, exif=exif)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_strips_metadata_and_writes_progressive(self):
+        model_logic.resize_image(self.path).close()
+        with Image.open(self.path) as image:
+            self.assertNotIn('exif', image.info)
+            self.assertTrue(image.info.get('progressive'))
+        self.assertEqual(os.listdir(self.tmp_dir.name), ['image.jpg'])
+
+    def test_fits_byte_budget(self):
+        max_bytes = 250 * 1024
+        model_logic.resize_image(self.path, max_bytes=max_bytes).close()
+        self.assertTrue(os.path.getsize(self.path) <= max_bytes)
+
+    def test_lowers_quality_to_perceptual_target(self):
+        model_logic.resize_image(self.path).close()
+        size = os.path.getsize(self.path)
+        model_logic.resize_image(self.path, min_psnr=30).close()
+        self.assertTrue(os.path.getsize(self.path) < size)
@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.test import TestCase, override_settings
+from django.core.management import call_command
+from django.urls import reverse
+
+from blog.middleware import get_profiling_token
+
+
+class ProfilingTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings_override = self.settings(PROFILING_DIR=self.directory, PROFILING_SAMPLE_RATE=0)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.directory)
+
+    def get_dumps(self):
+        return sorted(os.listdir(self.directory))
+
+    def test_requests_are_not_profiled_by_default(self):
+        self.client.get(reverse('blog:authors'))
+        self.assertEqual(self.get_dumps(), [])
+
+    def test_signed_header_profiles_request(self):
+        self.client.get(reverse('blog:authors'), HTTP_X_PROFILE=get_profiling_token())
+        dumps = self.get_dumps()
+        self.assertEqual(len(dumps), 1)
+        self.assertTrue(dumps[0].startswith('blog-authors.'))
+
+    def test_invalid_header_is_ignored(self):
+        self.client.get(reverse('blog:authors'), HTTP_X_PROFILE='forged')
+        self.assertEqual(self.get_dumps(), [])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_MAX_DUMPS=2)
+    def test_sampling_and_rotation(self):
+        for _ in range(4):
+            self.client.get(reverse('blog:tags'))
+        self.assertEqual(len(self.get_dumps()), 2)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_report(self):
+        self.client.get(reverse('blog:authors'))
+        self.client.get(reverse('blog:authors'))
+        self.client.get(reverse('blog:tags'))
+        out = StringIO()
+        call_command('profile_report', top=5, stdout=out)
+        self.assertIn('blog:authors: 2 profiled requests', out.getvalue())
+        self.assertIn('blog:tags: 1 profiled requests', out.getvalue())
+        self.assertIn('function calls', out.getvalue())
@@ -0,0 +1,98 @@
+import re
+
+from django.test import TestCase
+from django.db import connection
+from django.urls import reverse
+
+from blog.models import Article, Tag, Report, WriterLeaderboard
+from blog.seed import seed, password
+from blog.tests.test_indexes import explain_sql
+
+
+class SelectCollector:
+    """execute_wrapper keeping distinct SELECTs on blog tables with their params"""
+    def __init__(self):
+        self.queries = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.startswith('SELECT') and '"blog_' in sql:
+            self.queries.setdefault(sql, params)
+        return execute(sql, params, many, context)
+
+
+class QueryPlanTestCase(TestCase):
+    """
+    Plans of every query of the hot pages on a seeded dataset:
+    no sequential scan of a blog table and no temporary sort where an index was expected
+    """
+    allowed = {
+        # whole tag table is loaded once per process by TagRegistry
+        r'FROM "blog_tag" ORDER BY "blog_tag"."id" ASC$': 'scan',
+        # ordering by an aggregate of at most 30 latest articles cannot come from an index
+        r'ORDER BY "num_comments" DESC$': 'sort',
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(writers=30, tags=8, articles=400, comments=3000, reports=50)
+        cls.writer = WriterLeaderboard.objects.select_related('writer').order_by('-num_articles').first().writer
+        cls.article = cls.writer.article_set.order_by('-pub_date').first()
+        cls.tag = Tag.objects.order_by('pk').first()
+
+    def setUp(self):
+        self.client.login(username=self.writer.name, password=password)
+
+    def get_queries(self, url: str):
+        collector = SelectCollector()
+        with connection.execute_wrapper(collector):
+            response = self.client.get(url)
+        self.assertLess(response.status_code, 400)
+        return collector.queries
+
+    def get_problems(self, sql: str, params):
+        plan = explain_sql(sql, params)
+        if connection.vendor == 'postgresql':
+            scan = re.search(r'Seq Scan on blog_\w+', plan)
+            sort = re.search(r'^\s*(->\s*)?(Incremental )?Sort\b', plan, re.MULTILINE)
+        else:
+            scan = re.search(r'^SCAN (TABLE )?blog_\w+$', plan, re.MULTILINE)
+            sort = re.search(r'USE TEMP B-TREE FOR (ORDER BY|RIGHT PART OF ORDER BY)', plan)
+
+        allowed = {kind for pattern, kind in self.allowed.items() if re.search(pattern, sql)}
+        problems = []
+        if scan and 'scan' not in allowed:
+            problems.append(scan.group(0))
+        if sort and 'sort' not in allowed:
+            problems.append(sort.group(0).strip())
+        return problems, plan
+
+    def assertPlansUseIndexes(self, url: str):
+        queries = self.get_queries(url)
+        self.assertTrue(queries)
+        for sql, params in queries.items():
+            with self.subTest(sql=sql):
+                problems, plan = self.get_problems(sql, params)
+                self.assertEqual(problems, [], plan)
+
+    def test_detects_unindexed_query(self):
+        sql, params = Article.objects.filter(text='text').order_by('pub_date').query.sql_with_params()
+        self.assertNotEqual(self.get_problems(sql, params)[0], [])
+
+    def test_index_feed(self):
+        self.assertPlansUseIndexes(reverse('blog:index'))
+
+    def test_article_and_comments(self):
+        self.assertPlansUseIndexes(reverse('blog:article', args=(self.writer.name, self.article.name)))
+
+    def test_writer_page(self):
+        self.assertPlansUseIndexes(reverse('blog:writer', args=(self.writer.name,)))
+
+    def test_my_page(self):
+        self.assertPlansUseIndexes(reverse('blog:my_page'))
+
+    def test_tag_page(self):
+        self.assertPlansUseIndexes(reverse('blog:tag', args=(self.tag.name,)))
+
+    def test_report_check(self):
+        Report.objects.filter(reporter=self.writer, article=self.article).delete()
+        self.assertPlansUseIndexes(reverse('blog:report', args=(self.writer.name, self.article.name)))
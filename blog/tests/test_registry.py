@@ -0,0 +1,49 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.http import Http404
+
+from blog.registry import TagRegistry, tag_registry
+from blog.tests.test_models import create_tag
+
+
+class TagRegistryTestCase(TestCase):
+
+    def setUp(self):
+        self.tag = create_tag('test_tag')
+        self.registry = TagRegistry()
+
+    def test_tags_are_loaded_once(self):
+        self.assertEqual(self.registry.get('test_tag'), self.tag)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.registry.get('test_tag'), self.tag)
+            self.assertEqual(self.registry.all(), [self.tag])
+
+    def test_reloads_after_tag_is_saved(self):
+        self.registry.all()
+        tag = create_tag('test_tag_new')
+        self.assertEqual(self.registry.get('test_tag_new'), tag)
+
+    def test_reloads_after_tag_is_deleted(self):
+        self.registry.all()
+        self.tag.delete()
+        self.assertIsNone(self.registry.get('test_tag'))
+
+    def test_reloads_when_other_process_bumps_version(self):
+        self.registry.all()
+        tag_registry.bump_version()
+        with self.assertNumQueries(1):
+            self.registry.all()
+
+    def test_reloads_when_tags_expire(self):
+        self.registry.all()
+        with self.settings(TAG_REGISTRY_MAX_AGE=0), self.assertNumQueries(1):
+            self.registry.all()
+
+    def test_tags_are_loaded_from_primary(self):
+        with mock.patch('blog.routers.ReplicaRouter.db_for_read', return_value='replica'):
+            self.assertEqual(self.registry.get('test_tag'), self.tag)
+
+    def test_get_or_404(self):
+        with self.assertRaises(Http404):
+            self.registry.get_or_404('test_unexisting')
@@ -0,0 +1,52 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blog.models import Writer
+from blog.middleware import QueryCollector
+from blog.tests.test_models import create_writer, create_tag
+
+
+class RequestMetricsMiddlewareTestCase(TestCase):
+
+    def setUp(self):
+        create_writer('test_writer', 0)
+        create_tag('test_tag')
+
+    def get_metrics(self, response):
+        return dict(item.split('=', 1) for item in response['X-Request-Metrics'].split(';'))
+
+    def test_request_is_logged_with_view_name_and_queries(self):
+        with self.assertLogs('blog_request_logger', 'INFO') as logs:
+            self.client.get(reverse('blog:authors'))
+        metrics = logs.records[0].metrics
+        self.assertEqual(metrics['view'], 'blog:authors')
+        self.assertEqual(metrics['queries'], 1)
+        self.assertEqual(metrics['status'], 200)
+        self.assertIn('view=blog:authors', logs.output[0])
+
+    @override_settings(REQUEST_METRICS_SLOW_MS=0)
+    def test_slow_request_is_logged_as_warning(self):
+        with self.assertLogs('blog_request_logger', 'WARNING'):
+            self.client.get(reverse('blog:authors'))
+
+    @override_settings(DEBUG=True)
+    def test_header_in_debug(self):
+        response = self.client.get(reverse('blog:writer', args=('test_writer',)))
+        metrics = self.get_metrics(response)
+        self.assertEqual(metrics['view'], 'blog:writer')
+        self.assertGreater(int(metrics['queries']), 0)
+
+    @override_settings(DEBUG=False)
+    def test_no_header_without_debug(self):
+        response = self.client.get(reverse('blog:authors'))
+        self.assertNotIn('X-Request-Metrics', response)
+
+    def test_duplicate_queries_are_counted(self):
+        collector = QueryCollector()
+        with connection.execute_wrapper(collector):
+            list(Writer.objects.filter(name='test_writer'))
+            list(Writer.objects.filter(name='test_writer'))
+            list(Writer.objects.filter(name='test_other_writer'))
+        self.assertEqual((collector.count, collector.duplicates), (3, 1))
+        self.assertGreater(collector.time, 0)
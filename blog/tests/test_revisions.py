@@ -0,0 +1,116 @@
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+
+from blog import revisions, deletion
+from blog.models import Article, ArticleRevision
+from blog.tests.test_models import create_writer, create_article, create_tag, create_user
+
+
+class RevisionsTestCase(TestCase):
+
+    def setUp(self):
+        self.writer = create_writer('test_writer', 0)
+        self.article = create_article(self.writer, 'test_article', 'line 1\nline 2\nline 3\n')
+
+    def test_apply_changes(self):
+        self.assertEqual(revisions.apply_changes('abcdef', [[0, 1, 'X'], [3, 3, 'Y'], [5, 6, '']]), 'XbcYde')
+        for changes in ([[2, 1, '']], [[0, 2, ''], [1, 3, '']], [[0, 7, '']], [[0, 1]], [['0', 1, '']], {}):
+            with self.assertRaises(revisions.InvalidChanges, msg=changes):
+                revisions.apply_changes('abcdef', changes)
+
+    def test_get_changes(self):
+        old = 'line 1\nline 2\nline 3\n'
+        new = 'line 0\nline 1\nline 2 edited\nline 3\n'
+        changes = revisions.get_changes(old, new)
+        self.assertEqual(revisions.apply_changes(old, changes), new)
+        self.assertEqual(changes, [[0, 0, 'line 0\n'], [7, 14, 'line 2 edited\n']])
+
+    def test_first_change_keeps_original_text(self):
+        number = revisions.save_changes(self.article, 0, [[0, 6, 'LINE 1']])
+        self.assertEqual(number, 2)
+        self.assertEqual(revisions.get_text(self.article.pk, 1), 'line 1\nline 2\nline 3\n')
+        self.assertEqual(revisions.get_text(self.article.pk, 2), 'LINE 1\nline 2\nline 3\n')
+        self.assertEqual(Article.objects.get(pk=self.article.pk).text, 'line 1\nline 2\nline 3\n')
+
+    def test_every_revision_is_rebuilt_from_snapshot_and_deltas(self):
+        texts = {1: self.article.text}
+        text, number = self.article.text, 0
+        with self.settings(REVISION_SNAPSHOT_INTERVAL=5):
+            for i in range(12):
+                changes = [[len(text), len(text), 'line {}\n'.format(i + 4)]]
+                number = revisions.save_changes(self.article, number, changes)
+                text = revisions.apply_changes(text, changes)
+                texts[number] = text
+        self.assertEqual(list(ArticleRevision.objects.filter(article=self.article, is_snapshot=True)
+                              .order_by('number').values_list('number', flat=True)), [1, 6, 11])
+        for number, text in texts.items():
+            with self.assertNumQueries(2):
+                self.assertEqual(revisions.get_text(self.article.pk, number), text)
+        with self.assertRaises(ArticleRevision.DoesNotExist):
+            revisions.get_text(self.article.pk, 14)
+
+    def test_stale_base_conflicts(self):
+        revisions.save_changes(self.article, 0, [[0, 0, 'a']])
+        with self.assertRaises(revisions.Conflict) as context:
+            revisions.save_changes(self.article, 1, [[0, 0, 'b']])
+        self.assertEqual(context.exception.latest, 2)
+
+    def test_record_skips_unchanged_text(self):
+        self.assertEqual(revisions.record(self.article, self.article.text), 0)
+        self.assertEqual(revisions.record(self.article, 'new\r\ntext', self.article.text), 2)
+        self.assertEqual(revisions.record(self.article, 'new\ntext'), 2)
+        self.assertEqual(revisions.get_latest(self.article), (2, 'new\ntext'))
+
+    def test_deltas_are_smaller_than_text(self):
+        self.article.text = ''.join('line {}\n'.format(i) for i in range(10000))
+        revisions.record(self.article, self.article.text[:-1] + ' edited\n')
+        delta = ArticleRevision.objects.get(article=self.article, number=2)
+        self.assertFalse(delta.is_snapshot)
+        self.assertLess(len(delta.data), 100)
+
+    def test_revisions_are_deleted_with_article(self):
+        revisions.save_changes(self.article, 0, [[0, 0, 'a']])
+        deletion.delete_articles(Article.objects.filter(pk=self.article.pk))
+        self.assertFalse(ArticleRevision.objects.exists())
+
+
+class RevisionViewTestCase(TestCase):
+
+    def setUp(self):
+        create_user('test_writer', 'test_writer')
+        self.writer = create_writer('test_writer', 0)
+        self.article = create_article(self.writer, 'test_article', 'test text', tag=create_tag('test_tag'))
+        self.client.login(username='test_writer', password='test_writer')
+
+    def autosave(self, data):
+        return self.client.post(reverse('blog:autosave', args=('test_article', )),
+                                json.dumps(data), content_type='application/json')
+
+    def test_autosave_and_get_revision(self):
+        response = self.autosave({'base': 0, 'changes': [[5, 9, 'draft']]})
+        self.assertEqual(response.json(), {'ok': True, 'revision': 2})
+        response = self.client.get(reverse('blog:revision', args=('test_article', 2)))
+        self.assertEqual(response.json(), {'ok': True, 'revision': 2, 'text': 'test draft'})
+        response = self.client.get(reverse('blog:edit', args=('test_article', )))
+        self.assertEqual(response.context['form'].initial['text'], 'test draft')
+        self.assertEqual(response.context['revision'], 2)
+
+    def test_autosave_errors(self):
+        self.assertEqual(self.autosave({'base': 0}).status_code, 400)
+        self.assertEqual(self.autosave({'base': 0, 'changes': [[0, 100, '']]}).status_code, 400)
+        self.autosave({'base': 0, 'changes': []})
+        response = self.autosave({'base': 1, 'changes': []})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['revision'], 2)
+        self.assertEqual(self.client.get(reverse('blog:revision', args=('test_article', 5))).status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.autosave({'base': 2, 'changes': []}).status_code, 401)
+
+    def test_edit_records_revision(self):
+        self.client.post(reverse('blog:edit', args=('test_article', )), {
+            'name': 'test_article', 'text': 'test text edited', 'tag': 'test_tag',
+        })
+        self.assertEqual(revisions.get_latest(self.article), (2, 'test text edited'))
+        self.assertEqual(revisions.get_text(self.article.pk, 1), 'test text')
@@ -0,0 +1,141 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connections
+from django.test import TransactionTestCase, SimpleTestCase, RequestFactory, override_settings
+from django.urls import reverse
+
+from blog.models import Writer, WriterLeaderboard
+from blog.routers import ReplicaRouter, ReplicaLag, read_alias, read_only, get_read_alias, sticky_cookie
+from blog.tests.test_models import create_user
+
+
+class ReplicaRouterTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def test_reads_go_to_primary_without_hint(self):
+        self.assertEqual(self.router.db_for_read(Writer), 'default')
+
+    def test_hinted_reads_go_to_replica(self):
+        token = read_alias.set('replica')
+        try:
+            self.assertEqual(self.router.db_for_read(Writer), 'replica')
+            self.assertEqual(self.router.db_for_write(Writer), 'default')
+        finally:
+            read_alias.reset(token)
+
+    def test_users_are_read_from_primary(self):
+        token = read_alias.set('replica')
+        try:
+            self.assertEqual(self.router.db_for_read(User), 'default')
+        finally:
+            read_alias.reset(token)
+
+    @override_settings(REPLICA_DATABASE='replica')
+    def test_replica_is_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'blog'))
+        self.assertTrue(self.router.allow_migrate('default', 'blog'))
+
+    @override_settings(REPLICA_DATABASE='replica', REPLICA_MAX_LAG=2)
+    def test_read_alias_of_requests(self):
+        with mock.patch('blog.routers.replica_lag.get', return_value=0.5):
+            self.assertEqual(get_read_alias(self.factory.get('/')), 'replica')
+            self.assertIsNone(get_read_alias(self.factory.post('/')))
+
+    @override_settings(REPLICA_DATABASE='replica', REPLICA_MAX_LAG=2)
+    def test_lagging_or_unreachable_replica_is_not_used(self):
+        for lag in (5.0, None):
+            with mock.patch('blog.routers.replica_lag.get', return_value=lag):
+                self.assertIsNone(get_read_alias(self.factory.get('/')))
+
+    @override_settings(REPLICA_DATABASE='replica')
+    def test_sticky_request_reads_primary(self):
+        request = self.factory.get('/')
+        request.COOKIES[sticky_cookie] = '9999999999'
+        with mock.patch('blog.routers.replica_lag.get', return_value=0.0):
+            self.assertIsNone(get_read_alias(request))
+        request.COOKIES[sticky_cookie] = '1'
+        with mock.patch('blog.routers.replica_lag.get', return_value=0.0):
+            self.assertEqual(get_read_alias(request), 'replica')
+
+    def test_read_only_resets_hint(self):
+        view = read_only(lambda request: read_alias.get())
+        with override_settings(REPLICA_DATABASE='replica'), \
+                mock.patch('blog.routers.replica_lag.get', return_value=0.0):
+            self.assertEqual(view(self.factory.get('/')), 'replica')
+        self.assertIsNone(read_alias.get())
+
+    @override_settings(REPLICA_LAG_CHECK_INTERVAL=60)
+    def test_lag_is_checked_once_per_interval(self):
+        lag = ReplicaLag()
+        with mock.patch.object(lag, 'query', return_value=0.1) as query:
+            self.assertEqual(lag.get('replica'), 0.1)
+            self.assertEqual(lag.get('replica'), 0.1)
+        self.assertEqual(query.call_count, 1)
+
+    def test_lag_of_unknown_alias_is_none(self):
+        self.assertIsNone(ReplicaLag().query('missing'))
+
+
+class ReplicaRoutingTestCase(TransactionTestCase):
+    """
+    Two SQLite databases; rows created only in the replica show which database served the page.
+    Not a TestCase, its transaction would keep all reads on the primary
+    """
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        connections.databases['replica'] = {
+            **connections.databases['default'],
+            'NAME': os.path.join(cls.directory, 'replica.sqlite3'),
+            'TEST': {'NAME': os.path.join(cls.directory, 'replica.sqlite3')},
+        }
+        call_command('migrate', database='replica', verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections.databases['replica']
+        del connections._connections.replica
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        create_user('test_user', 'test_user')
+        self.client.login(username='test_user', password='test_user')
+        Writer.objects.using('replica').bulk_create([Writer(name='replica_writer')])
+        writer = Writer.objects.using('replica').get(name='replica_writer')
+        WriterLeaderboard.objects.using('replica').bulk_create([WriterLeaderboard(writer=writer)])
+
+    def get_authors(self):
+        with mock.patch('blog.routers.replica_lag.get', return_value=0.0):
+            return self.client.get(reverse('blog:authors'))
+
+    def test_without_replica_primary_is_read(self):
+        self.assertNotContains(self.get_authors(), 'replica_writer')
+
+    @override_settings(REPLICA_DATABASE='replica')
+    def test_read_only_view_reads_replica(self):
+        self.assertContains(self.get_authors(), 'replica_writer')
+
+    @override_settings(REPLICA_DATABASE='replica')
+    def test_post_pins_reads_to_primary(self):
+        response = self.client.post(reverse('blog:search'), {'q': 'x'})
+        self.assertIn(sticky_cookie, response.cookies)
+        self.assertNotContains(self.get_authors(), 'replica_writer')
+
+    @override_settings(REPLICA_DATABASE='replica')
+    def test_lagging_replica_falls_back_to_primary(self):
+        with mock.patch('blog.routers.replica_lag.get', return_value=60.0):
+            response = self.client.get(reverse('blog:authors'))
+        self.assertNotContains(response, 'replica_writer')
@@ -0,0 +1,61 @@
+from io import StringIO
+
+from django.test import TestCase, SimpleTestCase
+from django.core.management import call_command
+from django.db.models import Count
+from django.contrib.auth.models import User
+
+from blog.models import Article, Writer, Tag, Comment, Report, WriterLeaderboard, WriterStats
+from blog.seed import seed
+from blog.management.commands.benchmark_routes import get_percentile
+
+
+class SeedTestCase(TestCase):
+
+    def test_creates_requested_rows(self):
+        created = seed(writers=10, tags=5, articles=50, comments=200, reports=20, batch_size=7)
+        self.assertEqual(created, {'writers': 10, 'tags': 5, 'articles': 50, 'comments': 200, 'reports': 20})
+        self.assertEqual(
+            [Writer.objects.count(), Tag.objects.count(), Article.objects.count(), Comment.objects.count(),
+             Report.objects.count()],
+            [10, 5, 50, 200, 20]
+        )
+
+    def test_users_can_log_in(self):
+        seed(writers=2, tags=1, articles=2, comments=0, reports=0)
+        writer = Writer.objects.first()
+        self.assertTrue(self.client.login(username=writer.name, password='seed'))
+
+    def test_summaries_are_rebuilt(self):
+        seed(writers=5, tags=3, articles=30, comments=50, reports=0)
+        for writer in Writer.objects.annotate(count=Count('article')):
+            self.assertEqual(WriterLeaderboard.objects.get(pk=writer.pk).num_articles, writer.count)
+            self.assertEqual(WriterStats.objects.get(pk=writer.pk).num_articles, writer.count)
+
+    def test_same_seed_gives_same_data(self):
+        seed(writers=5, tags=3, articles=20, comments=0, reports=0, random_seed=1)
+        first = list(Article.objects.order_by('pk').values_list('name', 'text'))
+        for model in (User, Writer, Tag):
+            model.objects.all().delete()
+        seed(writers=5, tags=3, articles=20, comments=0, reports=0, random_seed=1)
+        second = list(Article.objects.order_by('pk').values_list('name', 'text'))
+        self.assertEqual(first, second)
+
+    def test_articles_are_skewed_to_few_writers(self):
+        seed(writers=50, tags=10, articles=1000, comments=0, reports=0)
+        counts = sorted(Writer.objects.annotate(count=Count('article')).values_list('count', flat=True), reverse=True)
+        self.assertGreater(sum(counts[:10]), sum(counts[10:]))
+
+    def test_command(self):
+        out = StringIO()
+        call_command('seed_blog', writers=3, tags=2, articles=5, comments=5, reports=1, stdout=out)
+        self.assertIn('Created 3 writers', out.getvalue())
+
+
+class PercentileTestCase(SimpleTestCase):
+
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(get_percentile(values, 50), 50)
+        self.assertEqual(get_percentile(values, 99), 99)
+        self.assertEqual(get_percentile([7], 90), 7)
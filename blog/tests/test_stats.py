@@ -0,0 +1,66 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Article, Writer, Comment, WriterStats
+from blog.stats import rebuild
+from blog.tests.test_models import create_writer, create_article, create_tag, create_user
+
+
+def create_comment(article, author, text='test_comment'):
+    return article.comment_set.create(author=author, text=text, comment_date=timezone.now())
+
+
+class WriterStatsTestCase(TestCase):
+
+    def setUp(self):
+        self.writer = create_writer('test_writer', 0)
+        self.commenter = create_writer('test_commenter', 0)
+        self.article = create_article(self.writer, 'test_article', 'test_text', tag=create_tag('test_tag'))
+
+    def get_stats(self, writer):
+        return WriterStats.objects.get(pk=writer.pk)
+
+    def test_article_create_and_delete(self):
+        article = create_article(self.writer, 'test_article_2', 'test_text')
+        self.assertEqual(self.get_stats(self.writer).num_articles, 2)
+        self.assertEqual(self.get_stats(self.writer).last_activity, article.last_edit)
+        article.delete()
+        self.assertEqual(self.get_stats(self.writer).num_articles, 1)
+        self.assertEqual(self.get_stats(self.writer).last_activity, self.article.last_edit)
+
+    def test_comment_create_and_delete(self):
+        comment = create_comment(self.article, self.commenter)
+        self.assertEqual(self.get_stats(self.writer).num_comments_received, 1)
+        self.assertEqual(self.get_stats(self.commenter).last_activity, comment.comment_date)
+        comment.delete()
+        self.assertEqual(self.get_stats(self.writer).num_comments_received, 0)
+        self.assertIsNone(self.get_stats(self.commenter).last_activity)
+
+    def test_article_delete_removes_its_comments(self):
+        create_comment(self.article, self.commenter)
+        create_comment(self.article, self.commenter)
+        self.article.delete()
+        stats = self.get_stats(self.writer)
+        self.assertEqual((stats.num_articles, stats.num_comments_received), (0, 0))
+        self.assertIsNone(stats.last_activity)
+
+    def test_rebuild_matches_incremental_updates(self):
+        create_comment(self.article, self.commenter)
+        create_comment(self.article, self.writer)
+        expected = list(WriterStats.objects.order_by('pk').values_list())
+        WriterStats.objects.update(num_articles=100, num_comments_received=100, last_activity=None)
+        rebuild(WriterStats, Writer, Article, Comment)
+        self.assertEqual(list(WriterStats.objects.order_by('pk').values_list()), expected)
+
+    def test_writer_page_shows_stats(self):
+        create_comment(self.article, self.commenter)
+        response = self.client.get(reverse('blog:writer', args=('test_writer',)))
+        self.assertEqual(response.context['stats'].num_comments_received, 1)
+        self.assertContains(response, 'Comments received: 1')
+
+    def test_my_page_shows_stats(self):
+        create_user('test_writer', 'test_writer')
+        self.client.login(username='test_writer', password='test_writer')
+        response = self.client.get(reverse('blog:my_page'))
+        self.assertEqual(response.context['stats'].num_articles, 1)
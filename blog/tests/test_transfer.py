@@ -0,0 +1,124 @@
+import os
+import json
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.test import TestCase
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from blog.models import Article, Writer, Tag, Comment, Report, WriterLeaderboard
+from blog.tests.test_models import create_writer, create_article, create_tag, create_user
+from blog.tests.test_stats import create_comment
+
+
+class TransferTestCase(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.export_dir = tempfile.TemporaryDirectory()
+        self.override = self.settings(MEDIA_ROOT=self.media_root.name)
+        self.override.enable()
+
+        self.tag = create_tag('test_tag')
+        self.writer = create_writer('test_writer', 30, bio='test_bio')
+        self.other_writer = create_writer('test_other_writer', 0)
+        self.article = create_article(self.writer, 'test_article', 'test_text', tag=self.tag,
+                                      image='articles/images/test_article.jpg')
+        create_article(self.other_writer, 'test_other_article', 'test_text')
+        create_comment(self.article, self.other_writer, 'test_comment')
+        create_comment(self.article, self.writer, 'test_reply')
+        Report.objects.create(reporter=self.other_writer, article=self.article)
+        self.create_file('articles/images/test_article.jpg')
+
+    def tearDown(self):
+        self.override.disable()
+        self.media_root.cleanup()
+        self.export_dir.cleanup()
+
+    def create_file(self, name, root=None):
+        path = os.path.join(root or self.media_root.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(b'image')
+
+    def call(self, command, **options):
+        stdout = StringIO()
+        call_command(command, self.export_dir.name, stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def get_content(self):
+        return [
+            sorted(Tag.objects.values_list('name', 'image')),
+            sorted(Writer.objects.values_list('name', 'bio', 'age', 'image')),
+            sorted(Article.objects.values_list('author__name', 'name', 'tag__name', 'text', 'image', 'pub_date')),
+            sorted(Comment.objects.values_list('article__name', 'author__name', 'text', 'comment_date')),
+            sorted(Report.objects.values_list('reporter__name', 'article__name')),
+        ]
+
+    def delete_content(self):
+        Tag.objects.all().delete()
+        Writer.objects.all().delete()
+        os.remove(os.path.join(self.media_root.name, 'articles/images/test_article.jpg'))
+
+    def test_export_is_jsonl_in_dependency_order(self):
+        output = self.call('export_blog')
+        self.assertIn('2 articles', output)
+        with open(os.path.join(self.export_dir.name, 'blog.jsonl')) as file:
+            types = [json.loads(line)['type'] for line in file]
+        self.assertEqual(types, ['header', 'tag', 'writer', 'writer', 'article', 'article', 'comment', 'comment',
+                                 'report'])
+        self.assertTrue(os.path.exists(os.path.join(self.export_dir.name, 'media/articles/images/test_article.jpg')))
+
+    def test_round_trip(self):
+        content = self.get_content()
+        self.call('export_blog')
+        self.delete_content()
+
+        output = self.call('import_blog', batch_size=1)
+        self.assertIn('2 articles', output)
+        self.assertEqual(self.get_content(), content)
+        self.assertTrue(os.path.exists(os.path.join(self.media_root.name, 'articles/images/test_article.jpg')))
+        self.assertEqual(WriterLeaderboard.objects.get(writer__name='test_writer').num_articles, 1)
+
+    def test_repeated_import_keeps_existing_rows(self):
+        content = self.get_content()
+        self.call('export_blog')
+        output = self.call('import_blog')
+        self.assertIn('0 articles', output)
+        self.assertIn('2 comments', output.split('Skipped')[1])
+        self.assertIn('0 reports', output.split('Skipped')[0])
+        self.assertIn('1 reports', output.split('Skipped')[1])
+        self.assertEqual(self.get_content(), content)
+
+    def test_writers_are_linked_to_users_of_same_name(self):
+        user = create_user('test_writer', 'test_writer')
+        Writer.objects.filter(pk=self.writer.pk).update(user=user)
+        self.call('export_blog')
+        self.delete_content()
+        self.call('import_blog')
+        self.assertEqual(Writer.objects.get(name='test_writer').user, user)
+        self.assertIsNone(Writer.objects.get(name='test_other_writer').user)
+
+    def test_image_paths_outside_media_are_dropped(self):
+        self.call('export_blog')
+        path = os.path.join(self.export_dir.name, 'blog.jsonl')
+        with open(path) as file:
+            text = file.read().replace('articles/images/test_article.jpg', '../../etc/test_article.jpg')
+        with open(path, 'w') as file:
+            file.write(text)
+        self.delete_content()
+        self.call('import_blog')
+        self.assertFalse(Article.objects.get(name='test_article').image)
+
+    def test_compression_needs_zstandard(self):
+        with mock.patch('blog.transfer.zstandard', None):
+            with self.assertRaises(CommandError):
+                self.call('export_blog', compress=True)
+
+    def test_invalid_export_is_rejected(self):
+        with open(os.path.join(self.export_dir.name, 'blog.jsonl'), 'w') as file:
+            file.write('{"type": "article"}\n')
+        with self.assertRaises(CommandError):
+            self.call('import_blog')
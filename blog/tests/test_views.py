@@ -1,6 +1,10 @@
 import os
+import datetime
+from unittest import mock
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
 from django.test import Client
 from django.urls import reverse
@@ -10,7 +14,7 @@ from django.conf import settings
 from django.core.files.storage import default_storage
 from django.contrib.auth import get_user
 
-from blog.models import Writer, Article, Comment, Tag
+from blog.models import Writer, Article, Comment, Tag, Upload
 from blog.forms import *
 
 
@@ -368,6 +372,48 @@ class EditViewTests(TestCase):
             tag=new_tag,
         ).image.path.startswith(os.path.join(settings.MEDIA_ROOT, r'articles/images/test_writer_test_article_new')))
 
+    def post_edit(self, **data):
+        return self.client.post(reverse('blog:edit', args=(self.article.name, )), {
+            'name': 'test_article_new', 'text': 'test_article_new text', 'tag': self.tag.name, **data,
+        })
+
+    def test_post_saves_article_once(self):
+        with open(os.path.join(settings.MEDIA_ROOT, r'test/images/test1.jpg'), 'rb') as image:
+            new_image = SimpleUploadedFile('test1.jpg', image.read(), content_type='image/jpeg')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post_edit(image=new_image)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, reverse('blog:my_article', args=('test_article_new', )))
+        writes = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "blog_article"')]
+        self.assertEqual(len(writes), 1)
+
+    def test_post_keeps_old_image_until_commit(self):
+        old_path = Article.objects.get(pk=self.article.pk).image.path
+        self.post_edit()
+        article = Article.objects.get(pk=self.article.pk)
+        self.assertNotEqual(article.image.path, old_path)
+        self.assertTrue(os.path.exists(article.image.path))
+        self.assertTrue(os.path.exists(old_path))
+
+    def test_post_with_invalid_image_keeps_article(self):
+        old_image = Article.objects.get(pk=self.article.pk).image.name
+        with open(os.path.join(settings.MEDIA_ROOT, r'test/images/test1.jpg'), 'rb') as image:
+            new_image = SimpleUploadedFile('test1.jpg', image.read(), content_type='image/jpeg')
+        with mock.patch('blog.model_logic.resize_image', side_effect=OSError):
+            response = self.post_edit(image=new_image)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['message'], 'Image cannot be read')
+        self.assertEqual(response.context['form'].initial['name'], 'test_article')
+        article = Article.objects.get(pk=self.article.pk)
+        self.assertEqual((article.name, article.image.name), ('test_article', old_image))
+        self.assertFalse([name for name in default_storage.listdir('articles/images')[1]
+                          if name.startswith('test_writer_test_article_new')])
+
+    def test_post_with_unavailable_name_renders_message(self):
+        create_article(self.writer, 'test_article_new', 'text', tag=self.tag)
+        response = self.post_edit()
+        self.assertContains(response, 'This name is not available')
+
 
 class DeleteViewTests(TestCase):
 
@@ -618,3 +664,144 @@ class ReportViewTestCase(TestCase):
         response = self.client.get(reverse('blog:report', args=(self.author.name, self.article.name)))
         self.assertEqual(response.json()['ok'], False)
         self.assertEqual(response.json()['message'], 'You have already reported this article')
+
+
+class UploadViewTestCase(TestCase):
+
+    def setUp(self):
+        self.tag = create_tag('No tag')
+        self.user = create_user('test_writer', 'test_writer')
+        self.writer = create_writer('test_writer', 0)
+        self.client.login(username='test_writer', password='test_writer')
+        with open(os.path.join(settings.MEDIA_ROOT, r'test/images/test1.jpg'), 'rb') as file:
+            self.data = file.read()
+
+    def tearDown(self):
+        for upload in Upload.objects.all():
+            upload.delete_staged()
+
+        for name in default_storage.listdir('articles/images')[1]:
+            if name.startswith('test_writer_test_article'):
+                default_storage.delete('articles/images/' + name)
+
+        for name in default_storage.listdir('writers/images')[1]:
+            if name.startswith('test_writer'):
+                default_storage.delete('writers/images/' + name)
+
+    def create_upload(self, filename='test1.jpg', size=None):
+        response = self.client.post(reverse('blog:uploads'), {'filename': filename, 'size': size or len(self.data)})
+        return response
+
+    def send_chunk(self, upload_id, offset, chunk):
+        return self.client.patch(
+            reverse('blog:upload', args=(upload_id, )),
+            chunk,
+            content_type='application/octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def upload_in_chunks(self, chunk_size=100000):
+        upload_id = self.create_upload().json()['id']
+        for offset in range(0, len(self.data), chunk_size):
+            response = self.send_chunk(upload_id, offset, self.data[offset:offset + chunk_size])
+        return upload_id, response
+
+    def test_create_if_unauthenticated(self):
+        self.client.logout()
+        response = self.create_upload()
+        self.assertEqual(response.status_code, 401)
+
+    def test_create_rejects_unsupported_file_type(self):
+        response = self.create_upload(filename='test.exe')
+        self.assertEqual(response.status_code, 400)
+
+    def test_chunks_are_assembled(self):
+        upload_id, response = self.upload_in_chunks()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['complete'])
+        with open(Upload.objects.get(pk=upload_id).staging_path(), 'rb') as file:
+            self.assertEqual(file.read(), self.data)
+
+    def test_resume_from_reported_offset(self):
+        upload_id = self.create_upload().json()['id']
+        self.send_chunk(upload_id, 0, self.data[:1000])
+
+        response = self.send_chunk(upload_id, 0, self.data[:1000])
+        self.assertEqual(response.status_code, 409)
+
+        offset = self.client.get(reverse('blog:upload', args=(upload_id, ))).json()['offset']
+        self.assertEqual(offset, 1000)
+        response = self.send_chunk(upload_id, offset, self.data[offset:])
+        self.assertTrue(response.json()['complete'])
+
+    def test_chunk_being_written_is_not_written_again(self):
+        upload_id = self.create_upload().json()['id']
+        Upload.objects.filter(pk=upload_id).update(writing_until=timezone.now() + datetime.timedelta(minutes=1))
+        response = self.send_chunk(upload_id, 0, self.data[:1000])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 0)
+
+        Upload.objects.filter(pk=upload_id).update(writing_until=timezone.now() - datetime.timedelta(minutes=1))
+        response = self.send_chunk(upload_id, 0, self.data[:1000])
+        self.assertEqual(response.json()['offset'], 1000)
+        self.assertIsNone(Upload.objects.get(pk=upload_id).writing_until)
+
+    def test_failed_chunk_keeps_offset(self):
+        upload_id = self.create_upload().json()['id']
+        with mock.patch('blog.model_logic.write_chunk', side_effect=OSError):
+            self.assertEqual(self.send_chunk(upload_id, 0, self.data[:1000]).status_code, 500)
+        upload = Upload.objects.get(pk=upload_id)
+        self.assertEqual((upload.offset, upload.writing_until), (0, None))
+        self.assertEqual(self.send_chunk(upload_id, 0, self.data[:1000]).json()['offset'], 1000)
+
+    def test_rejects_file_that_is_not_image(self):
+        self.data = b'not an image'
+        upload_id, response = self.upload_in_chunks()
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Upload.objects.filter(pk=upload_id).exists())
+
+    def test_add_form_with_upload_id(self):
+        upload_id, response = self.upload_in_chunks()
+        staging_path = Upload.objects.get(pk=upload_id).staging_path()
+
+        response = self.client.post(reverse('blog:my_page'), {
+            'add_form': ['Save'],
+            'name': 'test_article',
+            'text': 'test_article text',
+            'tag': self.tag.name,
+            'upload_id': upload_id,
+        })
+
+        self.assertEqual(response.status_code, 302)
+        article = Article.objects.get(author=self.writer, name='test_article')
+        self.assertTrue(article.image.path.startswith(os.path.join(settings.MEDIA_ROOT, 'articles/images/test_writer_test_article')))
+        self.assertFalse(os.path.exists(staging_path))
+        self.assertFalse(Upload.objects.filter(pk=upload_id).exists())
+
+    def test_add_form_with_unfinished_or_unknown_upload(self):
+        upload_id = self.create_upload().json()['id']
+        self.send_chunk(upload_id, 0, self.data[:1000])
+
+        for posted_id in (upload_id, '00000000-0000-0000-0000-000000000000'):
+            response = self.client.post(reverse('blog:my_page'), {
+                'add_form': ['Save'],
+                'name': 'test_article',
+                'text': 'test_article text',
+                'tag': self.tag.name,
+                'upload_id': posted_id,
+            })
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['message'], 'Image upload is not finished')
+            self.assertFalse(Article.objects.filter(author=self.writer, name='test_article').exists())
+        self.assertTrue(Upload.objects.filter(pk=upload_id).exists())
+
+    def test_image_form_with_upload_id(self):
+        upload_id, response = self.upload_in_chunks()
+        response = self.client.post(reverse('blog:my_page'), {
+            'image_form': ['Submit'],
+            'upload_id': upload_id,
+        })
+
+        writer = Writer.objects.get(name=self.writer.name)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(writer.image.path.startswith(os.path.join(settings.MEDIA_ROOT, r'writers/images/test_writer')))
@@ -0,0 +1,354 @@
+"""
+Export and import of blog content (manage.py export_blog / import_blog).
+An export is a directory with blog.jsonl (blog.jsonl.zst when compressed) and media/ holding the
+image files. Lines are streamed in dependency order: tags, writers, articles, comments, reports,
+and rows refer to each other by natural key (names), not by primary key.
+Import reads batches of one type, resolves keys with one query per batch and inserts them with
+bulk_create, every batch in its own transaction. Existing writers, tags and articles are kept,
+and comments of existing articles are not imported again, so an import can be repeated
+"""
+import io
+import os
+import json
+import shutil
+import operator
+import datetime
+import functools
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction, connections, router
+from django.db.models import Q, DateTimeField
+
+from .models import Article, Writer, Tag, Comment, Report
+from .seed import rebuild_summaries
+from . import model_logic
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+version = 1
+filename = 'blog.jsonl'
+compressed_filename = 'blog.jsonl.zst'
+media_dir = 'media'
+default_images = {model_logic.default_writer_image, model_logic.default_tag_image}
+image_fields = ('image', 'image_width', 'image_height', 'image_placeholder')
+
+# type -> (model, [(key, lookup)]) in the order of the export
+formats = {
+    'tag': (Tag, [('name', 'name'), ('image', 'image')]),
+    'writer': (Writer, [('name', 'name'), ('user', 'user__username'), ('bio', 'bio'), ('age', 'age')]
+               + [(field, field) for field in image_fields]),
+    'article': (Article, [('author', 'author__name'), ('name', 'name'), ('tag', 'tag__name'), ('text', 'text'),
+                          ('pub_date', 'pub_date'), ('last_edit', 'last_edit')]
+                + [(field, field) for field in image_fields]),
+    'comment': (Comment, [('article_author', 'article__author__name'), ('article', 'article__name'),
+                          ('author', 'author__name'), ('text', 'text'), ('comment_date', 'comment_date')]),
+    'report': (Report, [('reporter', 'reporter__name'), ('article_author', 'article__author__name'),
+                        ('article', 'article__name')]),
+}
+dates = {'pub_date', 'last_edit', 'comment_date'}
+
+
+class TransferError(Exception):
+    pass
+
+
+@contextmanager
+def open_jsonl(path: str, mode: str):
+    """Text file of lines, zstd-compressed if the name ends with .zst"""
+    if not path.endswith('.zst'):
+        with open(path, mode, encoding='utf-8') as file:
+            yield file
+        return
+    if zstandard is None:
+        raise TransferError('zstandard is not installed, it is needed for compressed exports')
+    with open(path, mode + 'b') as raw:
+        if mode == 'w':
+            stream = zstandard.ZstdCompressor().stream_writer(raw)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw)
+        with io.TextIOWrapper(stream, encoding='utf-8') as file:
+            yield file
+
+
+def encode(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    raise TypeError('{} is not JSON serializable'.format(type(value).__name__))
+
+
+def parse_date(value):
+    # written by encode(), fromisoformat reads it several times faster than dateparse
+    return datetime.datetime.fromisoformat(value) if value is not None else None
+
+
+def get_safe_path(name: str):
+    """Storage name of an image inside the media directory, None for names escaping it"""
+    if not name:
+        return None
+    path = os.path.normpath(name)
+    if os.path.isabs(path) or path == '..' or path.startswith('..' + os.sep):
+        return None
+    return path
+
+
+def copy_image(name: str, source_root: str, target_root: str):
+    """Copies an image between media directories, keeps files already in the target"""
+    path = get_safe_path(name)
+    if path is None or name in default_images:
+        return False
+    source, target = os.path.join(source_root, path), os.path.join(target_root, path)
+    if not os.path.isfile(source) or os.path.exists(target):
+        return False
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.copyfile(source, target)
+    return True
+
+
+def export(directory: str, compress: bool = False, images: bool = True, chunk_size: int = 2000):
+    """Writes the export to directory, returns dict with number of exported rows and images"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, compressed_filename if compress else filename)
+    media_root = os.path.join(directory, media_dir)
+    counts = dict.fromkeys(list(formats) + ['image'], 0)
+
+    with open_jsonl(path, 'w') as file:
+        file.write(json.dumps({'type': 'header', 'version': version}) + '\n')
+        for type_, (model, columns) in formats.items():
+            keys = [key for key, _ in columns]
+            rows = model.objects.order_by('pk').values_list(*(lookup for _, lookup in columns))
+            for row in rows.iterator(chunk_size=chunk_size):
+                record = dict(zip(keys, row))
+                record['type'] = type_
+                file.write(json.dumps(record, default=encode) + '\n')
+                counts[type_] += 1
+                if images and record.get('image'):
+                    counts['image'] += copy_image(record['image'], settings.MEDIA_ROOT, media_root)
+    return counts
+
+
+def read_records(path: str):
+    with open_jsonl(path, 'r') as file:
+        header = json.loads(file.readline() or '{}')
+        if header.get('type') != 'header' or header.get('version') != version:
+            raise TransferError('{} is not a blog export of version {}'.format(path, version))
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def get_export_path(directory: str):
+    for name in (filename, compressed_filename):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            return path
+    raise TransferError('No {} or {} in {}'.format(filename, compressed_filename, directory))
+
+
+class Importer:
+    def __init__(self, directory: str, batch_size: int = 1000, images: bool = True):
+        self.path = get_export_path(directory)
+        self.media_root = os.path.join(directory, media_dir)
+        self.batch_size = batch_size
+        self.images = images
+        self.writers = {}  # name -> pk of every imported or already existing writer
+        self.tags = {}
+        self.existing_articles = set()  # (author name, name) of articles that were there before
+        self.had_articles = Article.objects.exists()  # import into an empty blog does not look for existing ones
+        self.created = dict.fromkeys(list(formats) + ['image'], 0)
+        self.skipped = dict.fromkeys(formats, 0)
+
+    def run(self):
+        """Returns (created, skipped) dicts of counts by type"""
+        batch, batch_type = [], None
+        for record in read_records(self.path):
+            type_ = record.get('type')
+            if type_ not in formats:
+                raise TransferError('Unknown record type: {}'.format(type_))
+            if batch and (type_ != batch_type or len(batch) >= self.batch_size):
+                self.flush(batch_type, batch)
+                batch = []
+            batch_type = type_
+            batch.append(record)
+        if batch:
+            self.flush(batch_type, batch)
+        rebuild_summaries()
+        return self.created, self.skipped
+
+    def flush(self, type_: str, records: list):
+        for record in records:
+            for key in dates.intersection(record):
+                record[key] = parse_date(record[key])
+            if 'image' in record:
+                record['image'] = self.import_image(record['image'])
+        with transaction.atomic():
+            getattr(self, 'import_' + type_ + 's')(records)
+
+    def import_image(self, name):
+        if not name or name in default_images:
+            return name
+        path = get_safe_path(name)
+        if path is None:
+            return None
+        if self.images:
+            self.created['image'] += copy_image(path, self.media_root, settings.MEDIA_ROOT)
+        return path
+
+    def get_new(self, type_: str, records: list, existing: set, get_key):
+        """Records whose key is not in the database yet, first of duplicates in the batch"""
+        new = {}
+        for record in records:
+            key = get_key(record)
+            if key in existing or key in new:
+                self.skipped[type_] += 1
+            else:
+                new[key] = record
+        self.created[type_] += len(new)
+        return list(new.values())
+
+    def import_tags(self, records: list):
+        names = [record['name'] for record in records]
+        existing = set(Tag.objects.filter(name__in=names).values_list('name', flat=True))
+        new = self.get_new('tag', records, existing, lambda record: record['name'])
+        Tag.objects.bulk_create([Tag(name=record['name'], image=record['image']) for record in new])
+        self.tags.update(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+
+    def import_writers(self, records: list):
+        names = [record['name'] for record in records]
+        existing = set(Writer.objects.filter(name__in=names).values_list('name', flat=True))
+        new = self.get_new('writer', records, existing, lambda record: record['name'])
+        # writers are linked to users of the same name that have no writer; users themselves are not exported
+        users = dict(User.objects.filter(
+            username__in=[record['user'] for record in new if record['user']], writer__isnull=True,
+        ).values_list('username', 'pk'))
+        Writer.objects.bulk_create([
+            Writer(user_id=users.get(record['user']), **{
+                key: record[key] for key in ('name', 'bio', 'age') + image_fields
+            })
+            for record in new
+        ])
+        self.writers.update(Writer.objects.filter(name__in=names).values_list('name', 'pk'))
+
+    def import_articles(self, records: list):
+        records = self.resolve('article', records, author='author')
+        existing = set()
+        if self.had_articles:
+            existing = {key[:2] for key in get_articles({(record['author_id'], record['name']) for record in records})}
+        for record in records:
+            if (record['author_id'], record['name']) in existing:
+                self.existing_articles.add((record['author'], record['name']))
+        new = self.get_new('article', records, existing, lambda record: (record['author_id'], record['name']))
+        fields = ('name', 'text', 'pub_date', 'last_edit') + image_fields
+        insert_rows(Article, ('author_id', 'tag_id') + fields, [
+            [record['author_id'], self.tags.get(record['tag'])] + [record[key] for key in fields] for record in new
+        ])
+
+    def import_comments(self, records: list):
+        new = [
+            record for record in records if (record['article_author'], record['article']) not in self.existing_articles
+        ]
+        self.skipped['comment'] += len(records) - len(new)
+        new = self.resolve_articles('comment', self.resolve('comment', new, author='author'))
+        insert_rows(Comment, ('article_id', 'author_id', 'text', 'comment_date'), [
+            [record['article_id'], record['author_id'], record['text'], record['comment_date']] for record in new
+        ])
+        self.created['comment'] += len(new)
+
+    def import_reports(self, records: list):
+        records = self.resolve_articles('report', self.resolve('report', records, reporter='reporter'))
+        existing = set()
+        if self.had_articles:
+            existing = set(get_reports({(record['reporter_id'], record['article_id']) for record in records}))
+        new = self.get_new('report', records, existing, lambda record: (record['reporter_id'], record['article_id']))
+        # unique per reporter and article, reports made meanwhile are ignored
+        Report.objects.bulk_create([
+            Report(reporter_id=record['reporter_id'], article_id=record['article_id']) for record in new
+        ], ignore_conflicts=True)
+
+    def load_writers(self, names: set):
+        """Writers missing in the export but present in the database can be referred to as well"""
+        missing = names - self.writers.keys() - {None}
+        if missing:
+            self.writers.update(Writer.objects.filter(name__in=missing).values_list('name', 'pk'))
+
+    def resolve(self, type_: str, records: list, **fields):
+        """Sets <field>_id of writer names in records, drops records of unknown writers"""
+        self.load_writers({record[key] for record in records for key in fields.values()})
+        resolved = []
+        for record in records:
+            pks = {field + '_id': self.writers.get(record[key]) for field, key in fields.items()}
+            if None in pks.values():
+                self.skipped[type_] += 1
+                continue
+            record.update(pks)
+            resolved.append(record)
+        return resolved
+
+    def resolve_articles(self, type_: str, records: list):
+        """Sets article_id of (article_author, article) keys with one query, drops records of unknown articles"""
+        self.load_writers({record['article_author'] for record in records})
+        keys = {(self.writers.get(record['article_author']), record['article']) for record in records}
+        articles = {(author_id, name): pk for author_id, name, pk in get_articles(keys)}
+        resolved = []
+        for record in records:
+            record['article_id'] = articles.get((self.writers.get(record['article_author']), record['article']))
+            if record['article_id'] is None:
+                self.skipped[type_] += 1
+                continue
+            resolved.append(record)
+        return resolved
+
+
+def get_articles(keys: set):
+    """(author_id, name, pk) of articles with given (author_id, name) keys, looked up by the unique index"""
+    names = {}
+    for author_id, name in keys:
+        if author_id is not None:
+            names.setdefault(author_id, []).append(name)
+    if not names:
+        return []
+    # author_id__in and name__in together would probe every combination of both lists
+    condition = functools.reduce(operator.or_, (
+        Q(author_id=author_id, name__in=author_names) for author_id, author_names in names.items()
+    ))
+    return Article.objects.filter(condition).values_list('author_id', 'name', 'pk')
+
+
+def get_reports(keys: set):
+    """(reporter_id, article_id) of existing reports with given keys, one condition per reporter"""
+    articles = {}
+    for reporter_id, article_id in keys:
+        articles.setdefault(reporter_id, []).append(article_id)
+    if not articles:
+        return []
+    condition = functools.reduce(operator.or_, (
+        Q(reporter_id=reporter_id, article_id__in=article_ids) for reporter_id, article_ids in articles.items()
+    ))
+    return Report.objects.filter(condition).values_list('reporter_id', 'article_id')
+
+
+def insert_rows(model, fields: tuple, rows: list):
+    """
+    Inserts rows as one prepared statement. bulk_create compiles every value of every row into SQL,
+    it was most of the import time; rows here are already validated records of an export
+    """
+    if not rows:
+        return
+    connection = connections[router.db_for_write(model)]
+    columns = [model._meta.get_field(field) for field in fields]
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join(connection.ops.quote_name(column.column) for column in columns),
+        ', '.join(['%s'] * len(columns)),
+    )
+    adapted = [index for index, column in enumerate(columns) if isinstance(column, DateTimeField)]
+    for row in rows:
+        for index in adapted:
+            row[index] = columns[index].get_db_prep_save(row[index], connection)
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
@@ -15,7 +15,19 @@ urlpatterns = [
     path('my_page/<str:article_name>/', views.my_article, name='my_article'),
     path('my_page/<str:article_name>/edit/', views.edit, name='edit'),
     path('my_page/<str:article_name>/delete/', views.delete, name='delete'),
+    path('my_page/<str:article_name>/autosave/', views.autosave, name='autosave'),
+    path('my_page/<str:article_name>/revisions/<int:number>/', views.revision, name='revision'),
     path('search/', views.search, name='search'),
+    path('uploads/', views.uploads, name='uploads'),
+    path('uploads/<uuid:upload_id>/', views.upload, name='upload'),
+    path('api/articles/', views.api, {'resource': 'articles'}, name='api_articles'),
+    path('api/writers/', views.api, {'resource': 'writers'}, name='api_writers'),
+    path('api/tags/', views.api, {'resource': 'tags'}, name='api_tags'),
+    path('api/comments/', views.api, {'resource': 'comments'}, name='api_comments'),
+    path('feeds/<str:kind>/', views.feed, name='feed'),
+    path('feeds/<str:kind>/writer/<str:writer_name>/', views.feed, name='writer_feed'),
+    path('feeds/<str:kind>/tag/<str:tag_name>/', views.feed, name='tag_feed'),
+    path('metrics/', views.metrics, name='metrics'),
     path('<str:writer_name>/', views.writer, name='writer'),
     path('<str:writer_name>/<str:article_name>/', views.article, name='article'),
     path('<str:writer_name>/<str:article_name>/report/', views.report, name='report')
@@ -1,12 +1,14 @@
-from django.http import HttpResponseRedirect, HttpResponse
+from django.http import HttpResponseRedirect, HttpResponse, JsonResponse
 from django.urls import reverse
 from django.contrib.auth import logout
 
 from . import logic
 from .base import base_view
+from .routers import read_only
 
 
 @base_view
+@read_only
 def index(request):
     index = logic.IndexView(request)
     index.protect_from_unexisting_user()
@@ -15,6 +17,7 @@ def index(request):
 
 
 @base_view
+@read_only
 def article(request, writer_name, article_name):
     article = logic.ArticleView(request)
     article.set_context(writer_name, article_name)
@@ -27,6 +30,7 @@ def article(request, writer_name, article_name):
 
 
 @base_view
+@read_only
 def writer(request, writer_name):
     writer = logic.WriterView(request)
     writer.set_context(writer_name)
@@ -76,8 +80,7 @@ def edit(request, article_name):
         return edit.render()
 
     elif request.method == 'POST':
-        edit.edit_article(article_name)
-        return edit.redirect_to_my_article()
+        return edit.edit_article(article_name)
 
     else:
         return HttpResponse('<h1>Unsupported Http method</h1>')
@@ -134,6 +137,7 @@ def log_out(request):
 
 
 @base_view
+@read_only
 def authors(request):
     authors = logic.AuthorsView(request)
     authors.set_context()
@@ -141,6 +145,7 @@ def authors(request):
 
 
 @base_view
+@read_only
 def tags(request):
     tags = logic.TagsView(request)
     tags.set_context()
@@ -148,6 +153,7 @@ def tags(request):
 
 
 @base_view
+@read_only
 def tag(request, tag_name):
     tag = logic.TagView(request)
     tag.set_context(tag_name)
@@ -155,6 +161,7 @@ def tag(request, tag_name):
 
 
 @base_view
+@read_only
 def search(request):
     search = logic.SearchView(request)
     search.set_context()
@@ -165,3 +172,58 @@ def search(request):
 def report(request, writer_name: str, article_name: str):
     report = logic.Report_View(request)
     return report.report(writer_name, article_name)
+
+
+@base_view
+def uploads(request):
+    upload = logic.UploadView(request)
+    if request.method != 'POST':
+        return JsonResponse({'ok': False, 'message': 'Unsupported Http method'}, status=405)
+    return upload.create()
+
+
+@base_view
+def upload(request, upload_id):
+    upload = logic.UploadView(request)
+    return upload.process(upload_id)
+
+
+@base_view
+def autosave(request, article_name):
+    revision = logic.RevisionView(request)
+    if request.method != 'POST':
+        return JsonResponse({'ok': False, 'message': 'Unsupported Http method'}, status=405)
+    return revision.autosave(article_name)
+
+
+@base_view
+def revision(request, article_name, number):
+    revision = logic.RevisionView(request)
+    if request.method != 'GET':
+        return JsonResponse({'ok': False, 'message': 'Unsupported Http method'}, status=405)
+    return revision.get(article_name, number)
+
+
+@base_view
+@read_only
+def feed(request, kind: str, writer_name: str = None, tag_name: str = None):
+    feed = logic.FeedView(request, kind)
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponse('<h1>Unsupported Http method</h1>', status=405)
+    return feed.render(writer_name, tag_name)
+
+
+@base_view
+@read_only
+def api(request, resource: str):
+    api = logic.ApiView(request, resource)
+    if request.method not in ('GET', 'HEAD'):
+        return JsonResponse({'ok': False, 'message': 'Unsupported Http method'}, status=405)
+    return api.render()
+
+
+def metrics(request):
+    metrics = logic.MetricsView(request)
+    if not metrics.is_authorized():
+        return HttpResponse('<h1>401 unauthorized</h1>', status=401)
+    return metrics.render()
@@ -43,11 +43,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.middleware.RequestContextMiddleware',
+    'blog.middleware.RequestMetricsMiddleware',
+    'blog.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'blog.middleware.CurrentWriterMiddleware',
+    'blog.routers.ReplicaStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -87,6 +92,44 @@ DATABASES = {
     }
 }
 
+# Reads of read-only views (blog.routers.read_only) go to REPLICA_DATABASE when it is set, e.g. to 'replica'
+# with DATABASES['replica'] pointing to a streaming replica of default. After a user's POST their reads stay
+# on default for REPLICA_STICKY_SECONDS; replica lagging more than REPLICA_MAX_LAG seconds is not used
+
+DATABASE_ROUTERS = ['blog.routers.ReplicaRouter']
+REPLICA_DATABASE = None
+REPLICA_STICKY_SECONDS = 5
+REPLICA_MAX_LAG = 2
+REPLICA_LAG_CHECK_INTERVAL = 1
+
+
+# Cache, sessions and authentication
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+# https://docs.djangoproject.com/en/3.0/topics/http/sessions/#configuring-the-session-engine
+# Sessions and users of authenticated requests are read from cache. In production use cache
+# shared by all worker processes (memcached, redis), so invalidation on user change reaches all of them;
+# with the process-local LocMemCache blog.auth.CachedModelBackend does not cache users
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# 'django.contrib.sessions.backends.signed_cookies' is supported as well and needs no storage at all
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+AUTHENTICATION_BACKENDS = ['blog.auth.CachedModelBackend']
+AUTH_USER_CACHE_TIMEOUT = 300
+
+
+# Tag registry
+# Tags are kept in memory of every worker process and reloaded when one of them changes, as seen through
+# a version in the shared cache, or at least every TAG_REGISTRY_MAX_AGE seconds, which bounds how long
+# processes keep changed tags when the cache is not shared by them (LocMemCache)
+
+TAG_REGISTRY_MAX_AGE = 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
@@ -130,20 +173,84 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
 
+# Request metrics
+# Every request is logged to blog_request_logger with its number of queries, SQL time and total time,
+# requests slower than this are logged as warnings
+
+REQUEST_METRICS_SLOW_MS = 500
+
+
+# Profiling
+# Fraction of requests profiled with cProfile (0 disables sampling). Single requests can be profiled
+# with X-Profile header made by blog.middleware.get_profiling_token(). Report: manage.py profile_report
+
+PROFILING_SAMPLE_RATE = 0
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILING_MAX_DUMPS = 500
+
+
+# Metrics
+# Prometheus metrics are served on /metrics/ to superusers and to requests with
+# Authorization: Bearer <METRICS_TOKEN> (empty token disables the header). For servers with several
+# worker processes set METRICS_MULTIPROCESS_DIR to a directory shared by them and empty on start
+
+METRICS_TOKEN = ''
+METRICS_MULTIPROCESS_DIR = None
+METRICS_FLUSH_INTERVAL = 5
+
+
+# JSON API
+# /api/articles/, /api/writers/, /api/tags/ and /api/comments/ return API_PAGE_SIZE rows per page
+# (?limit= up to API_MAX_PAGE_SIZE), streamed while API_CHUNK_SIZE rows at a time are fetched
+
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 10000
+API_CHUNK_SIZE = 1000
+
+
+# Article revisions
+# Every REVISION_SNAPSHOT_INTERVAL-th revision of an article text is stored in full, the ones between
+# as compressed changes to the previous one, so any revision is rebuilt from at most that many rows
+
+REVISION_SNAPSHOT_INTERVAL = 20
+
+
+# Feeds
+# /feeds/rss/ and /feeds/atom/, per writer /feeds/<kind>/writer/<name>/ and per tag /feeds/<kind>/tag/<name>/
+# list the latest FEED_SIZE articles with the first FEED_SUMMARY_LENGTH characters of their text.
+# Rendered feeds stay in cache until one of their articles changes (or FEED_CACHE_TIMEOUT seconds),
+# readers may reuse them for FEED_MAX_AGE seconds and then revalidate with ETag / Last-Modified.
+# Feed versions expire after FEED_MAX_AGE seconds too, so with a cache not shared by all worker
+# processes (LocMemCache) feeds are regenerated that often and a change is served at most that much later
+
+FEED_SIZE = 20
+FEED_SUMMARY_LENGTH = 500
+FEED_CACHE_TIMEOUT = 24 * 60 * 60
+FEED_MAX_AGE = 60
+
+
+# Logging
+# Records are queued and written by a background thread of every worker process as JSON lines
+# (with view and request_id); when LOG_QUEUE_SIZE records are waiting, new ones are dropped and counted.
+# All processes append to the same files, rotate them externally (logrotate), they are reopened when moved
+
+LOG_QUEUE_SIZE = 10000
+
 config_dict = {
     'version': 1,
-    'formatters': {
-        'simple': {
-            'format': '%(levelname)s %(asctime)s %(message)s',
-            'datefmt': '%Y-%m-%d %H:%M:%S'
-        },
-    },
     'handlers': {
         'simple': {
-            'class': 'logging.FileHandler',
+            '()': 'blog.logs.queue_handler',
             'filename': 'loggerfile.log',
+            'queue_size': LOG_QUEUE_SIZE,
             'level': 'WARNING',
-            'formatter': 'simple'
+        },
+        'requests': {
+            '()': 'blog.logs.queue_handler',
+            'filename': 'requests.log',
+            'queue_size': LOG_QUEUE_SIZE,
+            'level': 'INFO',
         }
     },
     'loggers': {
@@ -152,6 +259,12 @@ config_dict = {
             'handlers': {
                 'simple'
             }
+        },
+        'blog_request_logger': {
+            'level': 'INFO',
+            'handlers': {
+                'requests'
+            }
         }
     }
 }